@@ -0,0 +1,92 @@
+"""
+Benchmark how long the headless CLI takes to start and send a request.
+
+Runs `main.py --help` (interpreter and argument parsing only) and
+`main.py send` against a local HTTP server, each in a fresh process,
+and reports the median and worst wall time of each. Fails (exit status 1)
+if a median goes over its budget or if a run imports Qt. Run from the
+request-client directory:
+
+    python benchmarks/bench_cli_startup.py
+    python benchmarks/bench_cli_startup.py --runs 20 --send-budget-ms 400
+"""
+import argparse
+import http.server
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BODY = json.dumps({'items': [{'id': i, 'name': f"item {i}"} for i in range(100)]}).encode('utf-8')
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(args, runs):
+    """Run main.py with args in fresh processes; return (wall times, whether Qt was imported)."""
+    times = []
+    imported_qt = False
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime', 'main.py', *args],
+                                 cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                 text=True)
+        times.append(time.perf_counter() - start)
+        if process.returncode != 0:
+            sys.exit(f"main.py {' '.join(args)} failed:\n{process.stderr[-2000:]}")
+        imported_qt = imported_qt or 'PyQt5' in process.stderr
+    return times, imported_qt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CLI's startup time.")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--help-budget-ms', type=float, default=150)
+    parser.add_argument('--send-budget-ms', type=float, default=500)
+    args = parser.parse_args(argv)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    cases = [
+        ('--help', ['--help'], args.help_budget_ms),
+        ('send', ['send', url, '--query', '$.items[0].name'], args.send_budget_ms),
+    ]
+    failed = False
+    try:
+        for name, command, budget in cases:
+            times, imported_qt = measure(command, args.runs)
+            median = statistics.median(times) * 1000
+            over = median > budget
+            failed = failed or over or imported_qt
+            print(json.dumps({
+                'case': name,
+                'median_ms': round(median, 1),
+                'max_ms': round(max(times) * 1000, 1),
+                'budget_ms': budget,
+                'within_budget': not over,
+                'imported_qt': imported_qt,
+            }))
+    finally:
+        server.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
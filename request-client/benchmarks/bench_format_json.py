@@ -0,0 +1,114 @@
+"""
+Benchmark the streaming JSON formatter against json.loads/json.dumps.
+
+Generates a JSON array of records of the requested size (1 GB by default),
+then formats it with each method in a separate process and reports the
+time, throughput and peak memory of each. Run from the request-client
+directory:
+
+    python benchmarks/bench_format_json.py --size-mb 1024
+    python benchmarks/bench_format_json.py --size-mb 100 --methods stream,sorted,json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.json_formatter import format_json_stream  # noqa: E402
+
+METHODS = ('stream', 'sorted', 'json')
+
+RECORD = {
+    'id': 0,
+    'name': "Widget é \"quoted\"",
+    'price': 12.5,
+    'tags': ['alpha', 'beta', 'gamma'],
+    'active': True,
+    'meta': {'created': '2024-01-01T00:00:00Z', 'score': None, 'dimensions': [1.5, 2, 3e-3]},
+}
+
+
+def generate(path, size_mb):
+    """Write a JSON array of about size_mb megabytes of records to path."""
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        index = 0
+        while written < target:
+            RECORD['id'] = index
+            batch = ','.join(json.dumps(RECORD, ensure_ascii=False, separators=(',', ':'))
+                             for _ in range(1000))
+            f.write(batch if index == 0 else ',' + batch)
+            written += len(batch) + 1
+            index += 1000
+        f.write(']')
+    return os.path.getsize(path)
+
+
+def run(method, src_path, dst_path):
+    """Format src_path into dst_path in this process and print the results as JSON."""
+    start = time.perf_counter()
+    if method == 'json':
+        with open(src_path, 'rb') as src:
+            data = json.load(src)
+        with open(dst_path, 'w', encoding='utf-8') as dst:
+            dst.write(json.dumps(data, indent=4, sort_keys=True, ensure_ascii=False))
+    else:
+        threshold = 64 * 1024 if method == 'sorted' else None
+        with open(src_path, 'rb') as src, open(dst_path, 'w', encoding='utf-8') as dst:
+            format_json_stream(src, dst, sort_keys_threshold=threshold)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'seconds': elapsed,
+        'output_bytes': os.path.getsize(dst_path),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=1024, help="Input size to generate")
+    parser.add_argument('--methods', default='stream,sorted',
+                        help=f"Comma-separated methods from {', '.join(METHODS)}; "
+                             "json needs several times the input size in memory")
+    parser.add_argument('--input', help="Format this file instead of generating one")
+    parser.add_argument('--run', nargs=3, metavar=('METHOD', 'SRC', 'DST'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='bench-json-') as directory:
+        src_path = args.input
+        if src_path is None:
+            src_path = os.path.join(directory, 'input.json')
+            print(f"Generating {args.size_mb} MB of JSON...")
+            generate(src_path, args.size_mb)
+        size_mb = os.path.getsize(src_path) / (1024 * 1024)
+        dst_path = os.path.join(directory, 'output.json')
+
+        print(f"{'method':<8} {'input MB':>9} {'seconds':>9} {'MB/s':>7} {'output MB':>10} {'peak RSS MB':>12}")
+        for method in args.methods.split(','):
+            if method not in METHODS:
+                parser.error(f"Unknown method {method!r}")
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), '--run', method, src_path, dst_path],
+                                    capture_output=True, text=True)
+            if result.returncode:
+                print(f"{method:<8} failed: {result.stderr.strip().splitlines()[-1]}")
+                continue
+            stats = json.loads(result.stdout)
+            print(f"{method:<8} {size_mb:>9.0f} {stats['seconds']:>9.1f} {size_mb / stats['seconds']:>7.1f} "
+                  f"{stats['output_bytes'] / (1024 * 1024):>10.0f} {stats['peak_rss_mb']:>12.0f}")
+            os.remove(dst_path)
+
+
+if __name__ == '__main__':
+    main()
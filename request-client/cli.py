@@ -0,0 +1,223 @@
+"""
+Headless command-line client; main.py hands over to it when given a command.
+
+    python main.py send https://httpbin.org/get
+    python main.py send POST https://httpbin.org/post -H 'Content-Type: application/json' -d '{"a": 1}'
+    echo '{"method": "GET", "url": "https://httpbin.org/json"}' | python main.py send --query '$.slideshow.title'
+    python main.py batch requests.jsonl -o results.jsonl -c 16
+
+send prints one JSON object describing the response; batch replays a JSONL
+collection through CollectionRunner. Only the standard library is imported
+until a command runs, and Qt never is, so a call from cron or CI costs the
+interpreter, requests and the request itself.
+"""
+import argparse
+import json
+import sys
+
+COMMANDS = ('send', 'batch')
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS')
+
+
+def main(argv=None):
+    """Run a command; returns the process exit code.
+
+    send exits with 0 for a response, 1 for an HTTP error status when
+    --fail is given and 2 if the request could not be sent or read.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['batch']:
+        # CollectionRunner has its own options; see core/collection_runner.py
+        from core.collection_runner import main as run_collection
+        run_collection(argv[1:])
+        return 0
+
+    parser = argparse.ArgumentParser(prog='main.py', description="Send HTTP requests without the GUI.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    send = commands.add_parser('send', help="Send one request and print the response as JSON",
+                               description="Send one request and print the response as JSON. "
+                                           "Without a URL, a JSON request object ({method, url, "
+                                           "headers, body}) is read from stdin.")
+    send.add_argument('request', nargs='*', metavar='[METHOD] URL')
+    send.add_argument('-H', '--header', action='append', default=[], metavar="'Name: value'")
+    send.add_argument('-d', '--data', help="Request body; @file reads a file, @- stdin")
+    send.add_argument('-q', '--query', help="Print the matches of a JSON query instead of the body, "
+                                            "e.g. '$.items[?(@.price < 10)].name'")
+    send.add_argument('-b', '--body-only', action='store_true',
+                      help="Print just the body, pretty-printed if JSON or XML")
+    send.add_argument('-p', '--pretty', action='store_true', help="Indent the JSON output")
+    send.add_argument('--timeout', type=float, default=30)
+    send.add_argument('--retry', action='store_true', help="Retry idempotent requests that fail")
+    send.add_argument('--http2', action='store_true')
+    send.add_argument('--history', help="Also record the response in this history database")
+    send.add_argument('--fail', action='store_true', help="Exit with 1 for HTTP error statuses")
+    commands.add_parser('batch', help="Replay a JSONL collection (see batch --help)")
+    args = parser.parse_args(argv)
+
+    try:
+        method, url, headers, body = read_request(args)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Invalid request: {e}", file=sys.stderr)
+        return 2
+    return send_request(args, method, url, headers, body)
+
+
+def read_request(args):
+    """Return (method, url, headers, body) from the arguments, or stdin if no URL was given.
+
+    Raises:
+    ValueError: If the arguments or the request object are not valid.
+    KeyError: If a request object has no url.
+    """
+    if not args.request:
+        request = json.load(sys.stdin)
+        if not isinstance(request, dict):
+            raise ValueError("expected a JSON object with method, url, headers and body")
+        method, url = request.get('method', 'GET'), request['url']
+        if not isinstance(method, str) or not isinstance(url, str):
+            raise ValueError("method and url must be strings")
+        body = request.get('body')
+        if body is not None and not isinstance(body, str):
+            body = json.dumps(body)
+        return method.upper(), url, request.get('headers') or {}, body
+
+    if len(args.request) > 2:
+        raise ValueError("expected [METHOD] URL")
+    if len(args.request) == 2:
+        method, url = args.request[0].upper(), args.request[1]
+        if method not in METHODS:
+            raise ValueError(f"unknown method {args.request[0]!r}")
+    else:
+        url = args.request[0]
+        method = 'POST' if args.data is not None else 'GET'
+
+    headers = {}
+    for header in args.header:
+        name, separator, value = header.partition(':')
+        if not separator or not name.strip():
+            raise ValueError(f"expected 'Name: value', got {header!r}")
+        headers[name.strip()] = value.strip()
+
+    body = args.data
+    if body is not None and body.startswith('@'):
+        if body == '@-':
+            body = sys.stdin.read()
+        else:
+            with open(body[1:], encoding='utf-8') as f:
+                body = f.read()
+    return method, url, headers, body
+
+
+def send_request(args, method, url, headers, body):
+    # Imported here so --help and argument errors never pay for requests
+    from core.http_client import HttpClient
+
+    http_client = HttpClient(pool_size=1)
+    http_client.set_timeout(args.timeout)
+    if args.retry:
+        http_client.enable_retries()
+    if args.http2:
+        http_client.set_http_version('HTTP/2')
+    try:
+        response = http_client.send_request(method, url, headers, body)
+        if args.history:
+            from database.history_db import HistoryDatabase
+            history_db = HistoryDatabase(args.history)
+            try:
+                history_db.add_response(response)
+            finally:
+                history_db.close()
+    finally:
+        http_client.close()
+
+    error = getattr(response, 'error', None)
+    if error is not None:
+        write_json({'method': method, 'url': url, 'error': str(error)}, args.pretty)
+        return 2
+    try:
+        if args.body_only:
+            write_body(response)
+        else:
+            write_json(describe_response(response, method, args.query), args.pretty)
+    except ValueError as e:  # An invalid query
+        print(f"Invalid query: {e}", file=sys.stderr)
+        return 2
+    return 1 if args.fail and response.status_code >= 400 else 0
+
+
+def describe_response(response, method, query=None):
+    """Return a response as a JSON-serializable dict.
+
+    body is the parsed value for JSON responses and the text otherwise,
+    as body_type says; with a query, matches maps the JSONPath of each
+    match to its value instead.
+
+    Raises:
+    ValueError: If query is not a valid JSON query.
+    """
+    from core.parsed_document import ParsedDocument
+
+    result = {
+        'method': method,
+        'url': response.url,
+        'status': response.status_code,
+        'reason': response.reason,
+        'elapsed_ms': round(response.elapsed.total_seconds() * 1000, 3),
+        'size': len(response.content or b''),
+        'headers': dict(response.headers),
+    }
+    timings = getattr(response, 'timings', None)
+    if timings is not None:
+        result['timings'] = timings.to_dict()
+    cache_status = getattr(response, 'cache_status', None)
+    if cache_status:
+        result['cache'] = cache_status
+
+    document = ParsedDocument.from_response(response)
+    value = None
+    if document.kind == 'json' and document.size:
+        try:
+            value = document.parse()
+            result['body_type'] = 'json'
+        except ValueError:
+            pass
+    if query is not None:
+        from core.json_query import compile_query, format_path
+        compiled = compile_query(query)
+        if value is None:
+            raise ValueError("the response body is not JSON")
+        if compiled.count:
+            result['matches'] = {'count': next(compiled.run(value))[1]}
+        else:
+            result['matches'] = {format_path(path): match for path, match in compiled.run(value)}
+    elif 'body_type' in result:
+        result['body'] = value
+    else:
+        result['body_type'] = 'xml' if document.kind == 'xml' else 'text'
+        result['body'] = response.text
+    return result
+
+
+def write_body(response):
+    from utils.json_formatter import format_json
+    from utils.xml_formatter import format_xml
+
+    text = response.text
+    content_type = response.headers.get('Content-Type', '').lower()
+    if 'xml' in content_type:
+        text = format_xml(text)
+    elif 'json' in content_type or text.lstrip()[:1] in ('{', '['):
+        text = format_json(text)
+    sys.stdout.write(text)
+    if not text.endswith('\n'):
+        sys.stdout.write('\n')
+
+
+def write_json(result, pretty=False):
+    json.dump(result, sys.stdout, indent=2 if pretty else None, ensure_ascii=False)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
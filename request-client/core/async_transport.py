@@ -0,0 +1,65 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncTransport:
+    """Run blocking HTTP calls on a background asyncio loop.
+
+    The loop lives in its own daemon thread and hands each call to a thread
+    pool, so callers (e.g. the Qt GUI thread) never block on network I/O and
+    several requests can be in flight at once.
+    """
+
+    def __init__(self, max_workers=8):
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='http-worker')
+        self._thread = threading.Thread(target=self._run_loop,
+                                        name='http-transport', daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, func, *args, timeout=None, callback=None, **kwargs):
+        """Schedule func(*args, **kwargs) and return a concurrent Future.
+
+        The future can be cancelled with future.cancel(); callback, if
+        given, is called with the finished future from the worker side.
+        """
+        call = functools.partial(func, *args, **kwargs)
+        future = asyncio.run_coroutine_threadsafe(self._call(call, timeout), self.loop)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    async def _call(self, call, timeout):
+        inner = self.executor.submit(call)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(inner), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # A running worker cannot be interrupted mid-read, so release
+            # its connection as soon as the abandoned call comes back.
+            inner.add_done_callback(close_result)
+            raise
+
+    def close(self):
+        """Stop the event loop and release the worker threads."""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.loop.close()
+
+
+def close_result(future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    response = future.result()
+    # Error stand-ins and cached responses hold no connection to release
+    if getattr(response, 'raw', None) is not None:
+        response.close()
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from .http_client import HttpClient
+from .latency_histogram import LatencyHistogram
+from database.history_db import HistoryDatabase
+
+
+class CollectionRunner:
+    """Replay a JSONL collection of saved requests without the GUI.
+
+    Each input line is a JSON object with method, url and optional headers
+    and body. Lines are read lazily and at most `concurrency` requests are
+    in flight at once (and at most `per_host` against a single host), so
+    memory stays flat no matter how long the collection is. Results are
+    written as JSONL in completion order, tagged with their input line.
+    """
+
+    def __init__(self, concurrency=8, per_host=4, http_client=None, history_db=None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.http_client = http_client or HttpClient(pool_size=concurrency)
+        self.history_db = history_db  # Optional; use a write-behind HistoryDatabase
+        self.histogram = LatencyHistogram()
+        self.status_counts = {}
+        self.errors = 0
+        self.bytes_received = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def run(self, source, sink):
+        """Run every request from the source file into the sink file."""
+        self.started_at = time.perf_counter()
+        try:
+            asyncio.run(self._run(source, sink))
+        finally:
+            self.finished_at = time.perf_counter()
+        return self.report()
+
+    async def _run(self, source, sink):
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                      thread_name_prefix='collection-worker')
+        slots = asyncio.Semaphore(self.concurrency)
+        host_slots = {}
+        tasks = set()
+
+        try:
+            for line_number, line in enumerate(source, 1):
+                line = line.strip()
+                if not line:
+                    continue
+
+                await slots.acquire()
+                task = loop.create_task(
+                    self._run_line(loop, executor, host_slots, line_number, line, sink))
+                tasks.add(task)
+                task.add_done_callback(lambda t: (tasks.discard(t), slots.release()))
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            executor.shutdown(wait=True)
+
+    async def _run_line(self, loop, executor, host_slots, line_number, line, sink):
+        result = {'line': line_number}
+        try:
+            request = json.loads(line)
+            method = request.get('method', 'GET').upper()
+            url = request['url']
+        except (ValueError, KeyError, AttributeError) as e:
+            self.errors += 1
+            result['error'] = f"Invalid request line: {e}"
+            self._write(sink, result)
+            return
+
+        if 'id' in request:
+            result['id'] = request['id']
+        result.update(method=method, url=url)
+
+        host = urlparse(url if '//' in url else f"//{url}").netloc
+        if host not in host_slots:
+            host_slots[host] = asyncio.Semaphore(self.per_host)
+
+        async with host_slots[host]:
+            start = time.perf_counter()
+            try:
+                response = await loop.run_in_executor(
+                    executor, self.http_client.send_request,
+                    method, url, request.get('headers'), request.get('body'))
+            except Exception as e:
+                response = None
+                result['error'] = str(e)
+            elapsed = time.perf_counter() - start
+
+        self.histogram.record_seconds(elapsed)
+        result['elapsed_ms'] = round(elapsed * 1000, 3)
+        # Transport failures come back as a stand-in response carrying .error
+        error = getattr(response, 'error', None)
+        if error is not None:
+            result['error'] = str(error)
+        if response is None or error is not None:
+            self.errors += 1
+        else:
+            size = len(response.content or b'')
+            self.bytes_received += size
+            self.status_counts[response.status_code] = self.status_counts.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                self.errors += 1
+            result.update(status=response.status_code, size=size)
+            if self.history_db is not None:
+                self.history_db.add_response(response)
+        self._write(sink, result)
+
+    def _write(self, sink, result):
+        sink.write(json.dumps(result) + '\n')
+
+    def report(self):
+        """Return throughput, error counts and latency percentiles."""
+        duration = (self.finished_at or time.perf_counter()) - (self.started_at or 0)
+        report = {
+            'requests': self.histogram.total_count,
+            'errors': self.errors,
+            'duration_s': round(duration, 3),
+            'throughput_rps': round(self.histogram.total_count / duration, 2) if duration else 0,
+            'bytes_received': self.bytes_received,
+            'status_counts': {str(code): count for code, count in sorted(self.status_counts.items())},
+        }
+        report['latency'] = self.histogram.summary()
+        if self.http_client.http_version == 'HTTP/2':
+            report['http2'] = self.http_client.stream_stats()
+        return report
+
+    def close(self):
+        self.http_client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a JSONL request collection.")
+    parser.add_argument('collection', help="JSONL file of requests, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL results file (default: stdout)")
+    parser.add_argument('-c', '--concurrency', type=int, default=8)
+    parser.add_argument('--per-host', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--http2', action='store_true', help="Multiplex requests over HTTP/2")
+    parser.add_argument('--history', help="Also record every response in this history database")
+    args = parser.parse_args(argv)
+
+    history_db = HistoryDatabase(args.history, write_behind=True) if args.history else None
+    runner = CollectionRunner(concurrency=args.concurrency, per_host=args.per_host,
+                              history_db=history_db)
+    runner.http_client.set_timeout(args.timeout)
+    if args.http2:
+        runner.http_client.set_http_version('HTTP/2')
+
+    source = sys.stdin if args.collection == '-' else open(args.collection, encoding='utf-8')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        report = runner.run(source, sink)
+    finally:
+        runner.close()
+        if history_db is not None:
+            history_db.close()
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    print(json.dumps(report, indent=2), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
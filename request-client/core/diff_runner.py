@@ -0,0 +1,57 @@
+import sqlite3
+from xml.etree.ElementTree import ParseError
+
+from PyQt5.QtCore import pyqtSignal
+
+from .generation_runner import GenerationRunner
+from .parsed_document import ParsedDocument
+from .structural_diff import StructuralDiff, diff_documents
+
+
+class DiffRunner(GenerationRunner):
+    """Loads, parses and diffs two response bodies on a worker thread.
+
+    Starting a new comparison stops the one in progress at its next
+    cancellation check.
+    """
+
+    finished = pyqtSignal(object, str)  # StructuralDiff or None, error message or empty
+
+    def run(self, load_old, load_new):
+        """Compare the bodies returned by calling load_old() and load_new() on the worker.
+
+        Returns the new generation.
+        """
+        generation = self.begin()
+        self.start_job(self._diff, generation, load_old, load_new)
+        return generation
+
+    def _diff(self, generation, load_old, load_new):
+        cancelled = lambda: self.is_stale(generation)
+        try:
+            bodies = [load_old() or b'', load_new() or b'']
+            if bodies[0] == bodies[1]:
+                diff, error = StructuralDiff(None, None), None  # Same blob; nothing to parse
+            else:
+                diff, error = self._diff_bodies(bodies, cancelled)
+        except sqlite3.Error as e:
+            diff, error = None, f"Could not read the responses: {e}"
+        except RecursionError:
+            diff, error = None, "Responses are too deeply nested to compare"
+        if not cancelled():
+            self.post(generation, 'finished', diff, error or "")
+
+    def _diff_bodies(self, bodies, cancelled):
+        """Return (StructuralDiff or None, error message or None) for two bodies."""
+        values = []
+        for side, body in zip(("Old", "New"), bodies):
+            document = ParsedDocument.from_body(body)
+            try:
+                values.append(document.parse(cancelled))
+            except ParseError as e:
+                return None, f"{side} response is not valid XML: {e}"
+            except ValueError as e:
+                return None, f"{side} response is not valid JSON: {e}"
+            if cancelled():
+                return None, None
+        return diff_documents(values[0], values[1], cancelled), None
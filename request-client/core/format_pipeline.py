@@ -0,0 +1,106 @@
+import time
+from xml.etree.ElementTree import ParseError
+
+from PyQt5.QtCore import pyqtSignal
+
+from .generation_runner import POLL_INTERVAL_MS, GenerationRunner
+from .parsed_document import ParsedDocument
+
+# Characters of formatted text handed to the GUI thread at a time; small
+# enough that laying out one batch never blocks the event loop for long
+BATCH_CHARS = 16 * 1024
+
+# Batches queued before the formatter waits for the GUI thread to catch up;
+# a formatter running ahead would only compete with it for the GIL
+MAX_QUEUED_BATCHES = 8
+
+
+class FormatPipeline(GenerationRunner):
+    """Formats and parses ParsedDocuments on a QThreadPool.
+
+    Every submit() starts a new generation. Jobs of older generations stop
+    at their next chunk and their results are dropped, so a slow response
+    never holds up the one after it. Results are applied on the GUI thread
+    one per timer tick, through the signals below, so other events are
+    handled between batches.
+    """
+
+    pretty_started = pyqtSignal(str)  # 'json' or 'xml'
+    pretty_batch = pyqtSignal(str)  # Next piece of formatted text
+    pretty_finished = pyqtSignal(str)  # Error message, empty on success
+    tree_ready = pyqtSignal(object)  # Parsed JSON document
+
+    def __init__(self, parent=None):
+        super().__init__(parent, max_threads=2)
+
+    def submit(self, document):
+        """Start pretty-printing a ParsedDocument, and parsing it if it is JSON.
+
+        Results the document has memoized are replayed rather than rebuilt.
+        Returns the new generation.
+        """
+        generation = self.begin()
+        self.start_job(self._format, generation, document)
+        if document.kind == 'json':
+            self.start_job(self._parse, generation, document)
+        return generation
+
+    # Jobs; run on pool threads
+
+    def _format(self, generation, document):
+        self.post(generation, 'pretty_started', document.kind)
+        writer = _BatchWriter(self, generation)
+        try:
+            document.write_pretty(writer, lambda: self.is_stale(generation))
+        except ParseError as e:
+            error = f"Invalid XML: {e}"
+        except ValueError as e:  # Including undecodable bytes
+            error = f"Invalid JSON: {e}"
+        else:
+            error = ""
+            writer.flush()
+        # Cancelled runs return early, so stale errors are dropped too
+        if not self.is_stale(generation):
+            self.post(generation, 'pretty_finished', error)
+
+    def _parse(self, generation, document):
+        try:
+            data = document.parse(lambda: self.is_stale(generation))
+        except ValueError:  # Stricter than the formatter, e.g. about control characters
+            return
+        if not self.is_stale(generation):
+            self.post(generation, 'tree_ready', data)
+
+
+class _BatchWriter:
+    """Text stream that queues what is written in BATCH_CHARS pieces.
+
+    Waits while MAX_QUEUED_BATCHES are queued, so formatting runs at the
+    pace the GUI thread applies the batches.
+    """
+
+    def __init__(self, pipeline, generation):
+        self.pipeline = pipeline
+        self.generation = generation
+        self.pieces = []
+        self.size = 0
+
+    def write(self, text):
+        # The formatters write a whole chunk's output at once
+        for start in range(0, len(text), BATCH_CHARS):
+            piece = text[start:start + BATCH_CHARS]
+            self.pieces.append(piece)
+            self.size += len(piece)
+            if self.size >= BATCH_CHARS:
+                self.flush()
+        return len(text)
+
+    def flush(self):
+        if not self.pieces:
+            return
+        pipeline = self.pipeline
+        while len(pipeline.results) >= MAX_QUEUED_BATCHES and not pipeline.is_stale(self.generation):
+            time.sleep(POLL_INTERVAL_MS / 1000)
+        pipeline.post(self.generation, 'pretty_batch', ''.join(self.pieces))
+        self.pieces = []
+        self.size = 0
@@ -0,0 +1,74 @@
+import collections
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer
+
+# How often to look for results while the workers have produced none
+POLL_INTERVAL_MS = 15
+
+
+class GenerationRunner(QObject):
+    """Runs jobs on a QThreadPool and emits their results on the GUI thread.
+
+    Every begin() starts a new generation. Jobs check is_stale(generation)
+    as they go and stop once they have been overtaken; their results are
+    dropped. Jobs post() results to a queue that a timer drains on the GUI
+    thread, one result per tick, emitting the named signal of the
+    subclass, so other events are handled between results.
+    """
+
+    def __init__(self, parent=None, max_threads=1):
+        super().__init__(parent)
+        self.generation = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.results = collections.deque()  # (generation, signal name, arguments)
+        self.timer = QTimer(self)
+        self.timer.setInterval(POLL_INTERVAL_MS)
+        self.timer.timeout.connect(self.apply_results)
+
+    def begin(self):
+        """Cancel the current generation and return a new one to start jobs in."""
+        self.cancel()
+        self.timer.start()
+        return self.generation
+
+    def start_job(self, function, generation, *args):
+        """Run function(generation, *args) on the pool."""
+        self.pool.start(_Job(function, generation, *args))
+
+    def post(self, generation, name, *args):
+        """Queue signal name to be emitted with args; called from jobs."""
+        self.results.append((generation, name, args))
+
+    def cancel(self):
+        """Stop the jobs of the current generation and drop their results."""
+        self.generation += 1
+        self.results.clear()
+
+    def is_stale(self, generation):
+        return generation != self.generation
+
+    def wait(self, timeout=-1):
+        """Wait for running jobs; returns False if they are still running."""
+        return self.pool.waitForDone(timeout)
+
+    def apply_results(self):
+        """Emit the next queued result; other events are handled in between."""
+        if self.results:
+            generation, name, args = self.results.popleft()
+            if not self.is_stale(generation):
+                getattr(self, name).emit(*args)
+        # Checked in this order, a finished pool has queued all its results
+        elif self.pool.activeThreadCount() == 0 and not self.results:
+            self.timer.stop()
+        self.timer.setInterval(0 if self.results else POLL_INTERVAL_MS)
+
+
+class _Job(QRunnable):
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+
+    def run(self):
+        self.function(*self.args)
@@ -0,0 +1,165 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .request_timing import RequestTimings
+from .response_body import ResponseBody
+
+try:
+    import httpx
+except ImportError:  # HTTP/2 support is optional
+    httpx = None
+
+
+class Http2Transport:
+    """Send requests over HTTP/2 with httpx, multiplexing streams per host.
+
+    Concurrent requests to one origin share a single connection as separate
+    streams instead of each opening its own TCP connection. Responses are
+    converted to requests.Response objects so the rest of the client
+    handles them exactly like HTTP/1.1 responses. Servers that do not
+    negotiate h2 are still served, over HTTP/1.1.
+    """
+
+    def __init__(self, proxies=None, verify=True, timeout=30, max_connections=10):
+        if httpx is None:
+            raise RuntimeError("The HTTP/2 transport needs httpx: pip install 'httpx[http2]'")
+
+        proxies = proxies or {}
+        self.client = httpx.Client(http2=True, verify=verify, timeout=timeout,
+                                   proxy=proxies.get('https') or proxies.get('http'),
+                                   limits=httpx.Limits(max_connections=max_connections),
+                                   follow_redirects=True)
+        self._lock = threading.Lock()
+        self._origins = {}
+        self._users = 0
+        self._retired = False
+
+    def request(self, method, url, headers=None, data=None, stream_threshold=None):
+        """Send one request and return it as a requests.Response."""
+        origin = self._origin(url)
+        events = {}
+
+        def trace(name, info):
+            events[name.split('.', 1)[-1]] = time.perf_counter()
+
+        self._stream_opened(origin)
+        start = time.perf_counter()
+        try:
+            with self.client.stream(method, url, headers=headers, content=_encode(data),
+                                    extensions={'trace': trace}) as response:
+                headers_at = time.perf_counter()
+                converted = self._convert(method, url, headers, data, response, stream_threshold)
+            done = time.perf_counter()
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e))
+        finally:
+            self._stream_closed(origin)
+
+        converted.timings = _timings(events, start, headers_at, done)
+        converted.http_version = response.http_version
+        with self._lock:
+            stats = self._origins[origin]
+            stats['http_version'] = response.http_version
+            stats['bytes_received'] += converted.body.size if hasattr(converted, 'body') else len(converted.content)
+        return converted
+
+    def _convert(self, method, url, headers, data, response, stream_threshold):
+        converted = requests.Response()
+        converted.status_code = response.status_code
+        converted.reason = response.reason_phrase
+        converted.headers = CaseInsensitiveDict(response.headers)
+        converted.url = str(response.url)
+        converted.encoding = response.encoding
+        converted.request = requests.Request(method, url, headers=headers, data=data).prepare()
+
+        length = response.headers.get('Content-Length')
+        if stream_threshold is None or (length is not None and length.isdigit()
+                                        and int(length) <= stream_threshold):
+            converted._content = response.read()
+        else:
+            body = ResponseBody()
+            for chunk in response.iter_bytes():
+                body.write(chunk)
+            body.file.flush()
+            converted.body = body
+            converted._content = b''
+        converted._content_consumed = True
+        converted.elapsed = response.elapsed
+        return converted
+
+    def _origin(self, url):
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def _stream_opened(self, origin):
+        with self._lock:
+            stats = self._origins.setdefault(origin, {
+                'requests': 0, 'in_flight': 0, 'max_concurrent_streams': 0,
+                'bytes_received': 0, 'http_version': None,
+            })
+            stats['requests'] += 1
+            stats['in_flight'] += 1
+            stats['max_concurrent_streams'] = max(stats['max_concurrent_streams'], stats['in_flight'])
+
+    def _stream_closed(self, origin):
+        with self._lock:
+            self._origins[origin]['in_flight'] -= 1
+
+    def stream_stats(self):
+        """Return per-origin stream counters and the pool's open connections."""
+        with self._lock:
+            stats = {'origins': {origin: dict(values) for origin, values in self._origins.items()}}
+        pool = getattr(getattr(self.client, '_transport', None), '_pool', None)
+        stats['connections'] = [connection.info() for connection in getattr(pool, 'connections', [])]
+        return stats
+
+    def acquire(self):
+        """Register a request about to be sent; pair with release()."""
+        with self._lock:
+            self._users += 1
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            idle = self._retired and self._users == 0
+        if idle:
+            self.close()
+
+    def retire(self):
+        """Close the client once every acquired request has been released."""
+        with self._lock:
+            self._retired = True
+            idle = self._users == 0
+        if idle:
+            self.close()
+
+    def close(self):
+        self.client.close()
+
+
+def _encode(data):
+    if isinstance(data, str):
+        return data.encode('utf-8')
+    return data or None
+
+
+def _timings(events, start, headers_at, done):
+    """Turn httpcore trace events into RequestTimings.
+
+    httpcore resolves and connects in one step, so DNS time is reported as
+    part of the TCP connect phase.
+    """
+    connect = tls = 0.0
+    if 'connect_tcp.complete' in events:
+        connect = events['connect_tcp.complete'] - events['connect_tcp.started']
+    if 'start_tls.complete' in events:
+        tls = events['start_tls.complete'] - events['start_tls.started']
+    return RequestTimings(connect=connect, tls=tls,
+                          ttfb=max(0.0, headers_at - start - connect - tls),
+                          transfer=done - headers_at)
@@ -1,10 +1,35 @@
+import threading
+import time
+from datetime import timedelta
 import requests
 from requests.exceptions import RequestException
 from urllib.parse import urlparse
 
+from .response_body import ResponseBody
+from .response_cache import ResponseCache
+from .request_timing import TimingHTTPAdapter
+from .retry_policy import EndpointLatencyStats, HedgePolicy, RetryPolicy
+
 class HttpClient:
-    def __init__(self):
+    def __init__(self, pool_size=10):
         self.session = requests.Session()
+        self.pool_size = pool_size
+        self.timeout = 30  # Default timeout in seconds
+        self.stream_threshold = None  # Spool larger bodies to disk when set
+        self.cache = None
+        self.http_version = 'HTTP/1.1'
+        self.http2 = None
+        self._http2_lock = threading.Lock()
+        self.retry_policy = None
+        self.hedge_policy = None
+        self.latency_stats = EndpointLatencyStats()
+        self.transport = None
+
+        # Keep enough pooled connections for every concurrent worker, and
+        # record DNS/connect/TLS/TTFB timings for each request
+        adapter = TimingHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def send_request(self, method, url, headers=None, body=None):
         try:
@@ -17,29 +42,180 @@ class HttpClient:
                 'method': method,
                 'url': url,
                 'headers': headers or {},
-                'timeout': 30  # Set a default timeout
+                'timeout': self.timeout
             }
 
             # Add body for appropriate methods
             if method in ['POST', 'PUT', 'PATCH']:
                 request_kwargs['data'] = body
 
-            # Send the request
-            response = self.session.request(**request_kwargs)
+            # Serve fresh responses from the cache, revalidate stale ones
+            cache = self.cache
+            if cache is not None and not cache.can_cache_request(method, request_kwargs['headers']):
+                cache = None
+            cached = cache.lookup(method, url, request_kwargs['headers']) if cache else None
+            if cached is not None:
+                if cached.is_fresh(request_kwargs['headers']):
+                    return cached.to_response('HIT', self._prepare(request_kwargs))
+                request_kwargs['headers'] = {**request_kwargs['headers'],
+                                             **cached.conditional_headers()}
 
-            # Raise an exception for bad status codes
-            response.raise_for_status()
+            # Send the request, retrying and hedging as configured
+            response = self._send_with_retries(request_kwargs)
+
+            if cache is not None:
+                if cached is not None and response.status_code == 304:
+                    cached = cache.revalidated(cached, response)
+                    revalidated = cached.to_response('REVALIDATED', response.request, response.elapsed)
+                    revalidated.timings = response.timings
+                    return revalidated
+                stored = cache.store(method, url, headers, response)
+                response.cache_status = 'MISS' if stored else 'BYPASS'
 
             return response
 
         except RequestException as e:
-            # Handle request exceptions
-            error_response = requests.Response()
-            error_response.status_code = getattr(e.response, 'status_code', 500)
-            error_response.text = str(e)
-            error_response.elapsed = getattr(e.response, 'elapsed', None)
-            error_response.headers = getattr(e.response, 'headers', {})
-            return error_response
+            # The request never got a response; describe the failure in one
+            return self._error_response(e)
+
+    def _send_with_retries(self, request_kwargs):
+        method = request_kwargs['method']
+        attempt = 0
+        while True:
+            try:
+                response, error = self._send_hedged(request_kwargs), None
+            except RequestException as e:
+                response, error = None, e
+
+            policy = self.retry_policy
+            if policy is None or not policy.should_retry(method, attempt, response, error):
+                if error is not None:
+                    raise error
+                response.attempts = attempt + 1
+                return response
+
+            delay = policy.backoff(attempt, response)
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_hedged(self, request_kwargs):
+        hedge = self.hedge_policy
+        if hedge is not None:
+            delay = hedge.delay(self.latency_stats, request_kwargs['method'], request_kwargs['url'])
+            if delay is not None:
+                return hedge.race(lambda: self._send_once(request_kwargs), delay)
+        return self._send_once(request_kwargs)
+
+    def _send_once(self, request_kwargs):
+        """Make a single attempt and record its latency for the endpoint."""
+        method, url = request_kwargs['method'], request_kwargs['url']
+        start = time.perf_counter()
+        if self.http_version == 'HTTP/2':
+            transport = self._http2_transport(acquire=True)
+            try:
+                response = transport.request(
+                    method, url, request_kwargs['headers'], request_kwargs.get('data'),
+                    stream_threshold=self.stream_threshold)
+            finally:
+                transport.release()
+        else:
+            # Stream the body when large responses should go to disk
+            stream = self.stream_threshold is not None
+            response = self.session.request(stream=stream, **request_kwargs)
+            if stream:
+                self._read_body(response)
+            self._finish_timings(response)
+        self.latency_stats.record(method, url, time.perf_counter() - start)
+        return response
+
+    def _error_response(self, error):
+        """Build a stand-in response for a request that failed without one."""
+        error_response = requests.Response()
+        error_response.status_code = 500
+        error_response.reason = type(error).__name__
+        error_response._content = str(error).encode('utf-8')
+        error_response.encoding = 'utf-8'
+        error_response.elapsed = timedelta(0)
+        error_response.request = error.request
+        error_response.url = getattr(error.request, 'url', None)
+        error_response.error = error
+        return error_response
+
+    def _http2_transport(self, acquire=False):
+        with self._http2_lock:
+            if self.http2 is None:
+                from .http2_transport import Http2Transport  # On first use; httpx is slow to import
+                self.http2 = Http2Transport(self.session.proxies, self.session.verify,
+                                            self.timeout, max_connections=self.pool_size)
+            if acquire:
+                # Under the lock, so _reset_http2 cannot close it before the request starts
+                self.http2.acquire()
+            return self.http2
+
+    def _reset_http2(self):
+        # Settings changed; the next HTTP/2 request builds a new client, and
+        # the old one is closed when the requests still using it finish
+        with self._http2_lock:
+            retired, self.http2 = self.http2, None
+        if retired is not None:
+            retired.retire()
+
+    def _prepare(self, request_kwargs):
+        """Build the PreparedRequest a cache hit stands in for."""
+        return requests.Request(request_kwargs['method'], request_kwargs['url'],
+                                headers=request_kwargs['headers'],
+                                data=request_kwargs.get('data')).prepare()
+
+    def _finish_timings(self, response):
+        """Fill in the body transfer phase once the body has been read."""
+        timings = getattr(response, 'timings', None)
+        if timings is not None:
+            timings.transfer = time.perf_counter() - response.headers_received_at
+
+    def _read_body(self, response):
+        """Load small bodies into memory and spool larger ones to a temp file."""
+        length = response.headers.get('Content-Length')
+        if length is not None and length.isdigit() and int(length) <= self.stream_threshold:
+            response.content  # Reads and caches the body like a normal request
+            return
+
+        response.body = ResponseBody.from_response(response)
+        response._content = b''
+        response._content_consumed = True
+
+    def send_request_async(self, method, url, headers=None, body=None, callback=None):
+        """Send a request without blocking the caller.
+
+        Returns a concurrent.futures.Future resolving to the response; pass
+        it to cancel_request() to abandon the request. callback, if given,
+        is called with the finished future on a worker thread.
+        """
+        if self.transport is None:
+            from .async_transport import AsyncTransport  # On first use; asyncio is slow to import
+            self.transport = AsyncTransport(max_workers=self.pool_size)
+        return self.transport.submit(self.send_request, method, url, headers, body,
+                                     callback=callback)
+
+    def clone(self, pool_size=None):
+        """Return a new client with the same proxy, SSL and timeout settings.
+
+        The clone has its own connection pool, so heavy background work
+        (load tests, batch runs) does not compete with interactive requests.
+        """
+        client = HttpClient(pool_size=pool_size or self.pool_size)
+        client.session.proxies = dict(self.session.proxies)
+        client.session.verify = self.session.verify
+        client.session.cert = self.session.cert
+        client.timeout = self.timeout
+        client.stream_threshold = self.stream_threshold
+        client.http_version = self.http_version
+        return client
+
+    def cancel_request(self, future):
+        """Cancel a request started with send_request_async."""
+        return future.cancel()
 
     def set_proxy(self, proxy_url):
         """Set a proxy for all requests."""
@@ -47,19 +223,80 @@ class HttpClient:
             'http': proxy_url,
             'https': proxy_url
         }
+        self._reset_http2()
 
     def clear_proxy(self):
         """Clear any set proxy."""
         self.session.proxies = {}
+        self._reset_http2()
 
     def set_ssl_verify(self, verify):
         """Set SSL verification for HTTPS requests."""
         self.session.verify = verify
+        self._reset_http2()
+
+    def set_http_version(self, version):
+        """Select the transport: 'HTTP/1.1' (requests) or 'HTTP/2' (httpx).
+
+        HTTP/2 multiplexes concurrent requests to a host over one connection.
+        It needs the optional httpx[http2] package.
+        """
+        if version not in ('HTTP/1.1', 'HTTP/2'):
+            raise ValueError(f"Unsupported HTTP version: {version}")
+        if version == 'HTTP/2':
+            self._http2_transport()  # Fail early if httpx is missing
+        self.http_version = version
+
+    def stream_stats(self):
+        """Return HTTP/2 per-origin stream and per-connection statistics."""
+        return self.http2.stream_stats() if self.http2 is not None else {}
+
+    def enable_cache(self, cache_dir=None, max_memory_bytes=16 * 1024 * 1024,
+                     max_disk_bytes=256 * 1024 * 1024):
+        """Cache GET/HEAD responses in memory and, if cache_dir is set, on disk.
+
+        Responses served through the cache carry response.cache_status:
+        'HIT', 'REVALIDATED', 'MISS' (stored) or 'BYPASS' (not cacheable).
+        """
+        self.cache = ResponseCache(cache_dir, max_memory_bytes, max_disk_bytes)
+
+    def disable_cache(self):
+        """Stop using the response cache."""
+        self.cache = None
+
+    def enable_retries(self, policy=None):
+        """Retry idempotent requests with backoff; see RetryPolicy."""
+        self.retry_policy = policy or RetryPolicy()
+
+    def enable_hedging(self, policy=None):
+        """Hedge slow idempotent requests at the endpoint's p95; see HedgePolicy."""
+        if self.hedge_policy is not None:
+            self.hedge_policy.close()
+        self.hedge_policy = policy or HedgePolicy()
+
+    def disable_hedging(self):
+        if self.hedge_policy is not None:
+            self.hedge_policy.close()
+            self.hedge_policy = None
+
+    def set_stream_threshold(self, threshold):
+        """Spool response bodies larger than threshold bytes to disk.
+
+        Spooled responses carry a ResponseBody in response.body and an empty
+        response.content. Pass None to always buffer bodies in memory.
+        """
+        self.stream_threshold = threshold
 
     def set_timeout(self, timeout):
         """Set a default timeout for all requests."""
-        self.session.timeout = timeout
+        self.timeout = timeout
+        self._reset_http2()
 
     def close(self):
         """Close the session."""
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        self._reset_http2()
+        self.disable_hedging()
         self.session.close()
@@ -0,0 +1,454 @@
+import functools
+import json
+import re
+from itertools import islice
+
+# Expressions compiled by compile_query that are kept for reuse
+QUERY_CACHE_SIZE = 256
+
+# Nodes visited between cancellation checks
+CANCEL_CHECK_INTERVAL = 1024
+
+QUERY_TOKEN = re.compile(r'''\s*(?:
+    (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<op>\.\.|==|!=|<=|>=|&&|\|\||[$@.\[\]()*,:?<>!|])
+  | (?P<name>[A-Za-z_][\w-]*)
+)''', re.VERBOSE)
+
+IDENTIFIER = re.compile(r'[A-Za-z_]\w*\Z')
+# An escape sequence or a double quote in a single-quoted string
+SINGLE_QUOTED_PART = re.compile(r'\\(.)|"', re.S)
+NOT_INTEGER = re.compile(r'[.eE]')
+
+COMPARISONS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+LITERAL_NAMES = {'true': True, 'false': False, 'null': None}
+
+_MISSING = object()
+
+
+class JsonQuery:
+    """A compiled JSONPath expression, optionally followed by jq-style filters.
+
+    Supported: $ (optional), .name, ['name'], [0], [-1], [start:stop:step],
+    [a,b], * and [] wildcards, .. recursive descent, and [?(...)] filters
+    comparing @-relative paths with literals (==, !=, <, <=, >, >=, !, &&,
+    ||). A query may end in | first, | limit(n) or | count.
+
+    Every step is a generator over (path, value) pairs, so results are
+    produced one at a time without copying the document, and first and
+    limit(n) stop walking it as soon as they have enough.
+    """
+
+    def __init__(self, expression, steps, limit=None, count=False):
+        self.expression = expression
+        self.steps = steps
+        self.limit = limit
+        self.count = count
+
+    def run(self, data, cancelled=None):
+        """Yield (path, value) for each match; path is a tuple of keys and indexes.
+
+        Stops early, yielding nothing more, once cancelled() returns true.
+        """
+        nodes = iter([((), data)])
+        for step in self.steps:
+            nodes = step(nodes, cancelled)
+        if self.limit is not None:
+            nodes = islice(nodes, self.limit)
+        if self.count:
+            yield (), sum(1 for _ in nodes)
+            return
+        yield from nodes
+
+    def values(self, data):
+        return [value for _, value in self.run(data)]
+
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(expression):
+    """Compile expression into a JsonQuery; repeated expressions come from a cache.
+
+    Raises:
+    ValueError: If expression is not a valid query.
+    """
+    try:
+        return _Parser(expression).parse()
+    except RecursionError:
+        raise ValueError("Query is nested too deeply") from None
+
+
+def format_path(path):
+    """Return a JSONPath string such as $.items[3].name for a result path."""
+    parts = ['$']
+    for key in path:
+        if isinstance(key, int):
+            parts.append(f'[{key}]')
+        elif IDENTIFIER.match(key):
+            parts.append(f'.{key}')
+        else:
+            parts.append(f'[{json.dumps(key, ensure_ascii=False)}]')
+    return ''.join(parts)
+
+
+# Steps: each takes an iterator of (path, value) and returns another
+
+def _children(value):
+    if isinstance(value, dict):
+        return value.items()
+    if isinstance(value, list):
+        return enumerate(value)
+    return ()
+
+
+def _checked(items, cancelled):
+    """Pass items through, stopping once cancelled() is true."""
+    if cancelled is None:
+        return items
+    return _checked_items(items, cancelled)
+
+
+def _checked_items(items, cancelled):
+    for count, item in enumerate(items):
+        if count % CANCEL_CHECK_INTERVAL == 0 and cancelled():
+            return
+        yield item
+
+
+def _child_nodes(path, value):
+    for key, child in _children(value):
+        yield path + (key,), child
+
+
+def _select_keys(keys):
+    def step(nodes, cancelled):
+        for path, value in nodes:
+            for key in keys:
+                if isinstance(key, str):
+                    if isinstance(value, dict) and key in value:
+                        yield path + (key,), value[key]
+                elif isinstance(value, list) and -len(value) <= key < len(value):
+                    index = key % len(value)
+                    yield path + (index,), value[index]
+    return step
+
+
+def _select_all(nodes, cancelled):
+    for path, value in nodes:
+        yield from _checked(_child_nodes(path, value), cancelled)
+
+
+def _select_slice(start, stop, stride):
+    def step(nodes, cancelled):
+        for path, value in nodes:
+            if isinstance(value, list):
+                for index in _checked(range(*slice(start, stop, stride).indices(len(value))), cancelled):
+                    yield path + (index,), value[index]
+    return step
+
+
+def _select_matching(predicate):
+    def step(nodes, cancelled):
+        for path, value in nodes:
+            for key, child in _checked(_children(value), cancelled):
+                if predicate(child):
+                    yield path + (key,), child
+    return step
+
+
+def _descend(nodes, cancelled):
+    """Yield every node and, depth first and in document order, its descendants."""
+    for node in nodes:
+        stack = [iter([node])]
+        visited = 0
+        while stack:
+            for path, value in stack[-1]:
+                yield path, value
+                visited += 1
+                if cancelled is not None and visited % CANCEL_CHECK_INTERVAL == 0 and cancelled():
+                    return
+                if isinstance(value, (dict, list)):
+                    stack.append(_child_nodes(path, value))
+                break
+            else:
+                stack.pop()
+
+
+# Filter expressions compile to functions of the current node (@)
+
+def _relative(keys):
+    def lookup(value):
+        for key in keys:
+            if isinstance(key, str):
+                if not isinstance(value, dict) or key not in value:
+                    return _MISSING
+            elif not isinstance(value, list) or not -len(value) <= key < len(value):
+                return _MISSING
+            value = value[key]
+        return value
+    return lookup
+
+
+def _same_kind(a, b):
+    """True if JSON would consider a and b comparable (bool is not a number)."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool)
+    if isinstance(a, (int, float)):
+        return isinstance(b, (int, float))
+    return type(a) is type(b)
+
+
+def _compare(left, op, right):
+    compare = COMPARISONS[op]
+
+    def predicate(value):
+        a, b = left(value), right(value)
+        if a is _MISSING or b is _MISSING:
+            # A missing value only equals another missing value
+            equal = a is b
+            return equal if op == '==' else (not equal if op == '!=' else False)
+        if not _same_kind(a, b):
+            return op == '!='
+        if op not in ('==', '!=') and not isinstance(a, (int, float, str)):
+            return False
+        return compare(a, b)
+    return predicate
+
+
+class _Parser:
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = QUERY_TOKEN.match(expression, position)
+            if match is None or match.end() == position:
+                raise ValueError(f"Unexpected character at position {position}: {expression[position:position + 10]!r}")
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup), match.start(match.lastgroup)))
+            position = match.end()
+        self.index = 0
+
+    # Token helpers
+
+    def peek(self, value=None):
+        if self.index >= len(self.tokens):
+            return None
+        token = self.tokens[self.index]
+        if value is not None and token[1] != value:
+            return None
+        return token
+
+    def take(self, value=None, kind=None):
+        token = self.peek(value)
+        if token is None or (kind is not None and token[0] != kind):
+            found = repr(self.tokens[self.index][1]) if self.index < len(self.tokens) else "end of query"
+            expected = repr(value) if value else (kind or "more")
+            raise ValueError(f"Expected {expected} at {self.position()}, found {found}")
+        self.index += 1
+        return token[1]
+
+    def position(self):
+        if self.index < len(self.tokens):
+            return f"position {self.tokens[self.index][2]}"
+        return "end of query"
+
+    # Grammar
+
+    def parse(self):
+        if self.peek('$'):
+            self.take('$')
+        steps = []
+        while self.peek() is not None and not self.peek('|'):
+            steps.extend(self.step())
+        limit = None
+        count = False
+        while self.peek('|'):
+            self.take('|')
+            name = self.take(kind='name')
+            if name == 'first':
+                limit = 1 if limit is None else min(limit, 1)
+            elif name == 'limit':
+                self.take('(')
+                position = self.position()
+                n = self.integer()
+                if n < 0:
+                    raise ValueError(f"Expected a limit of 0 or more at {position}, found {n}")
+                self.take(')')
+                limit = n if limit is None else min(limit, n)
+            elif name == 'count':
+                count = True
+            else:
+                raise ValueError(f"Unknown function {name!r}; expected first, limit(n) or count")
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.peek()[1]!r} at {self.position()}")
+        return JsonQuery(self.expression, steps, limit, count)
+
+    def step(self):
+        if self.peek('..'):
+            self.take('..')
+            if self.peek('['):
+                return [_descend, self.bracket()]
+            return [_descend, self.dotted()]
+        if self.peek('.'):
+            self.take('.')
+            if self.peek('['):
+                return [self.bracket()]  # jq style .[0] and .[]
+            return [self.dotted()]
+        if self.peek('['):
+            return [self.bracket()]
+        raise ValueError(f"Expected '.', '..' or '[' at {self.position()}")
+
+    def dotted(self):
+        if self.peek('*'):
+            self.take('*')
+            return _select_all
+        return _select_keys((self.take(kind='name'),))
+
+    def bracket(self):
+        self.take('[')
+        if self.peek(']'):
+            self.take(']')
+            return _select_all
+        if self.peek('*'):
+            self.take('*')
+            self.take(']')
+            return _select_all
+        if self.peek('?'):
+            self.take('?')
+            predicate = self.disjunction()
+            self.take(']')
+            return _select_matching(predicate)
+        if self.peek(':') or (self.peek() and self.peek()[0] == 'number' and self.peek_at(1, ':')):
+            return self.slice()
+        keys = [self.key()]
+        while self.peek(','):
+            self.take(',')
+            keys.append(self.key())
+        self.take(']')
+        return _select_keys(tuple(keys))
+
+    def peek_at(self, offset, value):
+        index = self.index + offset
+        return index < len(self.tokens) and self.tokens[index][1] == value
+
+    def slice(self):
+        bounds = [None, None, None]
+        for part in range(3):
+            if self.peek() and self.peek()[0] == 'number':
+                bounds[part] = self.integer()
+            if part < 2 and self.peek(':'):
+                self.take(':')
+            else:
+                break
+        self.take(']')
+        if bounds[2] == 0:
+            raise ValueError("Slice step cannot be zero")
+        return _select_slice(*bounds)
+
+    def key(self):
+        token = self.peek()
+        if token is not None and token[0] == 'string':
+            return self.string()
+        if token is not None and token[0] == 'number':
+            return self.integer()
+        raise ValueError(f"Expected a key or an index at {self.position()}")
+
+    def integer(self):
+        text = self.take(kind='number')
+        if NOT_INTEGER.search(text):
+            raise ValueError(f"Expected an integer, found {text!r}")
+        return int(text)
+
+    def string(self):
+        """Decode a quoted string token with JSON's escapes, either quote allowed."""
+        position = self.position()
+        text = self.take(kind='string')
+        if text[0] == "'":
+            text = '"' + SINGLE_QUOTED_PART.sub(_as_double_quoted, text[1:-1]) + '"'
+        try:
+            return json.loads(text)
+        except ValueError as e:  # Bad escapes or control characters
+            raise ValueError(f"Invalid string at {position}: {e.msg}") from None
+
+    # Filter expressions
+
+    def disjunction(self):
+        parts = [self.conjunction()]
+        while self.peek('||'):
+            self.take('||')
+            parts.append(self.conjunction())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda value: any(part(value) for part in parts)
+
+    def conjunction(self):
+        parts = [self.unary()]
+        while self.peek('&&'):
+            self.take('&&')
+            parts.append(self.unary())
+        if len(parts) == 1:
+            return parts[0]
+        return lambda value: all(part(value) for part in parts)
+
+    def unary(self):
+        if self.peek('!'):
+            self.take('!')
+            inner = self.unary()
+            return lambda value: not inner(value)
+        if self.peek('('):
+            self.take('(')
+            inner = self.disjunction()
+            self.take(')')
+            return inner
+        return self.comparison()
+
+    def comparison(self):
+        left = self.operand()
+        token = self.peek()
+        if token is not None and token[1] in COMPARISONS:
+            op = self.take()
+            return _compare(left, op, self.operand())
+        return lambda value: left(value) is not _MISSING  # Existence test
+
+    def operand(self):
+        token = self.peek()
+        if token is None:
+            raise ValueError("Unexpected end of query in filter")
+        kind, text, _ = token
+        if text == '@':
+            self.take('@')
+            keys = []
+            while self.peek('.') or self.peek('['):
+                if self.take() == '.':
+                    keys.append(self.take(kind='name'))
+                else:
+                    keys.append(self.key())
+                    self.take(']')
+            return _relative(tuple(keys))
+        if kind == 'number':
+            self.take()
+            value = float(text) if NOT_INTEGER.search(text) else int(text)
+        elif kind == 'string':
+            value = self.string()
+        elif kind == 'name' and text in LITERAL_NAMES:
+            self.take()
+            value = LITERAL_NAMES[text]
+        else:
+            raise ValueError(f"Expected @, a number, a string, true, false or null at {self.position()}")
+        return lambda _: value
+
+
+def _as_double_quoted(match):
+    escaped = match.group(1)
+    if escaped is None:
+        return '\\"'  # A bare double quote
+    return "'" if escaped == "'" else match.group(0)
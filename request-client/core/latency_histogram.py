@@ -0,0 +1,108 @@
+import json
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in the spirit of HdrHistogram.
+
+    Values are recorded as integer microseconds. Each power of two is split
+    into 2 ** (sub_bucket_bits - 1) linear buckets, so memory is bounded by
+    the value range (a few thousand counters at most) while percentiles
+    stay within about 1% of the true value at the default precision.
+    """
+
+    def __init__(self, sub_bucket_bits=7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = {}
+        self.total_count = 0
+        self.total_sum = 0
+        self.min_value = None
+        self.max_value = 0
+
+    def _index(self, value):
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+        return (shift << (self.sub_bucket_bits - 1)) + (value >> shift)
+
+    def _highest_equivalent(self, index):
+        half = 1 << (self.sub_bucket_bits - 1)
+        if index < (half << 1):
+            return index
+        shift = (index >> (self.sub_bucket_bits - 1)) - 1
+        sub_bucket = index - (shift << (self.sub_bucket_bits - 1))
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        """Record a latency in microseconds."""
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += count
+        self.total_sum += value * count
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+
+    def record_seconds(self, seconds):
+        self.record(seconds * 1_000_000)
+
+    def merge(self, other):
+        """Add all counts from another histogram with the same precision."""
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += other.total_count
+        self.total_sum += other.total_sum
+        if other.min_value is not None:
+            if self.min_value is None or other.min_value < self.min_value:
+                self.min_value = other.min_value
+        self.max_value = max(self.max_value, other.max_value)
+
+    def percentile(self, percent):
+        """Return the value at the given percentile (0-100) in microseconds."""
+        if not self.total_count:
+            return 0
+        target = max(1, round(self.total_count * percent / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max_value)
+        return self.max_value
+
+    def mean(self):
+        return self.total_sum / self.total_count if self.total_count else 0
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """Return count, min, mean, max and the requested percentiles in ms."""
+        result = {
+            'count': self.total_count,
+            'min_ms': (self.min_value or 0) / 1000,
+            'mean_ms': self.mean() / 1000,
+            'max_ms': self.max_value / 1000,
+        }
+        for percent in percentiles:
+            result[f'p{percent:g}_ms'] = self.percentile(percent) / 1000
+        return result
+
+    def to_json(self):
+        return json.dumps({
+            'bits': self.sub_bucket_bits,
+            'counts': self.counts,
+            'sum': self.total_sum,
+            'min': self.min_value,
+            'max': self.max_value,
+        }, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, data):
+        state = json.loads(data)
+        histogram = cls(state['bits'])
+        histogram.counts = {int(index): count for index, count in state['counts'].items()}
+        histogram.total_count = sum(histogram.counts.values())
+        histogram.total_sum = state['sum']
+        histogram.min_value = state['min']
+        histogram.max_value = state['max']
+        return histogram
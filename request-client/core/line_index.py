@@ -0,0 +1,98 @@
+import bisect
+import re
+import threading
+
+# Lines longer than this many bytes are split, so no line is too long to show
+MAX_LINE_BYTES = 4096
+
+# Every STRIDE-th line start is recorded; lines in between are found by scanning
+STRIDE = 64
+
+# A line ending in a newline, a MAX_LINE_BYTES piece of a longer line, or
+# the unterminated last line. The alternatives never match the same text,
+# so a failed LINES match backtracks in linear rather than exponential time.
+LINE_PATTERN = rb'[^\n]{0,%d}\n|[^\n]{%d}(?!\n)|[^\n]{1,%d}\Z' % (
+    MAX_LINE_BYTES, MAX_LINE_BYTES, MAX_LINE_BYTES - 1)
+LINE = re.compile(LINE_PATTERN)
+LINES = re.compile(rb'(?:%s){%d}' % (LINE_PATTERN, STRIDE))
+
+
+class LineIndex:
+    """Line start offsets of a bytes-like buffer, built on a background thread.
+
+    Only every STRIDE-th line start is stored, so the index takes a few
+    bytes per STRIDE lines; the regex engine skips the lines in between.
+    line_count grows while the index is being built and readers can use
+    the lines indexed so far. Works on anything the re module can search,
+    including a read-only mmap.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.starts = [0]  # Offset of lines 0, STRIDE, 2 * STRIDE, ...
+        self.line_count = 0
+        self.done = False
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._build, name='line-index', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled = True
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+    def _build(self):
+        position = 0
+        # match() rather than finditer(), which would retry at every offset of the tail
+        while True:
+            match = LINES.match(self.buffer, position)
+            if match is None:
+                break
+            if self._cancelled:
+                return
+            position = match.end()
+            self.starts.append(position)
+            self.line_count += STRIDE
+        # Fewer than STRIDE lines remain
+        self.line_count += sum(1 for _ in LINE.finditer(self.buffer, position))
+        self.done = True
+
+    def offset(self, line):
+        """Return the offset at which line (0-based, < line_count) starts."""
+        position = self.starts[line // STRIDE]
+        for _ in range(line % STRIDE):
+            position = LINE.match(self.buffer, position).end()
+        return position
+
+    def lines(self, first, count):
+        """Yield (line number, start, end) for up to count lines from first."""
+        last = min(first + count, self.line_count)
+        if first >= last:
+            return
+        position = self.offset(first)
+        for line in range(first, last):
+            end = LINE.match(self.buffer, position).end()
+            yield line, position, end
+            position = end
+
+    def line_at(self, offset):
+        """Return the line containing offset, or None if it is not indexed yet."""
+        block = bisect.bisect_right(self.starts, offset) - 1
+        if block == len(self.starts) - 1 and not self.done:
+            return None  # The lines after the last recorded start are still being counted
+        line = block * STRIDE
+        position = self.starts[block]
+        while line < self.line_count - 1:
+            end = LINE.match(self.buffer, position).end()
+            if offset < end:
+                break
+            position = end
+            line += 1
+        # An offset at the end of the buffer belongs to the last line
+        return min(line, max(self.line_count - 1, 0))
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from .latency_histogram import LatencyHistogram
+
+
+class LoadGenerator:
+    """Drive an endpoint at a fixed request rate with a pool of virtual users.
+
+    Scheduling is open-loop: request i is due at start + i / rate whether or
+    not earlier requests have finished. Response time is measured from that
+    intended start, so when every virtual user is stuck behind a slow
+    response the queueing delay shows up in the percentiles instead of being
+    hidden (coordinated omission). Service time, measured from the actual
+    send, is kept separately for comparison. Requests that failed without
+    a response (connection errors, timeouts) are counted under status None
+    and left out of both, so an outage does not pull the percentiles down.
+    """
+
+    def __init__(self, http_client, method, url, headers=None, body=None,
+                 rate=10, virtual_users=10, duration=10):
+        # A clone shares proxy/SSL/timeout settings but has its own pool
+        self.http_client = http_client.clone(pool_size=virtual_users)
+        self.method = method
+        self.url = url
+        self.headers = headers or {}
+        self.body = body
+        self.rate = float(rate)
+        self.virtual_users = virtual_users
+        self.duration = float(duration)
+
+        self.response_histogram = LatencyHistogram()
+        self.service_histogram = LatencyHistogram()
+        self.status_counts = {}
+        self.errors = 0
+        self.failed = 0  # Requests that got no response
+        self.max_lag = 0.0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._next_slot = 0
+        self._active_users = 0
+        self._closed = False
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        """Start the virtual users in background threads."""
+        self.started_at = time.perf_counter()
+        self._active_users = self.virtual_users
+        for number in range(self.virtual_users):
+            thread = threading.Thread(target=self._run_user, name=f'vu-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run_user(self):
+        end = self.started_at + self.duration
+        while not self._stop.is_set():
+            with self._lock:
+                slot = self._next_slot
+                self._next_slot += 1
+            intended = self.started_at + slot / self.rate
+            if intended >= end:
+                break
+
+            delay = intended - time.perf_counter()
+            if delay > 0 and self._stop.wait(delay):
+                break
+
+            sent = time.perf_counter()
+            try:
+                response = self.http_client.send_request(self.method, self.url,
+                                                         self.headers, self.body)
+                # Transport failures come back as a stand-in carrying .error
+                status = None if getattr(response, 'error', None) is not None else response.status_code
+            except Exception:
+                status = None
+            done = time.perf_counter()
+
+            with self._lock:
+                if status is None:
+                    self.failed += 1
+                else:
+                    self.response_histogram.record_seconds(done - intended)
+                    self.service_histogram.record_seconds(done - sent)
+                self.max_lag = max(self.max_lag, sent - intended)
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+                if status is None or status >= 400:
+                    self.errors += 1
+
+        self._on_user_done()
+
+    def _on_user_done(self):
+        with self._lock:
+            self._active_users -= 1
+            if self._active_users > 0:
+                return
+            self.finished_at = time.perf_counter()
+        self._close()  # The last user out releases the connection pool
+
+    def stop(self):
+        """Ask the virtual users to stop; returns without waiting for them.
+
+        Requests in flight finish in the background, after which
+        is_running() turns false. Safe to call more than once.
+        """
+        self._stop.set()
+        if not self._threads:
+            self._close()
+
+    def _close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.http_client.close()
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def snapshot(self):
+        """Return the current counters and latency summaries."""
+        with self._lock:
+            now = self.finished_at or time.perf_counter()
+            elapsed = now - self.started_at if self.started_at else 0
+            completed = self.response_histogram.total_count + self.failed
+            return {
+                'elapsed_s': elapsed,
+                'completed': completed,
+                'errors': self.errors,
+                'failed': self.failed,
+                'achieved_rps': completed / elapsed if elapsed else 0,
+                'max_lag_ms': self.max_lag * 1000,
+                'status_counts': dict(self.status_counts),
+                'response_time': self.response_histogram.summary(),
+                'service_time': self.service_histogram.summary(),
+            }
@@ -0,0 +1,315 @@
+import io
+import json
+import json.scanner
+import re
+import threading
+from collections import OrderedDict
+from json.decoder import scanstring
+import xml.etree.ElementTree as ET
+
+from utils.json_formatter import format_json_stream
+from utils.xml_formatter import format_xml_stream
+
+# Bytes read between cancellation checks
+SOURCE_CHUNK_SIZE = 256 * 1024
+
+# Parsed documents kept by a DocumentCache unless told otherwise
+DEFAULT_CACHE_SIZE = 8
+
+# Pretty-printed text of bodies up to this size is memoized; larger bodies
+# are formatted again when asked, as their text is several times their
+# size and the view showing it already holds a copy
+MEMOIZE_PRETTY_BYTES = 1024 * 1024
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class ParsedDocument:
+    """A response body that is parsed and pretty-printed at most once.
+
+    The formatter, validator and tree model all go through the same
+    document, so a body is parsed once however many views need it. The
+    parsed value, a parse error and, for bodies up to MEMOIZE_PRETTY_BYTES,
+    the pretty-printed text are each memoized on first use; runs that are
+    cancelled part way memoize nothing. Safe to use from several threads.
+    """
+
+    def __init__(self, content, kind='json'):
+        """
+        Args:
+        content: The body, as a str, bytes or ResponseBody.
+        kind (str): 'json' or 'xml', the syntax to parse the body as.
+        """
+        self.content = content
+        self.kind = kind
+        self._parse_lock = threading.Lock()
+        self._pretty_lock = threading.Lock()
+        self._parsed = False
+        self._value = None
+        self._error = None
+        self._pretty = None
+        self._valid = None  # None until known
+
+    @classmethod
+    def from_response(cls, response):
+        """Make a document for a requests.Response, spooled or not."""
+        body = getattr(response, 'body', None)
+        content_type = response.headers.get('Content-Type', '').lower()
+        return cls(body if body is not None else (response.content or b''),
+                   'xml' if 'xml' in content_type else 'json')
+
+    @classmethod
+    def from_body(cls, content):
+        """Make a document for a body of unknown type, such as one read from history.
+
+        Bodies starting with < are taken to be XML, anything else JSON.
+        """
+        start = content[:64].lstrip()
+        return cls(content, 'xml' if start[:1] in ('<', b'<') else 'json')
+
+    @property
+    def size(self):
+        return len(self.content)
+
+    def is_valid(self):
+        """Return True if the body is well-formed JSON or XML, parsing it if needed."""
+        if self._valid is None:
+            try:
+                self.parse()
+            except (ValueError, ET.ParseError):
+                pass
+        return self._valid
+
+    def parse(self, cancelled=None):
+        """Return the parsed body: a JSON value, or an XML root Element.
+
+        Returns None if cancelled() became true before parsing finished.
+
+        Raises:
+        ValueError: If a JSON body is not valid JSON.
+        xml.etree.ElementTree.ParseError: If an XML body is not well-formed.
+        """
+        with self._parse_lock:
+            if not self._parsed:
+                try:
+                    if self.kind == 'xml':
+                        value = self._parse_xml(cancelled)
+                    else:
+                        value = self._parse_json(cancelled)
+                except (ValueError, ET.ParseError) as e:
+                    if cancelled is not None and cancelled():
+                        return None
+                    self._error = e
+                    self._valid = False
+                else:
+                    if cancelled is not None and cancelled():
+                        return None
+                    self._value = value
+                    self._valid = True
+                self._parsed = True
+            if self._error is not None:
+                raise self._error
+            return self._value
+
+    def pretty(self, cancelled=None):
+        """Return the body pretty-printed, or None if cancelled() became true first.
+
+        Raises:
+        ValueError or xml.etree.ElementTree.ParseError: As for parse().
+        """
+        output = io.StringIO()
+        return output.getvalue() if self.write_pretty(output, cancelled) else None
+
+    def write_pretty(self, dst, cancelled=None):
+        """Write the body pretty-printed to dst as it is made.
+
+        Returns False if cancelled() became true first. A memoized result
+        is written to dst in one piece.
+
+        Raises:
+        ValueError or xml.etree.ElementTree.ParseError: As for parse().
+        """
+        with self._pretty_lock:
+            if self._pretty is not None:
+                dst.write(self._pretty)
+                return True
+            memoize = self.size <= MEMOIZE_PRETTY_BYTES
+            output = _Tee(dst) if memoize else dst
+            try:
+                if self.kind == 'xml':
+                    format_xml_stream(self._source(cancelled), output)
+                else:
+                    format_json_stream(self._source(cancelled), output)
+            except (ValueError, ET.ParseError):
+                if cancelled is not None and cancelled():
+                    return False  # A cancelled source looks truncated
+                if self.kind == 'xml':
+                    self._valid = False  # The formatter's parser is the same as parse()'s
+                raise
+            if cancelled is not None and cancelled():
+                return False
+            if memoize:
+                self._pretty = output.getvalue()
+            if self.kind == 'xml':
+                self._valid = True
+            return True
+
+    def release(self):
+        """Drop the memoized results, keeping the body; they are rebuilt on demand.
+
+        Does not wait for a parse in progress, which may still memoize its result.
+        """
+        self._parsed = False
+        self._value = self._error = self._pretty = None
+
+    def _source(self, cancelled):
+        return _CancellableSource(self.content, cancelled)
+
+    def _parse_json(self, cancelled):
+        content = self.content
+        text = content if isinstance(content, (str, bytes)) else content.read()
+        if isinstance(text, bytes):
+            text = text.decode(json.detect_encoding(text), 'surrogatepass')
+        return load_json_members(text, cancelled)
+
+    def _parse_xml(self, cancelled):
+        parser = ET.XMLParser()
+        for chunk in self._source(cancelled).iter_chunks(SOURCE_CHUNK_SIZE):
+            parser.feed(chunk)
+        return parser.close()
+
+
+class DocumentCache:
+    """Least-recently-used set of ParsedDocuments, keyed by response.
+
+    Responses keep their document for as long as they are cached, so every
+    view of a response shares one parse. Once more than max_documents have
+    been used, the least recently used one is released and forgotten.
+    """
+
+    def __init__(self, max_documents=DEFAULT_CACHE_SIZE):
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._documents = OrderedDict()
+
+    def get(self, key, factory):
+        """Return the document for key, making it with factory() if needed."""
+        with self._lock:
+            document = self._documents.get(key)
+            if document is not None:
+                self._documents.move_to_end(key)
+                return document
+            document = self._documents[key] = factory()
+            evicted = []
+            while len(self._documents) > self.max_documents:
+                evicted.append(self._documents.popitem(last=False)[1])
+        for old in evicted:
+            old.release()  # Frees the parsed values even if a view still holds the document
+        return document
+
+    def for_response(self, response):
+        return self.get(response, lambda: ParsedDocument.from_response(response))
+
+    def clear(self):
+        with self._lock:
+            documents = list(self._documents.values())
+            self._documents.clear()
+        for document in documents:
+            document.release()
+
+    def __len__(self):
+        return len(self._documents)
+
+
+def load_json_members(text, cancelled=None):
+    """Parse JSON text like json.loads, one top-level member at a time.
+
+    json.loads holds the GIL for the whole document, freezing the GUI
+    thread for as long as a large body takes to parse; decoding each member
+    of the top-level array or object separately lets other threads run in
+    between. Returns None as soon as cancelled() returns true.
+
+    Raises:
+    ValueError: If text is not valid JSON.
+    """
+    scan_once = json.scanner.make_scanner(json.JSONDecoder())
+    whitespace = JSON_WHITESPACE.match
+    position = whitespace(text).end()
+    opening = text[position:position + 1]
+    if opening not in ('[', '{'):
+        return json.loads(text)
+    closing = ']' if opening == '[' else '}'
+    container = [] if opening == '[' else {}
+    position = whitespace(text, position + 1).end()
+    if text.startswith(closing, position):
+        position += 1
+    else:
+        while True:
+            if cancelled is not None and cancelled():
+                return None
+            if opening == '{':
+                if not text.startswith('"', position):
+                    raise ValueError(f"Expecting property name at offset {position}")
+                key, position = scanstring(text, position + 1)
+                position = whitespace(text, position).end()
+                if not text.startswith(':', position):
+                    raise ValueError(f"Expecting ':' at offset {position}")
+                position = whitespace(text, position + 1).end()
+                container[key], position = _scan_value(scan_once, text, position)
+            else:
+                value, position = _scan_value(scan_once, text, position)
+                container.append(value)
+            position = whitespace(text, position).end()
+            if text.startswith(',', position):
+                position = whitespace(text, position + 1).end()
+            elif text.startswith(closing, position):
+                position += 1
+                break
+            else:
+                raise ValueError(f"Expecting ',' or '{closing}' at offset {position}")
+    if whitespace(text, position).end() != len(text):
+        raise ValueError(f"Extra data at offset {position}")
+    return container
+
+
+def _scan_value(scan_once, text, position):
+    try:
+        return scan_once(text, position)
+    except StopIteration:
+        raise ValueError(f"Expecting value at offset {position}") from None
+
+
+class _CancellableSource:
+    """Chunked view of content that ends early once cancelled() is true.
+
+    The formatters read it through iter_chunks(), so a cancelled run stops
+    within SOURCE_CHUNK_SIZE bytes.
+    """
+
+    def __init__(self, content, cancelled=None):
+        self.content = content
+        self.cancelled = cancelled
+
+    def iter_chunks(self, chunk_size):
+        size = min(chunk_size, SOURCE_CHUNK_SIZE)
+        if hasattr(self.content, 'iter_chunks'):
+            chunks = self.content.iter_chunks(size)
+        else:
+            chunks = (self.content[offset:offset + size] for offset in range(0, len(self.content), size))
+        for chunk in chunks:
+            if self.cancelled is not None and self.cancelled():
+                return
+            yield chunk
+
+
+class _Tee(io.StringIO):
+    """StringIO that also writes everything to another text stream."""
+
+    def __init__(self, dst):
+        super().__init__()
+        self.dst = dst
+
+    def write(self, text):
+        if self.dst is not None:
+            self.dst.write(text)
+        return super().write(text)
@@ -0,0 +1,45 @@
+from PyQt5.QtCore import pyqtSignal
+
+from .generation_runner import GenerationRunner
+from .json_query import format_path
+
+# Matches a query collects before it stops walking the document
+MAX_QUERY_RESULTS = 10000
+
+
+class QueryRunner(GenerationRunner):
+    """Evaluates compiled JsonQuery objects against parsed documents on a worker thread.
+
+    Each run() starts a new generation and a run that is overtaken stops
+    at its next cancellation check, so typing a query never queues up
+    evaluations of the ones before it.
+    """
+
+    # {JSONPath of match: value}, number of matches (-1 if more than
+    # MAX_QUERY_RESULTS), error message or empty
+    finished = pyqtSignal(object, int, str)
+
+    def run(self, query, data):
+        """Start evaluating query, a JsonQuery, against data; returns the new generation."""
+        generation = self.begin()
+        self.start_job(self._evaluate, generation, query, data)
+        return generation
+
+    def _evaluate(self, generation, query, data):
+        cancelled = lambda: self.is_stale(generation)
+        matches = {}
+        count = -1  # Unless every match was collected
+        error = ""
+        try:
+            for path, value in query.run(data, cancelled):
+                if len(matches) == MAX_QUERY_RESULTS:
+                    break
+                matches['count' if query.count else format_path(path)] = value
+            else:
+                count = len(matches)
+        except RecursionError:  # Comparing very deeply nested values
+            error = "Query is too deeply nested to evaluate"
+        except ValueError as e:
+            error = f"Query could not be evaluated: {e}"
+        if not cancelled():
+            self.post(generation, 'finished', matches, count, error)
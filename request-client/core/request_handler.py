@@ -1,3 +1,5 @@
+import threading
+
 from .http_client import HttpClient
 from PyQt5.QtCore import QObject, pyqtSignal
 
@@ -5,10 +7,14 @@ class RequestHandler(QObject):
     request_started = pyqtSignal()
     request_finished = pyqtSignal(object)
     request_error = pyqtSignal(str)
+    request_cancelled = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, http_client=None):
         super().__init__()
-        self.http_client = HttpClient()
+        self.http_client = http_client or HttpClient()
+        self.pending = set()
+        # Futures complete on the transport's loop thread
+        self._pending_lock = threading.Lock()
 
     def send_request(self, method, url, headers=None, body=None):
         self.request_started.emit()
@@ -27,6 +33,45 @@ class RequestHandler(QObject):
             # Emit any unexpected errors
             self.request_error.emit(str(e))
 
+    def send_request_async(self, method, url, headers=None, body=None):
+        """Send a request on the transport thread and return its future.
+
+        request_finished/request_error are emitted from the worker thread;
+        Qt queues them onto the receivers' thread, so slots run on the GUI
+        thread as usual.
+        """
+        self.request_started.emit()
+
+        headers_dict = dict(headers) if headers else {}
+        future = self.http_client.send_request_async(method, url, headers_dict, body)
+        with self._pending_lock:
+            self.pending.add(future)
+        future.add_done_callback(self._on_request_done)
+        return future
+
+    def _on_request_done(self, future):
+        with self._pending_lock:
+            self.pending.discard(future)
+        if future.cancelled():
+            self.request_cancelled.emit()
+            return
+
+        error = future.exception()
+        if error is not None:
+            self.request_error.emit(str(error))
+        else:
+            self.request_finished.emit(future.result())
+
+    def cancel_request(self, future):
+        return self.http_client.cancel_request(future)
+
+    def cancel_all(self):
+        """Cancel every request that is still in flight."""
+        with self._pending_lock:
+            futures = list(self.pending)
+        for future in futures:
+            self.http_client.cancel_request(future)
+
     def set_proxy(self, proxy_url):
         try:
             self.http_client.set_proxy(proxy_url)
@@ -52,4 +97,5 @@ class RequestHandler(QObject):
             self.request_error.emit(f"Error setting timeout: {str(e)}")
 
     def close(self):
+        self.cancel_all()
         self.http_client.close()
@@ -0,0 +1,144 @@
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, NewConnectionError
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'transfer')
+
+# Phase durations for the request currently being sent on this thread
+_current = threading.local()
+
+
+def _record(phase, seconds):
+    phases = getattr(_current, 'phases', None)
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+class RequestTimings:
+    """Per-phase durations of one request, in seconds.
+
+    dns, connect and tls are zero when a pooled connection was reused.
+    ttfb runs from sending the request to receiving the response headers
+    and transfer from the headers to the end of the body.
+    """
+
+    def __init__(self, dns=0.0, connect=0.0, tls=0.0, ttfb=0.0, transfer=0.0):
+        self.dns = dns
+        self.connect = connect
+        self.tls = tls
+        self.ttfb = ttfb
+        self.transfer = transfer
+
+    @property
+    def total(self):
+        return sum(getattr(self, phase) for phase in PHASES)
+
+    def waterfall(self):
+        """Return (phase, start, duration) tuples in request order."""
+        bars = []
+        start = 0.0
+        for phase in PHASES:
+            duration = getattr(self, phase)
+            bars.append((phase, start, duration))
+            start += duration
+        return bars
+
+    def to_dict(self):
+        return {phase: round(getattr(self, phase) * 1000, 3) for phase in PHASES}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild timings from to_dict() output (milliseconds)."""
+        return cls(**{phase: data.get(phase, 0) / 1000 for phase in PHASES})
+
+
+class _TimingConnectionMixin:
+    """Time DNS resolution and TCP connect separately on new connections."""
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        self._dns_time = resolved - start
+        _record('dns', self._dns_time)
+
+        # Connect to the resolved addresses in order, as create_connection would
+        error = None
+        try:
+            for address in addresses:
+                self._dns_host = address[4][0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except NewConnectionError as e:
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = host
+
+        self._connect_time = time.perf_counter() - resolved
+        _record('connect', self._connect_time)
+        return sock
+
+
+class TimingHTTPConnection(_TimingConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimingHTTPSConnection(_TimingConnectionMixin, HTTPSConnection):
+    def connect(self):
+        self._dns_time = self._connect_time = 0.0
+        start = time.perf_counter()
+        super().connect()
+        # Everything after the TCP connect is the TLS handshake (and proxy tunnel)
+        _record('tls', time.perf_counter() - start - self._dns_time - self._connect_time)
+
+
+class TimingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimingHTTPConnection
+
+
+class TimingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimingHTTPSConnection
+
+
+class TimingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that attaches RequestTimings to every response it returns.
+
+    The transfer phase is left at zero here; HttpClient fills it in once the
+    body has been read, using response.headers_received_at.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimingHTTPConnectionPool,
+            'https': TimingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _current.phases = {}
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            phases, _current.phases = _current.phases, None
+
+        headers_at = time.perf_counter()
+        setup = phases.get('dns', 0.0) + phases.get('connect', 0.0) + phases.get('tls', 0.0)
+        response.timings = RequestTimings(dns=phases.get('dns', 0.0),
+                                          connect=phases.get('connect', 0.0),
+                                          tls=phases.get('tls', 0.0),
+                                          ttfb=max(0.0, headers_at - start - setup))
+        response.headers_received_at = headers_at
+        return response
@@ -0,0 +1,66 @@
+import mmap
+import tempfile
+
+
+class ResponseBody:
+    """Response payload spooled to a temporary file and read through mmap.
+
+    Large downloads are written chunk by chunk, so memory use stays bounded
+    by the chunk size; readers get a read-only memory-mapped view and let
+    the OS page data in and out as needed.
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile(prefix='response-')
+        self.size = 0
+        self._view = None
+
+    @classmethod
+    def from_response(cls, response, chunk_size=64 * 1024):
+        """Drain a streamed requests.Response into a new ResponseBody."""
+        body = cls()
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                body.write(chunk)
+        finally:
+            response.close()
+        body.file.flush()
+        return body
+
+    def write(self, chunk):
+        if self._view is not None:
+            raise ValueError("ResponseBody is read-only once it has been viewed")
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def view(self):
+        """Return a read-only memory-mapped view of the whole body."""
+        if self.size == 0:
+            return b''
+        if self._view is None:
+            self.file.flush()
+            self._view = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._view
+
+    def read(self, offset=0, length=None):
+        """Return length bytes starting at offset (to the end by default)."""
+        end = self.size if length is None else min(self.size, offset + length)
+        return self.view()[offset:end]
+
+    def iter_chunks(self, chunk_size=64 * 1024):
+        view = self.view()
+        for offset in range(0, self.size, chunk_size):
+            yield view[offset:offset + chunk_size]
+
+    def text(self, limit=None, encoding='utf-8'):
+        """Decode the body, or only its first `limit` bytes."""
+        return self.read(0, limit).decode(encoding or 'utf-8', errors='replace')
+
+    def close(self):
+        if self._view is not None:
+            self._view.close()
+            self._view = None
+        self.file.close()
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,343 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHEABLE_METHODS = ('GET', 'HEAD')
+CACHEABLE_STATUS_CODES = (200, 203, 300, 301, 308, 404, 410)
+
+# Headers from a 304 that must not overwrite the stored representation
+_NOT_UPDATED_ON_304 = ('content-length', 'content-encoding', 'transfer-encoding')
+
+
+def parse_cache_control(value):
+    """Parse a Cache-Control header into a {directive: value-or-True} dict."""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else True
+    return directives
+
+
+def _parse_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class CacheEntry:
+    """A stored response plus the metadata needed to judge its freshness."""
+
+    def __init__(self, key, method, url, status_code, headers, content, encoding,
+                 vary, stored_at=None):
+        self.key = key
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.headers = dict(headers)
+        self.content = content
+        self.encoding = encoding
+        self.vary = vary
+        self.stored_at = stored_at or time.time()
+
+    @property
+    def size(self):
+        return len(self.content) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+    def current_age(self):
+        try:
+            age_header = int(CaseInsensitiveDict(self.headers).get('Age', 0))
+        except ValueError:
+            age_header = 0
+        return age_header + max(0.0, time.time() - self.stored_at)
+
+    def freshness_lifetime(self):
+        headers = CaseInsensitiveDict(self.headers)
+        directives = parse_cache_control(headers.get('Cache-Control'))
+        if 'no-cache' in directives:
+            return 0
+        if 'max-age' in directives:
+            try:
+                return int(directives['max-age'])
+            except ValueError:
+                return 0
+        expires = _parse_date(headers.get('Expires'))
+        if expires is not None:
+            date = _parse_date(headers.get('Date')) or self.stored_at
+            return max(0, expires - date)
+        return 0
+
+    def is_fresh(self, request_headers=None):
+        directives = parse_cache_control(CaseInsensitiveDict(request_headers or {}).get('Cache-Control'))
+        if 'no-cache' in directives:
+            return False
+        lifetime = self.freshness_lifetime()
+        if 'max-age' in directives:
+            try:
+                lifetime = min(lifetime, int(directives['max-age']))
+            except ValueError:
+                pass
+        return self.current_age() < lifetime
+
+    def conditional_headers(self):
+        """Return the validators to send when revalidating this entry."""
+        headers = CaseInsensitiveDict(self.headers)
+        conditional = {}
+        if 'ETag' in headers:
+            conditional['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            conditional['If-Modified-Since'] = headers['Last-Modified']
+        return conditional
+
+    def to_response(self, cache_status, request=None, elapsed=None):
+        """Build a requests.Response from the stored representation."""
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response.encoding = self.encoding
+        response.url = self.url
+        response.request = request
+        response.elapsed = elapsed or timedelta(0)
+        response.cache_status = cache_status
+        return response
+
+    def to_meta(self):
+        return {
+            'method': self.method,
+            'url': self.url,
+            'status_code': self.status_code,
+            'headers': self.headers,
+            'encoding': self.encoding,
+            'vary': self.vary,
+            'stored_at': self.stored_at,
+        }
+
+
+class ResponseCache:
+    """Private HTTP cache with an in-memory LRU in front of an on-disk LRU.
+
+    Entries are keyed by method, URL and the values of the request headers
+    named in the response's Vary header. Freshness follows Cache-Control
+    max-age/no-cache/no-store and Expires; stale entries with an ETag or
+    Last-Modified are revalidated with a conditional request. Both tiers
+    evict least-recently-used entries once their byte budget is exceeded.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_bytes=16 * 1024 * 1024,
+                 max_disk_bytes=256 * 1024 * 1024, max_entry_bytes=None):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_entry_bytes = max_entry_bytes or max(max_memory_bytes, max_disk_bytes) // 8
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk = OrderedDict()
+        self._disk_size = 0
+        self._vary = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        # Oldest files first, so they are the first to be evicted
+        entries = []
+        for item in os.scandir(self.cache_dir):
+            if item.name.endswith('.body'):
+                key = item.name[:-5]
+                meta_path = os.path.join(self.cache_dir, key + '.json')
+                if os.path.exists(meta_path):
+                    size = item.stat().st_size + os.path.getsize(meta_path)
+                    entries.append((item.stat().st_mtime, key, size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+
+    # Keys
+
+    def _primary_key(self, method, url):
+        return hashlib.sha256(f"{method} {url}".encode()).hexdigest()
+
+    def _variant_key(self, primary, vary):
+        if not vary:
+            return primary
+        values = json.dumps(sorted(vary.items()))
+        return hashlib.sha256(f"{primary} {values}".encode()).hexdigest()
+
+    def _vary_names(self, primary):
+        if primary not in self._vary and self.cache_dir:
+            path = os.path.join(self.cache_dir, primary + '.vary')
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self._vary[primary] = json.load(f)
+        return self._vary.get(primary, [])
+
+    def _vary_values(self, names, request_headers):
+        headers = CaseInsensitiveDict(request_headers or {})
+        return {name.lower(): headers.get(name, '') for name in names}
+
+    # Lookup and storage
+
+    def can_cache_request(self, method, request_headers):
+        if method not in CACHEABLE_METHODS:
+            return False
+        headers = CaseInsensitiveDict(request_headers or {})
+        if 'If-None-Match' in headers or 'If-Modified-Since' in headers:
+            return False  # The caller is doing its own revalidation
+        return 'no-store' not in parse_cache_control(headers.get('Cache-Control'))
+
+    def lookup(self, method, url, request_headers):
+        """Return the stored entry for this request, fresh or stale, or None."""
+        with self._lock:
+            primary = self._primary_key(method, url)
+            names = self._vary_names(primary)
+            if '*' in names:
+                return None
+            key = self._variant_key(primary, self._vary_values(names, request_headers))
+
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(entry)
+            return entry
+
+    def store(self, method, url, request_headers, response):
+        """Store a response if it is cacheable; return True if it was stored."""
+        if response.status_code not in CACHEABLE_STATUS_CODES:
+            return False
+        if getattr(response, 'body', None) is not None:
+            return False  # Spooled to disk by HttpClient; too large to cache
+        directives = parse_cache_control(response.headers.get('Cache-Control'))
+        if 'no-store' in directives:
+            return False
+        has_validator = 'ETag' in response.headers or 'Last-Modified' in response.headers
+        has_lifetime = 'max-age' in directives or 'Expires' in response.headers
+        if not (has_validator or has_lifetime):
+            return False
+
+        content = response.content or b''
+        names = [name.strip() for name in response.headers.get('Vary', '').split(',') if name.strip()]
+        if '*' in names:
+            return False
+
+        with self._lock:
+            primary = self._primary_key(method, url)
+            vary = self._vary_values(names, request_headers)
+            entry = CacheEntry(self._variant_key(primary, vary), method, url,
+                               response.status_code, response.headers, content,
+                               response.encoding, vary)
+            if entry.size > self.max_entry_bytes:
+                return False
+            if names != self._vary.get(primary):
+                self._vary[primary] = names
+                if self.cache_dir:
+                    with open(os.path.join(self.cache_dir, primary + '.vary'), 'w', encoding='utf-8') as f:
+                        json.dump(names, f)
+            self._remember(entry)
+            self._write_disk(entry)
+        return True
+
+    def revalidated(self, entry, not_modified):
+        """Refresh a stored entry from a 304 Not Modified response."""
+        with self._lock:
+            for name, value in not_modified.headers.items():
+                if name.lower() not in _NOT_UPDATED_ON_304:
+                    entry.headers[name] = value
+            entry.stored_at = time.time()
+            self._write_disk(entry)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._disk):
+                self._remove_disk(key)
+            if self.cache_dir:
+                for item in os.scandir(self.cache_dir):
+                    if item.name.endswith('.vary'):
+                        os.remove(item.path)
+            self._memory.clear()
+            self._memory_size = 0
+            self._vary.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_size,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_size,
+            }
+
+    # Memory tier
+
+    def _remember(self, entry):
+        old = self._memory.pop(entry.key, None)
+        if old is not None:
+            self._memory_size -= old.size
+        self._memory[entry.key] = entry
+        self._memory_size += entry.size
+        while self._memory_size > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= evicted.size
+
+    # Disk tier
+
+    def _paths(self, key):
+        return (os.path.join(self.cache_dir, key + '.json'),
+                os.path.join(self.cache_dir, key + '.body'))
+
+    def _read_disk(self, key):
+        if not self.cache_dir or key not in self._disk:
+            return None
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except (OSError, ValueError):
+            self._remove_disk(key)
+            return None
+        self._disk.move_to_end(key)
+        return CacheEntry(key, meta['method'], meta['url'], meta['status_code'],
+                          meta['headers'], content, meta['encoding'], meta['vary'],
+                          meta['stored_at'])
+
+    def _write_disk(self, entry):
+        if not self.cache_dir:
+            return
+        meta_path, body_path = self._paths(entry.key)
+        meta = json.dumps(entry.to_meta()).encode('utf-8')
+        with open(body_path + '.tmp', 'wb') as f:
+            f.write(entry.content)
+        os.replace(body_path + '.tmp', body_path)
+        with open(meta_path, 'wb') as f:
+            f.write(meta)
+
+        self._disk_size -= self._disk.pop(entry.key, 0)
+        self._disk[entry.key] = len(entry.content) + len(meta)
+        self._disk_size += self._disk[entry.key]
+        while self._disk_size > self.max_disk_bytes and len(self._disk) > 1:
+            self._remove_disk(next(iter(self._disk)))
+
+    def _remove_disk(self, key):
+        self._disk_size -= self._disk.pop(key, 0)
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
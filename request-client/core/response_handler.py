@@ -1,19 +1,26 @@
 import json
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from .parsed_document import DocumentCache
+
 class ResponseHandler(QObject):
     response_processed = pyqtSignal(dict)
 
-    def __init__(self):
+    def __init__(self, max_format_size=8 * 1024 * 1024, preview_size=1024 * 1024, document_cache=None):
         super().__init__()
+        self.max_format_size = max_format_size
+        self.preview_size = preview_size
+        # Shared with the views, so a body is parsed once however it is shown
+        self.documents = document_cache if document_cache is not None else DocumentCache()
 
     def process_response(self, response):
+        body = getattr(response, 'body', None)
         processed_response = {
             'status_code': response.status_code,
             'headers': dict(response.headers),
             'elapsed': str(response.elapsed),
             'content': self._format_content(response),
-            'size': len(response.content),
+            'size': body.size if body is not None else len(response.content),
             'encoding': response.encoding,
             'url': response.url,
         }
@@ -21,17 +28,36 @@ class ResponseHandler(QObject):
 
     def _format_content(self, response):
         content_type = response.headers.get('Content-Type', '').lower()
+        body = getattr(response, 'body', None)
+        if body is not None:
+            return self._format_spooled_content(response, content_type)
 
         if 'application/json' in content_type:
             try:
-                return json.dumps(response.json(), indent=2)
-            except json.JSONDecodeError:
+                return json.dumps(self.documents.for_response(response).parse(), indent=2)
+            except ValueError:
                 return response.text
         elif 'text' in content_type or 'xml' in content_type:
             return response.text
         else:
             return f"Binary content ({len(response.content)} bytes)"
 
+    def _format_spooled_content(self, response, content_type):
+        # Bodies spooled to disk are only formatted when they are small enough;
+        # otherwise a bounded preview is read from the memory-mapped view.
+        body = response.body
+        if 'application/json' in content_type and body.size <= self.max_format_size:
+            try:
+                return json.dumps(self.documents.for_response(response).parse(), indent=2)
+            except ValueError:
+                pass
+        if 'application/json' in content_type or 'text' in content_type or 'xml' in content_type:
+            text = body.text(self.preview_size, response.encoding)
+            if body.size > self.preview_size:
+                text += f"\n... ({body.size - self.preview_size} more bytes not shown)"
+            return text
+        return f"Binary content ({body.size} bytes)"
+
     def get_response_summary(self, processed_response):
         return {
             'status_code': processed_response['status_code'],
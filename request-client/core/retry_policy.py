@@ -0,0 +1,146 @@
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from .async_transport import close_result
+from .latency_histogram import LatencyHistogram
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE')
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+
+class RetryPolicy:
+    """Retry idempotent requests with capped exponential backoff and full jitter.
+
+    A request is retried after a connection error or timeout, or when the
+    server answers with one of retry_statuses. A Retry-After header (in
+    seconds) takes precedence over the computed backoff.
+    """
+
+    def __init__(self, max_retries=3, backoff_base=0.1, backoff_max=10.0,
+                 retry_statuses=RETRY_STATUS_CODES, methods=IDEMPOTENT_METHODS):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = retry_statuses
+        self.methods = methods
+
+    def should_retry(self, method, attempt, response=None, error=None):
+        if attempt >= self.max_retries or method not in self.methods:
+            return False
+        if error is not None:
+            return True
+        return response is not None and response.status_code in self.retry_statuses
+
+    def backoff(self, attempt, response=None):
+        """Return the delay in seconds before retry number attempt + 1."""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class EndpointLatencyStats:
+    """Recent latency histograms per endpoint (method, host and path).
+
+    Each endpoint keeps a current and a previous window of `window` samples,
+    so percentiles follow recent behaviour without unbounded growth. At most
+    max_endpoints endpoints are tracked; the least recently used are dropped.
+    """
+
+    def __init__(self, window=1000, max_endpoints=1000):
+        self.window = window
+        self.max_endpoints = max_endpoints
+        self._lock = threading.Lock()
+        self._endpoints = OrderedDict()
+
+    def _key(self, method, url):
+        parsed = urlparse(url)
+        return (method, parsed.netloc, parsed.path)
+
+    def record(self, method, url, seconds):
+        key = self._key(method, url)
+        with self._lock:
+            windows = self._endpoints.pop(key, None) or [LatencyHistogram(), None]
+            self._endpoints[key] = windows
+            if windows[0].total_count >= self.window:
+                windows[1] = windows[0]
+                windows[0] = LatencyHistogram()
+            windows[0].record_seconds(seconds)
+            while len(self._endpoints) > self.max_endpoints:
+                self._endpoints.popitem(last=False)
+
+    def percentile(self, method, url, percent, min_samples=1):
+        """Return the endpoint's latency percentile in seconds, or None."""
+        with self._lock:
+            windows = self._endpoints.get(self._key(method, url))
+            if windows is None:
+                return None
+            histogram = LatencyHistogram()
+            for window in windows:
+                if window is not None:
+                    histogram.merge(window)
+        if histogram.total_count < min_samples:
+            return None
+        return histogram.percentile(percent) / 1_000_000
+
+    def snapshot(self):
+        """Return {(method, host, path): summary} for every tracked endpoint."""
+        with self._lock:
+            return {key: windows[0].summary() for key, windows in self._endpoints.items()}
+
+
+class HedgePolicy:
+    """Send a duplicate request when the first one is slower than usual.
+
+    The hedge fires once the primary has been outstanding for the
+    endpoint's observed `percentile` latency; whichever response arrives
+    first wins and the other is closed when it completes. Endpoints with
+    fewer than min_samples observations are not hedged.
+    """
+
+    def __init__(self, percentile=95, min_samples=20, min_delay=0.005,
+                 methods=IDEMPOTENT_METHODS, max_workers=16):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.methods = methods
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='http-hedge')
+
+    def delay(self, stats, method, url):
+        """Return how long to wait before hedging, or None to not hedge."""
+        if method not in self.methods:
+            return None
+        latency = stats.percentile(method, url, self.percentile, self.min_samples)
+        if latency is None:
+            return None
+        return max(self.min_delay, latency)
+
+    def race(self, call, delay):
+        """Run call(), hedging it with a second call after delay seconds."""
+        primary = self.executor.submit(call)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = self.executor.submit(call)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for other in pending | (done - {future}):
+                    other.add_done_callback(close_result)
+                response = future.result()
+                response.hedged = future is hedge
+                return response
+        raise error
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,289 @@
+import bisect
+import difflib
+import hashlib
+import xml.etree.ElementTree as ET
+
+# Changes reported before a diff stops looking for more
+MAX_CHANGES = 100000
+
+# Nodes hashed or compared between cancellation checks
+CANCEL_CHECK_INTERVAL = 4096
+
+# Differing runs of list items up to this long are aligned with
+# SequenceMatcher, which is quadratic in the worst case; longer ones are
+# first split at items that occur once in each list
+MAX_MATCHED_ITEMS = 2000
+
+# Types of the objects and arrays json.loads and xml_to_tree() make
+CONTAINERS = (dict, list)
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+
+class Change:
+    """One difference: a path (tuple of keys and indexes) and both values.
+
+    old is None for ADDED and new is None for REMOVED changes.
+    """
+
+    __slots__ = ('kind', 'path', 'old', 'new')
+
+    def __init__(self, kind, path, old=None, new=None):
+        self.kind = kind
+        self.path = path
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return f'Change({self.kind!r}, {self.path!r}, {self.old!r}, {self.new!r})'
+
+
+class StructuralDiff:
+    """Differences between two parsed JSON values, found through subtree hashes.
+
+    Every object and array is hashed once, bottom up, from its members'
+    hashes (a Merkle tree), so comparing two subtrees costs one digest
+    comparison however large they are; the walk only descends where the
+    digests differ. Object members are matched by key and array items by
+    content, so an item inserted at the front of a list is one ADDED
+    change rather than a change to every item after it.
+    """
+
+    def __init__(self, old, new, cancelled=None, max_changes=MAX_CHANGES):
+        self.old = old
+        self.new = new
+        self.cancelled = cancelled
+        self.max_changes = max_changes
+        self.changes = []
+        self.truncated = False
+        self._visited = 0
+
+    def run(self):
+        """Compare the documents; returns the list of Changes, or None if cancelled."""
+        old_hashes = tree_hashes(self.old, self.cancelled)
+        new_hashes = tree_hashes(self.new, self.cancelled) if old_hashes is not None else None
+        if new_hashes is None:
+            return None
+        self._old_hashes = old_hashes
+        self._new_hashes = new_hashes
+        stack = [((), self.old, self.new)]
+        while stack:
+            if self._interrupted():
+                return None if self._is_cancelled() else self.changes
+            path, old, new = stack.pop()
+            pairs = self._compare(path, old, new)
+            stack.extend(reversed(pairs))  # Descend in document order
+        return self.changes
+
+    def _compare(self, path, old, new):
+        """Record the changes at path and return the (path, old, new) pairs to descend into."""
+        if _identity(old, self._old_hashes) == _identity(new, self._new_hashes):
+            return []
+        if isinstance(old, dict) and isinstance(new, dict):
+            return self._compare_objects(path, old, new)
+        if isinstance(old, list) and isinstance(new, list):
+            return self._compare_arrays(path, old, new)
+        self._add(Change(CHANGED, path, old, new))
+        return []
+
+    def _compare_objects(self, path, old, new):
+        pairs = []
+        for key, value in old.items():
+            if key not in new:
+                self._add(Change(REMOVED, path + (key,), old=value))
+            elif _identity(value, self._old_hashes) != _identity(new[key], self._new_hashes):
+                pairs.append((path + (key,), value, new[key]))
+        for key, value in new.items():
+            if key not in old:
+                self._add(Change(ADDED, path + (key,), new=value))
+        return pairs
+
+    def _compare_arrays(self, path, old, new):
+        old_ids = [_identity(item, self._old_hashes) for item in old]
+        new_ids = [_identity(item, self._new_hashes) for item in new]
+        opcodes = _align(old_ids, new_ids, 0, len(old_ids), 0, len(new_ids))
+        pairs = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            # Replaced items are compared pairwise; any left over were added or removed
+            paired = min(i2 - i1, j2 - j1)
+            for offset in range(paired):
+                pairs.append((path + (j1 + offset,), old[i1 + offset], new[j1 + offset]))
+            for index in range(i1 + paired, i2):
+                self._add(Change(REMOVED, path + (index,), old=old[index]))
+            for index in range(j1 + paired, j2):
+                self._add(Change(ADDED, path + (index,), new=new[index]))
+        return pairs
+
+    def _add(self, change):
+        if len(self.changes) < self.max_changes:
+            self.changes.append(change)
+        else:
+            self.truncated = True
+
+    def _is_cancelled(self):
+        return self.cancelled is not None and self.cancelled()
+
+    def _interrupted(self):
+        self._visited += 1
+        if self.truncated:
+            return True
+        return self._visited % CANCEL_CHECK_INTERVAL == 0 and self._is_cancelled()
+
+
+def diff_documents(old, new, cancelled=None, max_changes=MAX_CHANGES):
+    """Return a StructuralDiff of two parsed values that has been run.
+
+    XML root Elements are compared through xml_to_tree(). Returns None if
+    cancelled() became true before the diff finished.
+    """
+    if isinstance(old, ET.Element):
+        old = xml_to_tree(old)
+    if isinstance(new, ET.Element):
+        new = xml_to_tree(new)
+    diff = StructuralDiff(old, new, cancelled, max_changes)
+    if diff.run() is None:
+        return None
+    return diff
+
+
+def tree_hashes(root, cancelled=None):
+    """Return {id(container): digest} for every object and array under root.
+
+    Object digests do not depend on key order. Returns None if cancelled()
+    became true first.
+    """
+    if type(root) not in CONTAINERS:
+        return {}
+    # Breadth first without recursion, so deep documents cannot overflow
+    # the stack; in reverse, every container comes after its children
+    order = [root]
+    for count, node in enumerate(order):
+        if cancelled is not None and count % CANCEL_CHECK_INTERVAL == 0 and cancelled():
+            return None
+        order.extend([child for child in (node.values() if type(node) is dict else node)
+                      if type(child) in CONTAINERS])
+    hashes = {}
+    for count, node in enumerate(reversed(order)):
+        if cancelled is not None and count % CANCEL_CHECK_INTERVAL == 0 and cancelled():
+            return None
+        hashes[id(node)] = _container_digest(node, hashes)
+    return hashes
+
+
+def xml_to_tree(element):
+    """Convert an Element into nested dicts a StructuralDiff can compare.
+
+    Each element becomes a dict of its attributes ('@name'), its stripped
+    text ('#text') and its children, keyed by tag; repeated tags get
+    XPath-style positions, so the second <item> is 'item[2]'.
+    """
+    root = {}
+    stack = [(element, root)]
+    while stack:
+        node, tree = stack.pop()
+        for name, value in node.attrib.items():
+            tree['@' + name] = value
+        text = (node.text or '').strip()
+        if text:
+            tree['#text'] = text
+        seen = {}
+        for child in node:
+            seen[child.tag] = seen.get(child.tag, 0) + 1
+            key = child.tag if seen[child.tag] == 1 else f'{child.tag}[{seen[child.tag]}]'
+            tree[key] = {}
+            tail = (child.tail or '').strip()
+            if tail:
+                tree[key + '#tail'] = tail
+            stack.append((child, tree[key]))
+    return {element.tag: root}
+
+
+def _align(a, b, a_start, a_end, b_start, b_end):
+    """Return the opcodes of SequenceMatcher.get_opcodes() for a[a_start:a_end]
+    against b[b_start:b_end], without the 'equal' ones.
+
+    Common ends are trimmed first, as most edits leave them alone. Long
+    differing runs are split patience-diff style: items occurring once in
+    each run and in the same order on both sides anchor the alignment, and
+    only the gaps between anchors go to SequenceMatcher. Gaps without
+    anchors that are still too long are compared by position.
+    """
+    while a_start < a_end and b_start < b_end and a[a_start] == b[b_start]:
+        a_start += 1
+        b_start += 1
+    while a_start < a_end and b_start < b_end and a[a_end - 1] == b[b_end - 1]:
+        a_end -= 1
+        b_end -= 1
+    if a_start == a_end and b_start == b_end:
+        return []
+    if a_start == a_end:
+        return [('insert', a_start, a_end, b_start, b_end)]
+    if b_start == b_end:
+        return [('delete', a_start, a_end, b_start, b_end)]
+    if max(a_end - a_start, b_end - b_start) <= MAX_MATCHED_ITEMS:
+        matcher = difflib.SequenceMatcher(None, a[a_start:a_end], b[b_start:b_end], autojunk=False)
+        return [(tag, i1 + a_start, i2 + a_start, j1 + b_start, j2 + b_start)
+                for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+    anchors = _unique_anchors(a, b, a_start, a_end, b_start, b_end)
+    if not anchors:
+        return [('replace', a_start, a_end, b_start, b_end)]
+    opcodes = []
+    for i, j in anchors:
+        opcodes.extend(_align(a, b, a_start, i, b_start, j))
+        a_start, b_start = i + 1, j + 1
+    opcodes.extend(_align(a, b, a_start, a_end, b_start, b_end))
+    return opcodes
+
+
+def _unique_anchors(a, b, a_start, a_end, b_start, b_end):
+    """Return (i, j) pairs of items unique to both ranges, in order in both."""
+    a_counts = {}
+    for i in range(a_start, a_end):
+        a_counts[a[i]] = i if a[i] not in a_counts else None
+    b_counts = {}
+    for j in range(b_start, b_end):
+        b_counts[b[j]] = j if b[j] not in b_counts else None
+    pairs = [(i, b_counts[item]) for item, i in a_counts.items()
+             if i is not None and b_counts.get(item) is not None]
+    pairs.sort()
+    # Longest run of pairs increasing in j too (patience sorting)
+    tails = []  # j of the last pair of the best run of each length
+    tail_pairs = []
+    previous = [None] * len(pairs)
+    for index, (i, j) in enumerate(pairs):
+        length = bisect.bisect_left(tails, j)
+        if length == len(tails):
+            tails.append(j)
+            tail_pairs.append(index)
+        else:
+            tails[length] = j
+            tail_pairs[length] = index
+        previous[index] = tail_pairs[length - 1] if length else None
+    anchors = []
+    index = tail_pairs[-1] if tail_pairs else None
+    while index is not None:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _container_digest(node, hashes):
+    # One repr() of the members, with children replaced by their digests;
+    # repr quotes strings and tells True from 1 and 1 from 1.0
+    if type(node) is dict:
+        members = sorted([(key, hashes[id(value)] if type(value) in CONTAINERS else value)
+                          for key, value in node.items()])
+    else:
+        members = [hashes[id(value)] if type(value) in CONTAINERS else value for value in node]
+    data = repr(members) if type(node) is list else '{' + repr(members)
+    return hashlib.blake2b(data.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def _identity(value, hashes):
+    """A value that is equal for two nodes exactly when their contents are."""
+    if type(value) in CONTAINERS:
+        return hashes[id(value)]
+    return type(value), value
@@ -0,0 +1,148 @@
+import hashlib
+import tempfile
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+CHUNK_SIZE = 256 * 1024
+
+
+class BlobStore:
+    """Content-addressed, compressed storage for response bodies.
+
+    Bodies are keyed by the SHA-256 of their uncompressed bytes, so a body
+    returned thousands of times is stored once. Data is compressed with
+    zstd when the zstandard package is installed and zlib otherwise; the
+    codec is recorded per blob so either can be read back. Bodies are
+    streamed through the compressor and into SQLite's incremental blob I/O
+    chunk by chunk, in both directions, so large bodies never have to exist
+    as a single Python object. Reference counts are kept by triggers on the
+    tables that point at blobs (see HistoryDatabase).
+    """
+
+    def __init__(self, codec=None, chunk_size=CHUNK_SIZE):
+        self.codec = codec or ('zstd' if zstandard is not None else 'zlib')
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def create_table(cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                id INTEGER PRIMARY KEY,
+                hash TEXT NOT NULL UNIQUE,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                compressed_size INTEGER NOT NULL,
+                refcount INTEGER NOT NULL DEFAULT 0,
+                data BLOB
+            )
+        ''')
+
+    def put(self, conn, source):
+        """Store source (str, bytes or a ResponseBody) and return its hash.
+
+        The hash is computed in a first pass so a body that is already
+        stored is never compressed again.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in self._chunks(source):
+            digest.update(chunk)
+            size += len(chunk)
+        key = digest.hexdigest()
+        if conn.execute('SELECT 1 FROM blobs WHERE hash = ?', (key,)).fetchone():
+            return key
+
+        with tempfile.SpooledTemporaryFile(max_size=self.chunk_size, prefix='blob-') as spool:
+            compressor = self._compressor()
+            for chunk in self._chunks(source):
+                spool.write(compressor.compress(chunk))
+            spool.write(compressor.flush())
+            compressed_size = spool.tell()
+
+            cursor = conn.execute('''
+                INSERT OR IGNORE INTO blobs (hash, codec, size, compressed_size, data)
+                VALUES (?, ?, ?, ?, zeroblob(?))
+            ''', (key, self.codec, size, compressed_size, compressed_size))
+            if cursor.rowcount and compressed_size:
+                spool.seek(0)
+                with conn.blobopen('blobs', 'data', cursor.lastrowid) as blob:
+                    while data := spool.read(self.chunk_size):
+                        blob.write(data)
+        return key
+
+    def iter_chunks(self, conn, key):
+        """Yield the uncompressed body stored under key, chunk by chunk.
+
+        Chunks are at most chunk_size bytes however well the data compressed.
+        """
+        row = conn.execute('SELECT id, codec FROM blobs WHERE hash = ?', (key,)).fetchone()
+        if row is None:
+            return
+        blob_id, codec = row
+        with conn.blobopen('blobs', 'data', blob_id, readonly=True) as blob:
+            if codec == 'zstd':
+                reader = self._zstd_decompressor().stream_reader(blob)
+                while chunk := reader.read(self.chunk_size):
+                    yield chunk
+                return
+
+            decompressor = zlib.decompressobj()
+            while data := blob.read(self.chunk_size):
+                while data:
+                    chunk = decompressor.decompress(data, self.chunk_size)
+                    data = decompressor.unconsumed_tail
+                    if chunk:
+                        yield chunk
+            tail = decompressor.flush()
+            if tail:
+                yield tail
+
+    def read(self, conn, key, limit=None):
+        """Return the body stored under key, or only its first limit bytes."""
+        parts = []
+        size = 0
+        for chunk in self.iter_chunks(conn, key):
+            parts.append(chunk)
+            size += len(chunk)
+            if limit is not None and size >= limit:
+                break
+        data = b''.join(parts)
+        return data if limit is None else data[:limit]
+
+    def stats(self, conn):
+        """Return blob count, stored and uncompressed sizes and references."""
+        count, size, compressed, references = conn.execute('''
+            SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(compressed_size), 0),
+                   COALESCE(SUM(refcount), 0)
+            FROM blobs
+        ''').fetchone()
+        return {
+            'blobs': count,
+            'references': references,
+            'size': size,
+            'compressed_size': compressed,
+            'ratio': round(size / compressed, 2) if compressed else None,
+        }
+
+    def _chunks(self, source):
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            for offset in range(0, len(source), self.chunk_size):
+                yield source[offset:offset + self.chunk_size]
+        else:
+            yield from source.iter_chunks(self.chunk_size)
+
+    def _compressor(self):
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor().compressobj()
+        return zlib.compressobj(6)
+
+    def _zstd_decompressor(self):
+        if zstandard is None:
+            raise RuntimeError("This body was stored with zstd: pip install zstandard")
+        return zstandard.ZstdDecompressor()
@@ -1,19 +1,125 @@
+import atexit
+import json
+import re
 import sqlite3
 from datetime import datetime
+from functools import partial
+
+from .blob_store import BlobStore
+from .history_writer import FLUSH_TIMEOUT, HistoryWriter
+from .latency_rollup import LatencyRollup, endpoint_of
+from .retention import RetentionWorker, enable_incremental_vacuum, used_bytes
+
+# Response bodies are indexed for search and previewed up to this many bytes
+HISTORY_BODY_LIMIT = 1024 * 1024
+
+# Columns added after the original schema; (name, declaration)
+ADDED_COLUMNS = [
+    ('timings', 'TEXT'),  # JSON phase breakdown in milliseconds
+    ('body_hash', 'TEXT'),  # Response body in the blobs table
+    ('response_encoding', 'TEXT'),
+    ('elapsed_ms', 'REAL'),
+    ('request_size', 'INTEGER'),
+    ('response_size', 'INTEGER'),
+    ('host', 'TEXT'),
+    ('path', 'TEXT'),  # URL path with ids collapsed to {id}
+]
+
+def build_fts_query(keyword):
+    """Translate a search box string into an FTS5 MATCH expression.
+
+    Every term is quoted so punctuation in URLs cannot break the query
+    syntax; quoted phrases stay phrases and a trailing * becomes a prefix
+    query.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', keyword):
+        term = phrase if phrase else word
+        prefix = not phrase and term.endswith('*')
+        term = term.rstrip('*') if prefix else term
+        if term.strip():
+            quoted = '"' + term.replace('"', '""') + '"'
+            terms.append(quoted + '*' if prefix else quoted)
+    return ' '.join(terms)
+
+# Columns shown in history lists; bodies are loaded per entry on demand
+LIST_COLUMNS = 'id, method, url, response_code, timestamp'
+
+# Full rows in the original column order, with the body read from its blob
+ENTRY_COLUMNS = ('id, method, url, headers, body, response_code, '
+                 'body_text(body_hash, response_encoding, NULL) AS response_body, timestamp, timings')
 
 class HistoryDatabase:
-    def __init__(self, db_path='history.db'):
+    def __init__(self, db_path='history.db', write_behind=False, batch_size=200, flush_interval=0.5):
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        self.writer = None
+        self.retention = None
+        self.fts_enabled = False
+        self.blobs = BlobStore()
+        self.rollup = LatencyRollup()
         self.connect()
         self.create_table()
 
+        # An in-memory database cannot be shared with a second connection
+        if write_behind and db_path != ':memory:':
+            self.writer = HistoryWriter(self._open_connection, batch_size, flush_interval)
+            atexit.register(self.close)
+
+    def _open_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        # auto_vacuum can only be set for free in a new database; switching
+        # to WAL writes the header, after which it would need a full VACUUM
+        if not conn.execute('SELECT 1 FROM sqlite_master').fetchone():
+            enable_incremental_vacuum(conn)
+        if self.db_path != ':memory:':
+            # WAL lets readers run alongside the writer; NORMAL sync only
+            # fsyncs at checkpoints, which WAL keeps crash-safe
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        # Decompresses a stored body in queries; the schema never calls it
+        conn.create_function('body_text', 3, partial(self._body_text, conn), deterministic=True)
+        return conn
+
+    def _body_text(self, conn, key, encoding, limit):
+        if key is None:
+            return None
+        data = self.blobs.read(conn, key, limit)
+        return data.decode(encoding or 'utf-8', errors='replace')
+
     def connect(self):
         """Establish a connection to the SQLite database."""
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = self._open_connection()
         self.cursor = self.conn.cursor()
 
+    def _write(self, operation):
+        """Run operation(connection) now, or queue it for the writer thread."""
+        if self.writer is not None:
+            self.writer.submit(operation)
+        else:
+            operation(self.conn)
+            self.conn.commit()
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wait until all queued writes have been committed.
+
+        Returns False if the writer did not catch up within timeout seconds.
+        """
+        if self.writer is not None:
+            return self.writer.flush(timeout)
+        return True
+
+    def notify_when_written(self, callback):
+        """Call callback() once the writes queued so far are committed.
+
+        The callback runs on the writer thread. Returns False, without
+        calling it, if no writes are queued.
+        """
+        if self.writer is not None:
+            return self.writer.notify(callback)
+        return False
+
     def create_table(self):
         """Create the history table if it doesn't exist."""
         self.cursor.execute('''
@@ -28,50 +134,433 @@ class HistoryDatabase:
                 timestamp DATETIME
             )
         ''')
+        self.blobs.create_table(self.cursor)
+        self.rollup.create_table(self.cursor)
+        self.migrate()
+        self.create_search_index()
         self.conn.commit()
 
-    def add_entry(self, method, url, headers, body, response_code, response_body):
-        """Add a new entry to the history table."""
+    def migrate(self):
+        """Add columns introduced after the history table was first created."""
+        self.cursor.execute('PRAGMA table_info(history)')
+        existing = {row[1] for row in self.cursor.fetchall()}
+        for name, declaration in ADDED_COLUMNS:
+            if name not in existing:
+                self.cursor.execute(f'ALTER TABLE history ADD COLUMN {name} {declaration}')
+
+        self.create_blob_triggers()
+        self.move_inline_bodies()
+        self.backfill_analytics()
+
+        # Keyset pagination walks (timestamp, id) newest first; NULL
+        # timestamps would fall out of the row-value comparison
+        self.cursor.execute("UPDATE history SET timestamp = '' WHERE timestamp IS NULL")
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp, id)')
+
+    def create_blob_triggers(self):
+        """Keep blob reference counts in step with history rows.
+
+        A blob is deleted as soon as the last entry referencing it is, so
+        deleting or clearing history also reclaims body storage.
+        """
+        self.cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS history_blob_insert AFTER INSERT ON history
+            WHEN new.body_hash IS NOT NULL BEGIN
+                UPDATE blobs SET refcount = refcount + 1 WHERE hash = new.body_hash;
+            END;
+            CREATE TRIGGER IF NOT EXISTS history_blob_delete AFTER DELETE ON history
+            WHEN old.body_hash IS NOT NULL BEGIN
+                UPDATE blobs SET refcount = refcount - 1 WHERE hash = old.body_hash;
+                DELETE FROM blobs WHERE hash = old.body_hash AND refcount <= 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS history_blob_update AFTER UPDATE OF body_hash ON history
+            WHEN old.body_hash IS NOT new.body_hash BEGIN
+                UPDATE blobs SET refcount = refcount + 1 WHERE hash = new.body_hash;
+                UPDATE blobs SET refcount = refcount - 1 WHERE hash = old.body_hash;
+                DELETE FROM blobs WHERE hash = old.body_hash AND refcount <= 0;
+            END;
+        ''')
+
+    def move_inline_bodies(self, batch_size=500):
+        """Move response bodies stored inline in history into the blob store."""
+        legacy_index = self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'history_fts' AND sql LIKE '%content=''history''%'"
+        ).fetchone()
+        if legacy_index:
+            # The old index read bodies from history.response_body; drop it
+            # before moving them so it is rebuilt once over the new layout
+            self.cursor.executescript('''
+                DROP TRIGGER IF EXISTS history_fts_insert;
+                DROP TRIGGER IF EXISTS history_fts_delete;
+                DROP TRIGGER IF EXISTS history_fts_update;
+                DROP TABLE history_fts;
+            ''')
+
+        while True:
+            rows = self.cursor.execute(
+                'SELECT id, response_body FROM history WHERE response_body IS NOT NULL LIMIT ?',
+                (batch_size,)).fetchall()
+            if not rows:
+                break
+            for entry_id, response_body in rows:
+                self.cursor.execute('''
+                    UPDATE history SET body_hash = ?, response_encoding = 'utf-8', response_body = NULL
+                    WHERE id = ?
+                ''', (self.blobs.put(self.conn, response_body), entry_id))
+            self.conn.commit()
+
+    def backfill_analytics(self, batch_size=500):
+        """Fill endpoint, size and latency columns and rollups for older entries."""
+        while True:
+            rows = self.cursor.execute('''
+                SELECT h.id, h.url, h.body, h.response_code, h.timestamp, h.timings, b.size
+                FROM history h LEFT JOIN blobs b ON b.hash = h.body_hash
+                WHERE h.host IS NULL LIMIT ?
+            ''', (batch_size,)).fetchall()
+            if not rows:
+                break
+            for entry_id, url, body, response_code, timestamp, timings, response_size in rows:
+                host, path = endpoint_of(url)
+                elapsed_ms = sum(json.loads(timings).values()) if timings else None
+                self.cursor.execute('''
+                    UPDATE history SET host = ?, path = ?, elapsed_ms = ?, request_size = ?,
+                                       response_size = ?
+                    WHERE id = ?
+                ''', (host, path, elapsed_ms, len(body.encode('utf-8')) if body else 0,
+                      response_size, entry_id))
+                self.rollup.record(self.conn, host, path, timestamp or '', elapsed_ms, response_code)
+            self.conn.commit()
+
+    def create_search_index(self):
+        """Create the FTS5 index over url, body and response_body.
+
+        history_fts is a standalone table: _insert_entry() indexes each
+        entry's decompressed response body (up to HISTORY_BODY_LIMIT bytes)
+        on the writing connection, and plain SQL triggers drop or update
+        rows as history changes, so any SQLite client can write to the
+        database. Without FTS5 support in the SQLite build, search falls
+        back to LIKE scans.
+        """
+        if self.cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'history_content'").fetchone():
+            # The old index read bodies through the body_text() function,
+            # which only this class's connections define; rebuild it
+            self.cursor.executescript('''
+                DROP TRIGGER IF EXISTS history_fts_insert;
+                DROP TRIGGER IF EXISTS history_fts_delete;
+                DROP TRIGGER IF EXISTS history_fts_update_delete;
+                DROP TRIGGER IF EXISTS history_fts_update_insert;
+                DROP TABLE IF EXISTS history_fts;
+                DROP VIEW history_content;
+            ''')
+        exists = self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_fts'").fetchone()
+        try:
+            self.cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(url, body, response_body)
+            ''')
+        except sqlite3.OperationalError:
+            return  # No FTS5 in this SQLite build
+        self.cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+                DELETE FROM history_fts WHERE rowid = old.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS history_fts_update AFTER UPDATE OF url, body ON history BEGIN
+                UPDATE history_fts SET url = new.url, body = new.body WHERE rowid = new.id;
+            END;
+        ''')
+        self.fts_enabled = True
+        if not exists:
+            self.rebuild_search_index()
+
+    def rebuild_search_index(self, batch_size=500):
+        """Index every entry again, e.g. entries recorded before the index existed."""
+        self.cursor.execute('DELETE FROM history_fts')
+        last_id = -1
+        while True:
+            rows = self.cursor.execute('''
+                SELECT id, url, body, body_hash, response_encoding FROM history
+                WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                self._index_entry(self.conn, *row)
+            self.conn.commit()
+            last_id = rows[-1][0]
+
+    def _index_entry(self, conn, entry_id, url, body, body_hash, encoding):
+        conn.execute('INSERT INTO history_fts(rowid, url, body, response_body) VALUES (?, ?, ?, ?)',
+                     (entry_id, url, body,
+                      self._body_text(conn, body_hash, encoding, HISTORY_BODY_LIMIT)))
+
+    def add_entry(self, method, url, headers, body, response_code, response_body,
+                  timings=None, encoding=None, elapsed_ms=None):
+        """Add a new entry to the history table.
+
+        response_body may be text, bytes or a spooled ResponseBody; it is
+        compressed into the blob store on the writing thread. encoding is
+        used to decode bytes bodies for display and search (UTF-8 if None).
+        elapsed_ms defaults to the sum of the phase timings, if given. The
+        entry is also counted in its endpoint's latency rollup.
+        """
         timestamp = datetime.now().isoformat()
+        if isinstance(response_body, str):
+            encoding = 'utf-8'
+        if elapsed_ms is None and timings:
+            elapsed_ms = sum(timings.values())
+        host, path = endpoint_of(url)
+        entry = {
+            'method': method, 'url': url, 'headers': headers, 'body': body,
+            'response_code': response_code, 'timestamp': timestamp,
+            'timings': json.dumps(timings) if timings is not None else None,
+            'response_encoding': encoding, 'elapsed_ms': elapsed_ms,
+            'request_size': len(body.encode('utf-8') if isinstance(body, str) else body or b''),
+            'host': host, 'path': path,
+        }
+        self._write(partial(self._insert_entry, entry, response_body))
+
+    def add_response(self, response):
+        """Add an entry for a requests.Response and the request that produced it."""
+        request = response.request
+        if request is None:
+            return
+        body = request.body
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', errors='replace')
+        # Spooled bodies are streamed into the store from their temp file
+        response_body = getattr(response, 'body', None)
+        if response_body is None:
+            response_body = response.content
+        timings = getattr(response, 'timings', None)
+        elapsed_ms = None
+        if getattr(response, 'error', None) is None:
+            elapsed_ms = (timings.total if timings else response.elapsed.total_seconds()) * 1000
+        self.add_entry(request.method, request.url, json.dumps(dict(request.headers)), body,
+                       response.status_code, response_body,
+                       timings=timings.to_dict() if timings else None, encoding=response.encoding,
+                       elapsed_ms=elapsed_ms)
+
+    def _insert_entry(self, entry, response_body, conn):
+        body_hash = response_size = None
+        if response_body is not None:
+            body_hash = self.blobs.put(conn, response_body)
+            response_size = conn.execute('SELECT size FROM blobs WHERE hash = ?',
+                                         (body_hash,)).fetchone()[0]
+        cursor = conn.execute('''
+            INSERT INTO history (method, url, headers, body, response_code, timestamp, timings,
+                                 response_encoding, elapsed_ms, request_size, host, path,
+                                 body_hash, response_size)
+            VALUES (:method, :url, :headers, :body, :response_code, :timestamp, :timings,
+                    :response_encoding, :elapsed_ms, :request_size, :host, :path,
+                    :body_hash, :response_size)
+        ''', dict(entry, body_hash=body_hash, response_size=response_size))
+        if self.fts_enabled:
+            self._index_entry(conn, cursor.lastrowid, entry['url'], entry['body'], body_hash,
+                              entry['response_encoding'])
+        self.rollup.record(conn, entry['host'], entry['path'], entry['timestamp'],
+                           entry['elapsed_ms'], entry['response_code'])
+
+    def get_timings(self, entry_id):
+        """Return the stored phase timings (milliseconds) for an entry, or None."""
+        self.cursor.execute('SELECT timings FROM history WHERE id = ?', (entry_id,))
+        row = self.cursor.fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def get_entries_page(self, limit=200, cursor=None):
+        """Return one page of list rows, newest first, and the next cursor.
+
+        Rows are (id, method, url, response_code, timestamp). Pass the
+        returned cursor back to get the following page; it is None once the
+        last page has been read. Uses the timestamp index, so every page
+        costs the same regardless of how deep into the history it is.
+        """
+        if cursor is None:
+            self.cursor.execute(f'''
+                SELECT {LIST_COLUMNS} FROM history
+                ORDER BY timestamp DESC, id DESC LIMIT ?
+            ''', (limit,))
+        else:
+            self.cursor.execute(f'''
+                SELECT {LIST_COLUMNS} FROM history
+                WHERE (timestamp, id) < (?, ?)
+                ORDER BY timestamp DESC, id DESC LIMIT ?
+            ''', (*cursor, limit))
+        rows = self.cursor.fetchall()
+        next_cursor = (rows[-1][4], rows[-1][0]) if len(rows) == limit else None
+        return rows, next_cursor
+
+    def count_entries(self):
+        """Return the number of entries in the history table."""
+        self.cursor.execute('SELECT COUNT(*) FROM history')
+        return self.cursor.fetchone()[0]
+
+    def get_entry(self, entry_id, body_limit=HISTORY_BODY_LIMIT):
+        """Return one entry, including its bodies, as a dict (or None).
+
+        response_body holds at most body_limit bytes of the response (None
+        for all of it); response_size is the full size. Use
+        iter_response_body() to read large bodies.
+        """
         self.cursor.execute('''
-            INSERT INTO history (method, url, headers, body, response_code, response_body, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (method, url, headers, body, response_code, response_body, timestamp))
-        self.conn.commit()
+            SELECT h.id, h.method, h.url, h.headers, h.body, h.response_code,
+                   body_text(h.body_hash, h.response_encoding, ?), b.size, h.timestamp, h.timings
+            FROM history h LEFT JOIN blobs b ON b.hash = h.body_hash
+            WHERE h.id = ?
+        ''', (body_limit, entry_id))
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        keys = ('id', 'method', 'url', 'headers', 'body', 'response_code',
+                'response_body', 'response_size', 'timestamp', 'timings')
+        entry = dict(zip(keys, row))
+        entry['timings'] = json.loads(entry['timings']) if entry['timings'] else None
+        return entry
+
+    def iter_response_body(self, entry_id):
+        """Yield an entry's raw response body in chunks, decompressing as it goes."""
+        row = self.cursor.execute('SELECT body_hash FROM history WHERE id = ?', (entry_id,)).fetchone()
+        if row and row[0]:
+            yield from self.blobs.iter_chunks(self.conn, row[0])
+
+    def get_response_body(self, entry_id):
+        """Return an entry's whole response body as bytes, or None if it has none.
+
+        Reads through a connection of its own, so worker threads can call
+        it while the GUI thread uses the database (except for :memory:
+        databases, which only the creating thread can read).
+        """
+        conn = self.conn if self.db_path == ':memory:' else self._open_connection()
+        try:
+            row = conn.execute('SELECT body_hash FROM history WHERE id = ?', (entry_id,)).fetchone()
+            if not row or not row[0]:
+                return None
+            return self.blobs.read(conn, row[0])
+        finally:
+            if conn is not self.conn:
+                conn.close()
+
+    def latency_trend(self, host, path=None, since=None, until=None, bucket='hour'):
+        """Return hourly or daily latency and error stats for an endpoint.
+
+        Reads only the pre-aggregated rollups; see LatencyRollup.trend().
+        """
+        return self.rollup.trend(self.conn, host, path, since, until, bucket)
+
+    def latency_endpoints(self, since=None):
+        """Return (host, path, count, errors) for every endpoint seen, busiest first."""
+        return self.rollup.endpoints(self.conn, since)
+
+    def storage_stats(self):
+        """Return blob store statistics (deduplication and compression)."""
+        return self.blobs.stats(self.conn)
 
     def get_all_entries(self):
-        """Retrieve all entries from the history table."""
-        self.cursor.execute('SELECT * FROM history ORDER BY timestamp DESC')
+        """Retrieve all entries from the history table.
+
+        Loads every body into memory; prefer get_entries_page() for lists.
+        """
+        self.cursor.execute(f'SELECT {ENTRY_COLUMNS} FROM history ORDER BY timestamp DESC')
         return self.cursor.fetchall()
 
     def get_entry_by_id(self, entry_id):
         """Retrieve a specific entry by its ID."""
-        self.cursor.execute('SELECT * FROM history WHERE id = ?', (entry_id,))
+        self.cursor.execute(f'SELECT {ENTRY_COLUMNS} FROM history WHERE id = ?', (entry_id,))
         return self.cursor.fetchone()
 
     def delete_entry(self, entry_id):
         """Delete a specific entry by its ID."""
-        self.cursor.execute('DELETE FROM history WHERE id = ?', (entry_id,))
-        self.conn.commit()
+        self._write(lambda conn: conn.execute('DELETE FROM history WHERE id = ?', (entry_id,)))
 
     def clear_history(self):
         """Clear all entries from the history table."""
-        self.cursor.execute('DELETE FROM history')
-        self.conn.commit()
+        self._write(lambda conn: conn.execute('DELETE FROM history'))
+
+    def search_history(self, keyword, limit=50, offset=0, highlight=('<b>', '</b>')):
+        """Search url, request body and response body for the given keyword.
 
-    def search_history(self, keyword):
-        """Search for entries containing the given keyword in URL or body."""
+        Bare words match whole tokens, a trailing * matches a prefix
+        (auth*) and double quotes match a phrase ("not found"); all terms
+        must match. Results are ranked best first and returned a page at a
+        time as (id, method, url, response_code, timestamp, snippet) rows,
+        with matches in the snippet wrapped in the highlight markers.
+        """
+        if not self.fts_enabled:
+            return self._search_like(keyword, limit, offset)
+
+        query = build_fts_query(keyword)
+        if not query:
+            return []
+        start, end = highlight
         self.cursor.execute('''
-            SELECT * FROM history 
-            WHERE url LIKE ? OR body LIKE ? OR response_body LIKE ?
+            SELECT h.id, h.method, h.url, h.response_code, h.timestamp,
+                   snippet(history_fts, -1, ?, ?, '...', 16)
+            FROM history_fts
+            JOIN history h ON h.id = history_fts.rowid
+            WHERE history_fts MATCH ?
+            ORDER BY bm25(history_fts, 5.0, 2.0, 1.0)
+            LIMIT ? OFFSET ?
+        ''', (start, end, query, limit, offset))
+        return self.cursor.fetchall()
+
+    def _search_like(self, keyword, limit, offset):
+        pattern = f'%{keyword}%'
+        self.cursor.execute(f'''
+            SELECT id, method, url, response_code, timestamp, NULL FROM history
+            WHERE url LIKE ? OR body LIKE ?
+               OR body_text(body_hash, response_encoding, {HISTORY_BODY_LIMIT}) LIKE ?
             ORDER BY timestamp DESC
-        ''', (f'%{keyword}%', f'%{keyword}%', f'%{keyword}%'))
+            LIMIT ? OFFSET ?
+        ''', (pattern, pattern, pattern, limit, offset))
         return self.cursor.fetchall()
 
+    def set_retention(self, policy, interval=600, **options):
+        """Apply a RetentionPolicy every interval seconds in the background.
+
+        Extra options (batch_size, vacuum_pages, pause) go to the
+        RetentionWorker. Pass None to stop applying a policy.
+        """
+        if self.retention is not None:
+            self.retention.stop()
+            self.retention = None
+        if policy is None:
+            return
+        self.retention = RetentionWorker(self._open_connection, policy, interval,
+                                         search_index='history_fts' if self.fts_enabled else None,
+                                         **options)
+        if self.db_path != ':memory:':
+            self.retention.start()
+
+    def enforce_retention(self):
+        """Run a retention pass now (in the background for file databases)."""
+        if self.retention is None:
+            return
+        if self.retention.is_alive():
+            self.retention.trigger()
+        else:
+            self.flush()
+            self.retention.run_once(self.conn)
+
+    def retention_stats(self):
+        """Return retention counters and the database's current size."""
+        stats = self.retention.stats() if self.retention is not None else {}
+        page_size = self.cursor.execute('PRAGMA page_size').fetchone()[0]
+        stats['database_bytes'] = self.cursor.execute('PRAGMA page_count').fetchone()[0] * page_size
+        stats['used_bytes'] = used_bytes(self.conn)
+        return stats
+
     def close(self):
-        """Close the database connection."""
+        """Commit any queued writes and close the database connections."""
+        if self.retention is not None:
+            self.retention.stop()
+            self.retention = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            atexit.unregister(self.close)
         if self.conn:
             self.conn.close()
+            self.conn = None
 
     def __del__(self):
         """Ensure the database connection is closed when the object is deleted."""
@@ -0,0 +1,130 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Longest flush() waits for the writer to catch up, in seconds
+FLUSH_TIMEOUT = 10
+
+# How often a waiting flush() checks that the writer is still running
+FLUSH_POLL_INTERVAL = 0.1
+
+
+class HistoryWriter(threading.Thread):
+    """Background thread that applies queued writes in batched transactions.
+
+    Each queued operation is a callable taking a sqlite3 connection. The
+    writer owns its own connection, drains up to batch_size operations at a
+    time and commits them together, so a burst of inserts costs one
+    transaction (and one WAL sync) instead of one per row.
+    """
+
+    def __init__(self, connect, batch_size=200, flush_interval=0.5):
+        super().__init__(name='history-writer', daemon=True)
+        self.connect = connect
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.written = 0
+        self.batches = 0
+        self.start()
+
+    def submit(self, operation):
+        """Queue operation(connection) to run on the writer thread."""
+        self.queue.put(operation)
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Block until every operation queued so far has been committed.
+
+        Returns False if that took longer than timeout seconds or the
+        writer thread has stopped, so its queue will never drain.
+        """
+        if not self.is_alive():
+            return False
+        done = threading.Event()
+        self.queue.put(done)
+        deadline = time.monotonic() + timeout
+        while not done.wait(min(FLUSH_POLL_INTERVAL, max(0, deadline - time.monotonic()))):
+            if not self.is_alive() or time.monotonic() >= deadline:
+                return done.is_set()
+        return True
+
+    def notify(self, callback):
+        """Call callback() on the writer thread once the queued operations commit.
+
+        Returns False, without queueing it, if nothing is waiting to be written.
+        """
+        if not self.is_alive() or self.queue.unfinished_tasks == 0:
+            return False
+        self.queue.put(_Notification(callback))
+        return True
+
+    def close(self, timeout=None):
+        """Commit everything still queued, then stop the thread."""
+        if self.is_alive():
+            self.queue.put(None)
+            self.join(timeout)
+
+    def run(self):
+        conn = self.connect()
+        try:
+            while True:
+                # Wait for the first operation, then gather more for up to
+                # flush_interval; flush and close markers end a batch early
+                batch = [self.queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size and callable(batch[-1]):
+                    try:
+                        batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+                running = self._apply(conn, batch)
+                for _ in batch:
+                    self.queue.task_done()
+                if not running:
+                    return
+        finally:
+            conn.close()
+
+    def _apply(self, conn, batch):
+        """Run one batch in a single transaction; return False on shutdown."""
+        operations = [item for item in batch if callable(item)]
+        try:
+            for operation in operations:
+                operation(conn)
+            conn.commit()
+            self.written += len(operations)
+            self.batches += 1
+        except Exception:
+            # Fall back to one transaction per operation so one bad write
+            # does not take the rest of the batch with it
+            conn.rollback()
+            for operation in operations:
+                try:
+                    operation(conn)
+                    conn.commit()
+                    self.written += 1
+                except Exception:
+                    logger.exception("Failed to write history entry")
+                    conn.rollback()
+
+        for item in batch:
+            if isinstance(item, threading.Event):
+                item.set()
+            elif isinstance(item, _Notification):
+                try:
+                    item.callback()
+                except Exception:
+                    logger.exception("History write notification failed")
+        return None not in batch
+
+
+class _Notification:
+    """Queue marker for notify(); not callable, so it ends a batch."""
+
+    __slots__ = ('callback',)
+
+    def __init__(self, callback):
+        self.callback = callback
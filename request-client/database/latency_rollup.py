@@ -0,0 +1,129 @@
+import re
+from urllib.parse import urlparse
+
+from core.latency_histogram import LatencyHistogram
+
+# Path segments that identify a resource rather than an endpoint
+ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{16,}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+                        r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$')
+
+ROLLUP_PERCENTILES = (50, 95, 99)
+
+
+def endpoint_of(url):
+    """Return (host, path template) for a URL, with ids replaced by {id}.
+
+    /users/42 and /users/43 are the same endpoint; without collapsing ids
+    every resource would get its own rollup rows.
+    """
+    parsed = urlparse(url or '')
+    segments = ['{id}' if ID_SEGMENT.match(segment) else segment
+                for segment in parsed.path.split('/')]
+    return parsed.netloc, '/'.join(segments) or '/'
+
+
+class LatencyRollup:
+    """Hourly per-endpoint aggregates of history entries.
+
+    Each (host, path, hour) row holds the request count, the number of
+    errors (status 500 and above, or no response) and a LatencyHistogram
+    sketch of elapsed times. Rows are updated as entries are inserted, so
+    trend queries read one row per endpoint and hour instead of scanning
+    history. Rollups are kept when history entries are deleted.
+    """
+
+    def __init__(self, cache_size=256):
+        # Recently updated sketches, so a run of requests to one endpoint
+        # does not re-parse its histogram on every insert
+        self.cache_size = cache_size
+        self._sketches = {}
+
+    @staticmethod
+    def create_table(cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS latency_rollup (
+                host TEXT NOT NULL,
+                path TEXT NOT NULL,
+                hour TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                sketch TEXT,
+                PRIMARY KEY (host, path, hour)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_latency_rollup_hour ON latency_rollup (hour)')
+
+    def record(self, conn, host, path, timestamp, elapsed_ms, response_code):
+        """Add one request to its endpoint's rollup for the hour of timestamp."""
+        hour = f"{timestamp[:13]}:00"
+        error = 1 if response_code is None or response_code >= 500 else 0
+        key = (host, path, hour)
+        row = conn.execute('SELECT count, sketch FROM latency_rollup WHERE host = ? AND path = ? AND hour = ?',
+                           key).fetchone()
+        count, sketch = row if row else (0, None)
+        if elapsed_ms is not None:
+            cached = self._sketches.pop(key, None)
+            if cached is not None and cached[0] == count:
+                histogram = cached[1]  # Nobody else has updated the row since
+            else:
+                histogram = LatencyHistogram.from_json(sketch) if sketch else LatencyHistogram()
+            histogram.record(int(elapsed_ms * 1000))
+            sketch = histogram.to_json()
+            if len(self._sketches) >= self.cache_size:
+                self._sketches.clear()
+            self._sketches[key] = (count + 1, histogram)
+        conn.execute('''
+            INSERT INTO latency_rollup (host, path, hour, count, errors, sketch)
+            VALUES (?, ?, ?, 1, ?, ?)
+            ON CONFLICT (host, path, hour) DO UPDATE SET
+                count = count + 1, errors = errors + excluded.errors, sketch = excluded.sketch
+        ''', (host, path, hour, error, sketch))
+
+    def trend(self, conn, host, path=None, since=None, until=None, bucket='hour'):
+        """Return per-bucket latency stats for an endpoint, oldest first.
+
+        With path None all of the host's endpoints are combined. since and
+        until are ISO timestamps; bucket is 'hour' or 'day'. Each item has
+        the bucket start, count, errors, error_rate, mean_ms and p50/p95/p99.
+        """
+        query = 'SELECT hour, count, errors, sketch FROM latency_rollup WHERE host = ?'
+        params = [host]
+        if path is not None:
+            query += ' AND path = ?'
+            params.append(path)
+        if since is not None:
+            query += ' AND hour >= ?'
+            params.append(f"{since[:13]}:00")
+        if until is not None:
+            query += ' AND hour <= ?'
+            params.append(until)
+        query += ' ORDER BY hour'
+
+        width = 10 if bucket == 'day' else 16
+        buckets = {}
+        for hour, count, errors, sketch in conn.execute(query, params):
+            merged = buckets.setdefault(hour[:width], [0, 0, LatencyHistogram()])
+            merged[0] += count
+            merged[1] += errors
+            if sketch:
+                merged[2].merge(LatencyHistogram.from_json(sketch))
+        return [self._row(key, *values) for key, values in buckets.items()]
+
+    def endpoints(self, conn, since=None):
+        """Return (host, path, count, errors) for every endpoint, busiest first."""
+        return conn.execute('''
+            SELECT host, path, SUM(count), SUM(errors) FROM latency_rollup
+            WHERE hour >= ? GROUP BY host, path ORDER BY SUM(count) DESC
+        ''', (f"{since[:13]}:00" if since else '',)).fetchall()
+
+    def _row(self, key, count, errors, histogram):
+        row = {
+            'bucket': key,
+            'count': count,
+            'errors': errors,
+            'error_rate': round(errors / count, 4) if count else 0,
+            'mean_ms': round(histogram.mean() / 1000, 3),
+        }
+        for percent in ROLLUP_PERCENTILES:
+            row[f'p{percent}_ms'] = round(histogram.percentile(percent) / 1000, 3) if histogram.total_count else None
+        return row
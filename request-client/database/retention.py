@@ -0,0 +1,207 @@
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Most of the entries one retention pass deletes to meet a byte limit; the
+# estimate is rough, so the limit is approached over several passes
+MAX_BYTES_EVICTION_FRACTION = 0.25
+
+
+class RetentionPolicy:
+    """Limits on how much history to keep; None disables a limit.
+
+    Entries older than max_age_days are removed, then the oldest entries
+    while there are more than max_entries or the database uses more than
+    max_bytes. The byte limit is met by estimating the average entry size
+    and deleting at most MAX_BYTES_EVICTION_FRACTION of the entries a
+    pass, so it converges over a few passes rather than exactly.
+    """
+
+    def __init__(self, max_age_days=None, max_entries=None, max_bytes=None):
+        self.max_age_days = max_age_days
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def excess_entries(self, conn):
+        """Return how many of the oldest entries to delete to meet the limits."""
+        count = conn.execute('SELECT COUNT(*) FROM history').fetchone()[0]
+        excess = 0
+        if self.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            excess = conn.execute('SELECT COUNT(*) FROM history WHERE timestamp < ?',
+                                  (cutoff,)).fetchone()[0]
+        if self.max_entries is not None:
+            excess = max(excess, count - self.max_entries)
+        if self.max_bytes is not None and count:
+            used = used_bytes(conn)
+            if used > self.max_bytes:
+                estimate = math.ceil((used - self.max_bytes) * count / used)
+                excess = max(excess, min(estimate, math.ceil(count * MAX_BYTES_EVICTION_FRACTION)))
+        return min(excess, count)
+
+
+def used_bytes(conn):
+    """Return the bytes in use by the database, excluding free pages."""
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return (page_count - free_pages) * page_size
+
+
+def enable_incremental_vacuum(conn):
+    """Switch conn's database to auto_vacuum=INCREMENTAL if it is not already.
+
+    Takes effect at once for a database without tables; any other needs
+    a full VACUUM, which rewrites the whole file.
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        return
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    if conn.execute('SELECT 1 FROM sqlite_master').fetchone():
+        conn.execute('VACUUM')
+
+
+class RetentionWorker(threading.Thread):
+    """Background thread that applies a RetentionPolicy in small steps.
+
+    Every interval seconds it deletes expired entries batch_size at a time,
+    each batch in its own short transaction, and returns the freed pages to
+    the filesystem with PRAGMA incremental_vacuum, vacuum_pages at a time.
+    Pausing between steps lets the history writer and readers interleave,
+    so the database is never locked for long the way a full VACUUM locks
+    it. A database created before auto_vacuum=INCREMENTAL was set is
+    converted once, with one full VACUUM, when the thread starts.
+
+    Deleting from the full-text index only records tombstones; with
+    search_index set, index segments are also merged incrementally so the
+    space the deleted entries used is actually freed.
+    """
+
+    def __init__(self, connect, policy, interval=600, batch_size=500, vacuum_pages=256,
+                 pause=0.05, search_index=None):
+        super().__init__(name='history-retention', daemon=True)
+        self.connect = connect
+        self.policy = policy
+        self.search_index = search_index
+        self.interval = interval
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.pause = pause
+        self._wake = threading.Event()
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._stats = {
+            'runs': 0,
+            'entries_deleted': 0,
+            'pages_reclaimed': 0,
+            'bytes_reclaimed': 0,
+            'last_run': None,
+        }
+
+    def run(self):
+        conn = self.connect()
+        try:
+            try:
+                enable_incremental_vacuum(conn)
+            except Exception:
+                logger.exception("Converting the history database to incremental vacuum failed")
+            while not self._stopped:
+                self._wake.clear()
+                try:
+                    self.run_once(conn)
+                except Exception:
+                    logger.exception("History retention pass failed")
+                    conn.rollback()
+                self._wake.wait(self.interval)
+        finally:
+            conn.close()
+
+    def run_once(self, conn):
+        """Apply the policy and reclaim free pages; return entries deleted."""
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        pages_before = conn.execute('PRAGMA page_count').fetchone()[0]
+        count = conn.execute('SELECT COUNT(*) FROM history').fetchone()[0]
+        byte_limit_budget = math.ceil(count * MAX_BYTES_EVICTION_FRACTION)
+        deleted = 0
+        while not self._stopped:
+            excess = self.policy.excess_entries(conn)
+            if not excess:
+                break
+            used = used_bytes(conn)
+            while excess > 0 and not self._stopped:
+                ids = [row[0] for row in conn.execute(
+                    'SELECT id FROM history ORDER BY timestamp, id LIMIT ?',
+                    (min(excess, self.batch_size),))]
+                if not ids:  # Deleted elsewhere since they were counted
+                    break
+                conn.execute(f"DELETE FROM history WHERE id IN ({','.join('?' * len(ids))})", ids)
+                conn.commit()
+                excess -= len(ids)
+                deleted += len(ids)
+                self._record(entries_deleted=len(ids))
+                self._wake.wait(self.pause)
+            # Sizes are only accurate again once the space is reclaimed
+            self._compact(conn)
+            # Later rounds only serve the byte limit, whose estimate can keep
+            # asking for more; stop rather than empty the history
+            if used_bytes(conn) >= used or deleted >= byte_limit_budget:
+                break
+
+        # Also reclaims space freed by deletes made elsewhere (clear_history)
+        self._compact(conn)
+
+        reclaimed = pages_before - conn.execute('PRAGMA page_count').fetchone()[0]
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['pages_reclaimed'] += max(0, reclaimed)
+            self._stats['bytes_reclaimed'] += max(0, reclaimed) * page_size
+            self._stats['last_run'] = datetime.now().isoformat()
+        return deleted
+
+    def _compact(self, conn):
+        while not self._stopped and self._merge_step(conn):
+            self._wake.wait(self.pause)
+        while not self._stopped and self._vacuum_step(conn):
+            self._wake.wait(self.pause)
+
+    def _merge_step(self, conn):
+        """Merge a bounded amount of the search index; return True if work was done."""
+        if self.search_index is None:
+            return False
+        # A negative page count lets segments of every level be merged
+        # together, which is what drops the tombstones
+        before = conn.total_changes
+        conn.execute(f"INSERT INTO {self.search_index}({self.search_index}, rank) VALUES ('merge', ?)",
+                     (-self.vacuum_pages,))
+        conn.commit()
+        return conn.total_changes - before > 1
+
+    def _vacuum_step(self, conn):
+        """Release up to vacuum_pages free pages; return True if any were released."""
+        before = conn.execute('PRAGMA page_count').fetchone()[0]
+        # execute() steps the pragma only once, freeing a single page;
+        # executescript() runs it to completion
+        conn.executescript(f'PRAGMA incremental_vacuum({self.vacuum_pages})')
+        return conn.execute('PRAGMA page_count').fetchone()[0] < before
+
+    def _record(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def trigger(self):
+        """Run a retention pass now instead of waiting for the interval."""
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def stop(self, timeout=None):
+        self._stopped = True
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -1,24 +1,42 @@
 import sys
-from PyQt5.QtWidgets import QApplication
 
-from ui.main_window import MainWindow
-from core.http_client import HttpClient
-from core.request_handler import RequestHandler
-from core.response_handler import ResponseHandler
-from utils.json_formatter import format_json, is_valid_json, highlight_json
-from utils.xml_formatter import format_xml, is_valid_xml, highlight_xml
-from database.history_db import HistoryDatabase
+import cli
+
 
 def main():
+    # Commands run headless; Qt is only imported for the window
+    if sys.argv[1:2] and sys.argv[1] in cli.COMMANDS + ('-h', '--help'):
+        sys.exit(cli.main(sys.argv[1:]))
+    run_gui()
+
+
+def run_gui():
+    from PyQt5.QtWidgets import QApplication
+
+    from ui.main_window import MainWindow
+    from core.http_client import HttpClient
+    from core.request_handler import RequestHandler
+    from core.response_handler import ResponseHandler
+    from core.parsed_document import DocumentCache
+    from utils.json_formatter import format_json, is_valid_json, highlight_json
+    from utils.xml_formatter import format_xml, is_valid_xml, highlight_xml
+    from database.history_db import HistoryDatabase
+    from database.retention import RetentionPolicy
+
     app = QApplication(sys.argv)
 
     # Initialize core components
     http_client = HttpClient()
-    request_handler = RequestHandler()  # Initialize without parameters
-    response_handler = ResponseHandler()
+    http_client.set_stream_threshold(8 * 1024 * 1024)  # Spool bodies over 8 MB to disk
+    http_client.enable_cache('http_cache')
+    http_client.enable_retries()  # Idempotent requests only
+    request_handler = RequestHandler(http_client)  # Share the client's connection pool
+    document_cache = DocumentCache()  # Parsed bodies shared by the handler and the views
+    response_handler = ResponseHandler(document_cache=document_cache)
 
     # Initialize database
-    history_db = HistoryDatabase()
+    history_db = HistoryDatabase(write_behind=True)
+    history_db.set_retention(RetentionPolicy(max_age_days=90, max_bytes=1024 * 1024 * 1024))
 
     # Create main window
     main_window = MainWindow(
@@ -31,7 +49,8 @@ def main():
         format_xml=format_xml,
         is_valid_xml=is_valid_xml,
         highlight_xml=highlight_xml,
-        history_db=history_db
+        history_db=history_db,
+        document_cache=document_cache
     )
 
     main_window.show()
@@ -0,0 +1,145 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+import requests
+
+import cli
+from core.http_client import HttpClient
+
+
+def make_response(status=200, body=b'{"items": [{"name": "a"}, {"name": "b"}]}',
+                  content_type='application/json'):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = 'OK' if status < 400 else 'Not Found'
+    response._content = body
+    response.headers['Content-Type'] = content_type
+    response.encoding = 'utf-8'
+    response.elapsed = timedelta(milliseconds=12)
+    response.url = 'http://example.com/items'
+    return response
+
+
+class Sender:
+    """Stands in for HttpClient.send_request, recording every request."""
+
+    def __init__(self):
+        self.calls = []
+        self.response = make_response()
+
+    def send_request(self, method, url, headers=None, body=None):
+        self.calls.append((method, url, headers, body))
+        return self.response
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sender = Sender()
+    monkeypatch.setattr(HttpClient, 'send_request', lambda client, *args: sender.send_request(*args))
+    return sender
+
+
+def run(capsys, argv, stdin=None, monkeypatch=None):
+    if stdin is not None:
+        monkeypatch.setattr('sys.stdin', io.StringIO(stdin))
+    code = cli.main(argv)
+    out, err = capsys.readouterr()
+    return code, json.loads(out) if out.strip() else None, err
+
+
+def test_arguments(sent, capsys):
+    code, result, _ = run(capsys, ['send', 'put', 'http://example.com/items', '-H', 'X-A: 1 ',
+                                   '-H', 'X-B:2', '-d', '{"a": 1}'])
+    assert code == 0
+    assert sent.calls == [('PUT', 'http://example.com/items', {'X-A': '1', 'X-B': '2'}, '{"a": 1}')]
+    assert result['status'] == 200
+    assert result['body_type'] == 'json'
+    assert result['body'] == {"items": [{"name": "a"}, {"name": "b"}]}
+
+
+def test_data_defaults_to_post(sent, capsys):
+    run(capsys, ['send', 'http://example.com', '-d', 'x'])
+    run(capsys, ['send', 'http://example.com'])
+    assert [call[0] for call in sent.calls] == ['POST', 'GET']
+
+
+def test_stdin_request(sent, capsys, monkeypatch):
+    stdin = json.dumps({'method': 'patch', 'url': 'http://example.com', 'body': {'a': 1}})
+    code, _, _ = run(capsys, ['send'], stdin, monkeypatch)
+    assert code == 0
+    assert sent.calls == [('PATCH', 'http://example.com', {}, '{"a": 1}')]
+
+
+@pytest.mark.parametrize('argv, stdin', [
+    (['send', 'http://example.com', '-H', 'no separator'], None),
+    (['send', 'http://example.com', '-H', ': value'], None),
+    (['send', 'FETCH', 'http://example.com'], None),
+    (['send', 'GET', 'http://example.com', 'extra'], None),
+    (['send'], '[1, 2]'),
+    (['send'], '{"method": "GET"}'),
+    (['send'], '{"method": 1, "url": "http://example.com"}'),
+    (['send'], '{"url": ["http://example.com"]}'),
+    (['send'], 'not json'),
+])
+def test_invalid_requests(sent, capsys, monkeypatch, argv, stdin):
+    code, result, err = run(capsys, argv, stdin, monkeypatch)
+    assert code == 2
+    assert result is None
+    assert err.startswith('Invalid request:')
+    assert sent.calls == []
+
+
+def test_query(sent, capsys):
+    code, result, _ = run(capsys, ['send', 'http://example.com', '-q', '$.items[*].name'])
+    assert code == 0
+    assert result['matches'] == {'$.items[0].name': 'a', '$.items[1].name': 'b'}
+    assert 'body' not in result
+
+
+def test_query_without_match(sent, capsys):
+    code, result, _ = run(capsys, ['send', 'http://example.com', '-q', '$.missing'])
+    assert code == 0
+    assert result['matches'] == {}
+
+
+def test_query_count(sent, capsys):
+    code, result, _ = run(capsys, ['send', 'http://example.com', '-q', '$.items[*] | count'])
+    assert code == 0
+    assert result['matches'] == {'count': 2}
+
+
+@pytest.mark.parametrize('query, body', [
+    ('$.items[', b'{}'),
+    ('$.items', b'<items/>'),
+])
+def test_invalid_query(sent, capsys, query, body):
+    sent.response = make_response(body=body)
+    code, result, err = run(capsys, ['send', 'http://example.com', '-q', query])
+    assert code == 2
+    assert result is None
+    assert err.startswith('Invalid query:')
+
+
+def test_text_body(sent, capsys):
+    sent.response = make_response(body=b'hello', content_type='text/plain')
+    _, result, _ = run(capsys, ['send', 'http://example.com'])
+    assert result['body_type'] == 'text'
+    assert result['body'] == 'hello'
+
+
+def test_transport_error(sent, capsys):
+    sent.response = make_response(status=500, body=b'refused')
+    sent.response.error = requests.ConnectionError('refused')
+    code, result, _ = run(capsys, ['send', 'http://example.com'])
+    assert code == 2
+    assert result == {'method': 'GET', 'url': 'http://example.com', 'error': 'refused'}
+
+
+def test_fail_on_error_status(sent, capsys):
+    sent.response = make_response(status=404)
+    assert run(capsys, ['send', 'http://example.com'])[0] == 0
+    assert run(capsys, ['send', 'http://example.com', '--fail'])[0] == 1
+    sent.response = make_response(status=200)
+    assert run(capsys, ['send', 'http://example.com', '--fail'])[0] == 0
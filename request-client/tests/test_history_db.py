@@ -0,0 +1,57 @@
+import sqlite3
+
+from database.history_db import HistoryDatabase
+from database.retention import RetentionPolicy, RetentionWorker
+
+
+def add_entries(db, count):
+    for index in range(count):
+        db.add_entry('GET', f'http://example.com/{index}', '{}', '', 200, 'x' * 100)
+
+
+def test_new_database_uses_incremental_vacuum(tmp_path):
+    db = HistoryDatabase(str(tmp_path / 'history.db'))
+    try:
+        assert db.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert db.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    finally:
+        db.close()
+
+
+def test_existing_database_is_left_to_retention(tmp_path):
+    path = str(tmp_path / 'history.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE other (x)')
+    conn.commit()
+    conn.close()
+    db = HistoryDatabase(path)
+    try:
+        assert db.conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+    finally:
+        db.close()
+
+
+def test_retention_deletes_oldest_entries():
+    db = HistoryDatabase(':memory:')
+    add_entries(db, 10)
+    worker = RetentionWorker(None, RetentionPolicy(max_entries=4), batch_size=3, pause=0)
+    assert worker.run_once(db.conn) == 6
+    urls = [row[0] for row in db.conn.execute('SELECT url FROM history ORDER BY id')]
+    assert urls == [f'http://example.com/{index}' for index in range(6, 10)]
+
+
+def test_retention_stops_when_entries_vanish():
+    db = HistoryDatabase(':memory:')
+    add_entries(db, 5)
+
+    class Policy(RetentionPolicy):
+        # Overcounts, as if another connection deleted entries after counting
+        def excess_entries(self, conn):
+            self.passes += 1
+            return 100 if self.passes == 1 else 0
+
+    policy = Policy()
+    policy.passes = 0
+    worker = RetentionWorker(None, policy, batch_size=2, pause=0)
+    assert worker.run_once(db.conn) == 5
+    assert db.conn.execute('SELECT COUNT(*) FROM history').fetchone()[0] == 0
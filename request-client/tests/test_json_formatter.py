@@ -0,0 +1,115 @@
+import io
+import json
+
+import pytest
+
+from utils.json_formatter import format_json, format_json_stream, is_valid_json
+
+DOCUMENTS = [
+    {},
+    [],
+    0,
+    -12.5e-3,
+    "plain",
+    None,
+    {"a": [1, 2.5, -3e10, {"b": None, "c": True, "d": False}], "e": {}, "f": [], "g": [[[]]]},
+    {"escapes": "quote \" backslash \\ slash / \b\f\n\r\t \u00e9 \u2603 \U0001F600"},
+    [{"id": i, "name": f"item {i}", "tags": ["x"] * (i % 3)} for i in range(50)],
+    {"z": 1, "a": {"y": 2, "b": [3, {"x": 4, "c": 5}]}},
+]
+
+
+def reindent(text, **options):
+    output = io.StringIO()
+    format_json_stream(text, output, **options)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('document', DOCUMENTS)
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, 1024 * 1024])
+def test_reindent_matches_json_dumps(document, chunk_size):
+    # Strings are copied as written, so escaped input stays escaped
+    for ensure_ascii in (True, False):
+        expected = json.dumps(document, indent=4, ensure_ascii=ensure_ascii)
+        for layout in ({'separators': (',', ':')}, {}, {'indent': '\t'}):
+            source = json.dumps(document, ensure_ascii=ensure_ascii, **layout)
+            assert reindent(source, chunk_size=chunk_size) == expected
+
+
+@pytest.mark.parametrize('document', DOCUMENTS)
+@pytest.mark.parametrize('chunk_size', [1, 5, 1024 * 1024])
+def test_sorted_reindent_matches_json_dumps(document, chunk_size):
+    source = json.dumps(document)
+    expected = json.dumps(document, indent=4, sort_keys=True)
+    assert reindent(source, chunk_size=chunk_size, sort_keys_threshold=1024 * 1024) == expected
+
+
+def test_large_objects_keep_their_key_order():
+    document = {"b": "x" * 100, "a": {"d": 1, "c": 2}}
+    output = reindent(json.dumps(document), sort_keys_threshold=50)
+    assert output == json.dumps({"b": "x" * 100, "a": {"c": 2, "d": 1}}, indent=4)
+
+
+def test_long_strings_are_copied_through_in_pieces():
+    document = ["\\u00e9\"ab" * 5000, {"k": "\u00e9" * 3000}]
+    source = json.dumps(document)
+    for chunk_size in (3, 8, 100):
+        assert reindent(source, chunk_size=chunk_size) == json.dumps(document, indent=4)
+
+
+def test_reads_bytes_and_files():
+    source = json.dumps({"a": ["\u00e9", 1]}, ensure_ascii=False).encode('utf-8')
+    expected = json.dumps({"a": ["\u00e9", 1]}, indent=4, ensure_ascii=False)
+    assert reindent(source, chunk_size=3) == expected
+    assert reindent(io.BytesIO(b'\xef\xbb\xbf' + source), chunk_size=3) == expected
+
+
+def test_returns_characters_written():
+    output = io.StringIO()
+    assert format_json_stream('[1, 2]', output) == len(output.getvalue())
+
+
+@pytest.mark.parametrize('source', [
+    '',
+    '   ',
+    '{"a" 1}',
+    '{"a": 1',
+    '{"a": 1,}',
+    '{1: 2}',
+    '{"a": 1 "b": 2}',
+    '[1,]',
+    '[1 2]',
+    '[1]]',
+    '[1] 2',
+    '[-]',
+    'tru',
+    'nul',
+    '01',
+    '1.',
+    '"abc',
+    '"\\x"',
+    '"\\u12"',
+    '"\\u12G4"',
+    '"tab\tinside"',
+    '["line\nbreak"]',
+    '[1,\x01 2]',
+])
+@pytest.mark.parametrize('chunk_size', [1, 4, 1024 * 1024])
+def test_rejects_invalid_json(source, chunk_size):
+    assert not is_valid_json(source)
+    with pytest.raises(ValueError):
+        reindent(source, chunk_size=chunk_size)
+    with pytest.raises(ValueError):
+        reindent(source, chunk_size=chunk_size, sort_keys_threshold=1024)
+
+
+def test_format_json_returns_invalid_input_unchanged():
+    assert format_json('{"a": }') == '{"a": }'
+    assert format_json('{"b": 1, "a": 2}') == json.dumps({"a": 2, "b": 1}, indent=4)
+
+
+@pytest.mark.parametrize('chunk_size', [3, 5, 8, 13])
+def test_rejects_bad_escapes_in_long_strings(chunk_size):
+    for source in ('"' + 'a' * 50 + '\\x' + 'b' * 50 + '"', '"' + 'a' * 50 + '\\u12"'):
+        with pytest.raises(ValueError):
+            reindent(source, chunk_size=chunk_size)
@@ -0,0 +1,140 @@
+import pytest
+
+from core.json_query import compile_query, format_path
+
+STORE = {
+    'store': {
+        'book': [
+            {'title': 'Sayings', 'author': 'Rees', 'price': 8.95, 'tags': ['quotes']},
+            {'title': 'Sword', 'author': 'Waugh', 'price': 12.99, 'isbn': '0-553'},
+            {'title': 'Moby Dick', 'author': 'Melville', 'price': 8.99, 'isbn': '0-395'},
+            {'title': 'The Lord', 'author': 'Tolkien', 'price': 22.99, 'in stock': False},
+        ],
+        'bicycle': {'color': 'red', 'price': 19.95},
+    },
+    "it's": 1,
+    'say "hi"': 2,
+    'café': 3,
+    'back\\slash': 4,
+}
+
+
+def query(expression, data=STORE):
+    return compile_query(expression).values(data)
+
+
+def paths(expression, data=STORE):
+    return [format_path(path) for path, _ in compile_query(expression).run(data)]
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('$', [STORE]),
+    ('$.store.bicycle.color', ['red']),
+    ("$['store']['bicycle']['color']", ['red']),
+    ('$["store"].bicycle["color"]', ['red']),
+    ('$.store.book[0].author', ['Rees']),
+    ('$.store.book[-1].author', ['Tolkien']),
+    ('$.store.book[0,2].author', ['Rees', 'Melville']),
+    ('$.store.book[1:3].author', ['Waugh', 'Melville']),
+    ('$.store.book[::2].author', ['Rees', 'Melville']),
+    ('$.store.book[::-1].author', ['Tolkien', 'Melville', 'Waugh', 'Rees']),
+    ('$.store.book[*].author', ['Rees', 'Waugh', 'Melville', 'Tolkien']),
+    ('.store.book[].price', [8.95, 12.99, 8.99, 22.99]),
+    ('$.store.bicycle.*', ['red', 19.95]),
+    ('$..color', ['red']),
+    ('$.store.book[?(@.price < 10)].title', ['Sayings', 'Moby Dick']),
+    ('$.store.book[?(@.isbn)].title', ['Sword', 'Moby Dick']),
+    ('$.store.book[?(!@.isbn)].title', ['Sayings', 'The Lord']),
+    ("$.store.book[?(@.author == 'Waugh' || @.price > 20)].title", ['Sword', 'The Lord']),
+    ('$.store.book[?(@.price > 8.96 && (@.isbn == "0-395" || @.price > 20))].title', ['Moby Dick', 'The Lord']),
+    ("$.store.book[?(@['in stock'] == false)].title", ['The Lord']),
+    ('$.store.book[?(@.tags[0] == "quotes")].title', ['Sayings']),
+    ('$.store.book[?(@.price == "8.95")].title', []),
+    ('$.missing', []),
+    ('$.store.book[10]', []),
+    ('$.store.book[*].title | first', ['Sayings']),
+    ('$.store.book[*].title | limit(2)', ['Sayings', 'Sword']),
+    ('$.store.book[*].title | limit(0)', []),
+    ('$.store.book[*] | count', [4]),
+    ('$..price | count', [5]),
+])
+def test_results(expression, expected):
+    assert query(expression) == expected
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ("$['it\\'s']", [1]),
+    ('$["it\'s"]', [1]),
+    ('$[\'say "hi"\']', [2]),
+    ('$["say \\"hi\\""]', [2]),
+    ("$['caf\\u00e9']", [3]),
+    ('$["café"]', [3]),
+    ("$['back\\\\slash']", [4]),
+    ("$['\\/']", []),
+])
+def test_strings_use_json_escapes(expression, expected):
+    assert query(expression) == expected
+
+
+def test_paths_round_trip():
+    for path in paths('$..*'):
+        assert query(path), path
+    assert paths('$.store.book[3]["in stock"]') == ['$.store.book[3]["in stock"]']
+    assert paths("$['it\\'s']") == ['$["it\'s"]']
+
+
+def test_first_stops_walking():
+    visited = []
+
+    def items():
+        for index in range(1000):
+            visited.append(index)
+            yield index
+
+    class Lazy(list):
+        def __iter__(self):
+            return items()
+
+    assert compile_query('$[*] | first').values(Lazy([0])) == [0]
+    assert len(visited) == 1
+
+
+def test_cancelled_run_stops():
+    data = list(range(100000))
+    assert list(compile_query('$[*]').run(data, cancelled=lambda: True)) == []
+
+
+@pytest.mark.parametrize('expression', [
+    '$.',
+    '$..',
+    '$[',
+    '$[0',
+    '$[]]',
+    '$.store.',
+    '$.store book',
+    '$[1.5]',
+    '$[::0]',
+    '$[?(@.price <)]',
+    '$[?(@.price < 10]',
+    '$[?(@.price = 10)]',
+    '$[?(price < 10)]',
+    '$ | sort',
+    '$ | limit(x)',
+    '$ | limit(-1)',
+    '$ #',
+    "$['unterminated]",
+    "$['\\u']",
+    "$['\\u12']",
+    "$['\\x41']",
+    "$[?(@.a == '\\x4')]",
+    '$["\\q"]',
+    '$["tab\there"]',
+    '$' + '[?(' + '(' * 5000 + '@.a' + ')' * 5000 + ')]',
+])
+def test_invalid_queries_raise_value_error(expression):
+    with pytest.raises(ValueError):
+        compile_query(expression)
+
+
+def test_compiled_queries_are_cached():
+    assert compile_query('$.store.book[0]') is compile_query('$.store.book[0]')
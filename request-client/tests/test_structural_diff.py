@@ -0,0 +1,85 @@
+import xml.etree.ElementTree as ET
+
+from core.structural_diff import ADDED, CHANGED, REMOVED, diff_documents, tree_hashes, xml_to_tree
+
+
+def changes(old, new, **options):
+    return [(change.kind, change.path, change.old, change.new)
+            for change in diff_documents(old, new, **options).changes]
+
+
+def test_equal_documents_have_no_changes():
+    document = {"a": [1, {"b": None}], "c": "x"}
+    assert changes(document, {"c": "x", "a": [1, {"b": None}]}) == []
+    assert changes([], []) == []
+    assert changes(1, 1) == []
+
+
+def test_digests_ignore_key_order_but_not_types():
+    first, second = {"a": 1, "b": [2]}, {"b": [2], "a": 1}
+    assert tree_hashes(first)[id(first)] == tree_hashes(second)[id(second)]
+    for other in ({"a": True, "b": [2]}, {"a": 1.0, "b": [2]}, {"a": "1", "b": [2]}, [1, [2]]):
+        assert tree_hashes(first)[id(first)] != tree_hashes(other)[id(other)]
+
+
+def test_scalar_and_type_changes():
+    assert changes({"a": 1, "b": "x"}, {"a": 2, "b": "x"}) == [(CHANGED, ("a",), 1, 2)]
+    assert changes({"a": 1}, {"a": True}) == [(CHANGED, ("a",), 1, True)]
+    assert changes({"a": [1]}, {"a": {"0": 1}}) == [(CHANGED, ("a",), [1], {"0": 1})]
+    assert changes("x", "y") == [(CHANGED, (), "x", "y")]
+
+
+def test_added_and_removed_keys():
+    assert changes({"a": 1, "b": 2}, {"b": 2, "c": 3}) == [
+        (REMOVED, ("a",), 1, None),
+        (ADDED, ("c",), None, 3),
+    ]
+
+
+def test_insertion_at_front_of_list_is_one_change():
+    old = [{"id": index} for index in range(100)]
+    new = [{"id": -1}] + old
+    assert changes(old, new) == [(ADDED, (0,), None, {"id": -1})]
+    assert changes(new, old) == [(REMOVED, (0,), {"id": -1}, None)]
+
+
+def test_changes_inside_list_items_are_reported_at_their_path():
+    old = {"items": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]}
+    new = {"items": [{"id": 1, "name": "a"}, {"id": 2, "name": "c"}]}
+    assert changes(old, new) == [(CHANGED, ("items", 1, "name"), "b", "c")]
+
+
+def test_long_lists_are_aligned():
+    old = list(range(5000))
+    new = old[:1000] + ["inserted"] + old[1000:4000] + old[4001:]
+    assert changes(old, new) == [(ADDED, (1000,), None, "inserted"), (REMOVED, (4000,), 4000, None)]
+
+
+def test_xml_to_tree():
+    root = ET.fromstring('<r a="1"><item>x</item><item>y</item><other/>tail</r>')
+    assert xml_to_tree(root) == {
+        'r': {'@a': '1', 'item': {'#text': 'x'}, 'item[2]': {'#text': 'y'}, 'other': {}, 'other#tail': 'tail'}
+    }
+
+
+def test_xml_documents():
+    old = ET.fromstring('<r a="1"><item>x</item><item>y</item></r>')
+    new = ET.fromstring('<r a="2"><item>x</item><item>z</item><item>w</item></r>')
+    assert sorted(changes(old, new), key=repr) == [
+        (ADDED, ('r', 'item[3]'), None, {'#text': 'w'}),
+        (CHANGED, ('r', '@a'), '1', '2'),
+        (CHANGED, ('r', 'item[2]', '#text'), 'y', 'z'),
+    ]
+
+
+def test_max_changes_truncates():
+    diff = diff_documents({str(index): index for index in range(10)}, {}, max_changes=3)
+    assert len(diff.changes) == 3
+    assert diff.truncated
+    assert not diff_documents([1], [2]).truncated
+
+
+def test_cancelled_diff_returns_none():
+    old = [{"id": index} for index in range(10000)]
+    assert diff_documents(old, old[1:], cancelled=lambda: True) is None
+    assert tree_hashes(old, cancelled=lambda: True) is None
@@ -0,0 +1,165 @@
+import json
+import sqlite3
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView, QHeaderView
+from PyQt5.QtGui import QColor, QFontDatabase
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from core.diff_runner import DiffRunner
+from core.json_query import format_path
+from core.structural_diff import ADDED, REMOVED, CHANGED
+
+COLUMNS = ["Path", "Before", "After"]
+
+# Values longer than this are cut short in the table; tooltips show more
+CELL_CHARS = 200
+TOOLTIP_CHARS = 4000
+
+ADDED_COLOR = QColor("#C8E6C9")
+REMOVED_COLOR = QColor("#FFCDD2")
+CHANGED_COLOR = QColor("#FFF9C4")
+
+
+class DiffTableModel(QAbstractTableModel):
+    """Table of a StructuralDiff's changes, old value beside new value.
+
+    Values are only formatted when a view asks for a visible cell, so a
+    diff of any number of changes is shown at once.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.changes = []
+
+    def set_changes(self, changes):
+        self.beginResetModel()
+        self.changes = changes
+        self.endResetModel()
+
+    def clear(self):
+        self.set_changes([])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.changes)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        change = self.changes[index.row()]
+        column = index.column()
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            limit = CELL_CHARS if role == Qt.DisplayRole else TOOLTIP_CHARS
+            if column == 0:
+                return format_path(change.path)
+            if column == 1:
+                return None if change.kind == ADDED else format_value(change.old, limit)
+            return None if change.kind == REMOVED else format_value(change.new, limit)
+        if role == Qt.BackgroundRole:
+            if change.kind == CHANGED and column > 0:
+                return CHANGED_COLOR
+            if change.kind == REMOVED and column == 1:
+                return REMOVED_COLOR
+            if change.kind == ADDED and column == 2:
+                return ADDED_COLOR
+        return None
+
+
+def format_value(value, limit):
+    """Compact JSON for value, cut to limit characters."""
+    text = json.dumps(value, ensure_ascii=False, separators=(', ', ': '))
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+class DiffView(QWidget):
+    """Side-by-side structural diff of two history entries' response bodies."""
+
+    def __init__(self, history_db):
+        super().__init__()
+        self.history_db = history_db
+        self.runner = DiffRunner(self)
+        self.runner.finished.connect(self.show_diff)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        labels = QHBoxLayout()
+        self.old_label = QLabel("")
+        self.new_label = QLabel("")
+        labels.addWidget(self.old_label)
+        labels.addWidget(self.new_label)
+        layout.addLayout(labels)
+        self.summary_label = QLabel("Select two entries and press Compare")
+        layout.addWidget(self.summary_label)
+
+        self.model = DiffTableModel()
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.table.verticalHeader().setVisible(False)
+        self.table.setWordWrap(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Interactive)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.setLayout(layout)
+
+    def compare(self, old_entry, new_entry):
+        """Diff the response bodies of two entries (dicts from HistoryDatabase.get_entry)."""
+        self.model.clear()
+        self.old_label.setText(f"Before: #{old_entry['id']} {old_entry['timestamp']}")
+        self.new_label.setText(f"After: #{new_entry['id']} {new_entry['timestamp']}")
+        self.summary_label.setText("Comparing...")
+        history_db = self.history_db
+        if history_db.db_path == ':memory:':
+            # Only this thread can read a :memory: database
+            try:
+                bodies = [history_db.get_response_body(entry['id']) for entry in (old_entry, new_entry)]
+            except sqlite3.Error as e:
+                self.runner.cancel()
+                self.summary_label.setText(f"Could not read the responses: {e}")
+                return
+            self.runner.run(lambda: bodies[0], lambda: bodies[1])
+        else:
+            self.runner.run(lambda: history_db.get_response_body(old_entry['id']),
+                            lambda: history_db.get_response_body(new_entry['id']))
+
+    def show_diff(self, diff, error):
+        if error:
+            self.summary_label.setText(error)
+            return
+        changes = diff.changes
+        if not changes:
+            self.summary_label.setText("No differences")
+            return
+        counts = {kind: 0 for kind in (CHANGED, ADDED, REMOVED)}
+        for change in changes:
+            counts[change.kind] += 1
+        summary = ", ".join(f"{count} {kind}" for kind, count in counts.items() if count)
+        if diff.truncated:
+            summary += f" (stopped after the first {len(changes)} differences)"
+        self.summary_label.setText(summary)
+        self.model.set_changes(changes)
+        self.table.resizeColumnToContents(0)
+
+    def clear(self):
+        self.runner.cancel()
+        self.model.clear()
+        self.old_label.setText("")
+        self.new_label.setText("")
+        self.summary_label.setText("Select two entries and press Compare")
+
+    def shutdown(self):
+        self.runner.cancel()
+        self.runner.wait()
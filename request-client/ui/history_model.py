@@ -0,0 +1,86 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+COLUMNS = ["Time", "Method", "URL", "Status"]
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """Table model that pages history rows in from the database on demand.
+
+    Only list columns are loaded; views pull further pages through
+    canFetchMore/fetchMore as the user scrolls, so opening a history of
+    millions of entries costs one page. With a search keyword set, rows
+    come from the full-text search instead.
+    """
+
+    def __init__(self, history_db, page_size=200):
+        super().__init__()
+        self.history_db = history_db
+        self.page_size = page_size
+        self.rows = []
+        self.keyword = None
+        self._cursor = None
+        self._exhausted = False
+
+    def set_search(self, keyword):
+        """Show search results for keyword, or the full history if empty."""
+        self.keyword = keyword or None
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self.rows = []
+        self._cursor = None
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def entry_id(self, row):
+        return self.rows[row][0]
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        self.endRemoveRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            entry_id, method, url, response_code, timestamp = row[:5]
+            return (timestamp, method, url, response_code)[index.column()]
+        if role == Qt.ToolTipRole and len(row) > 5:
+            return row[5]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+
+        if self.keyword:
+            # Search rows carry a highlighted snippet after the list columns
+            page = self.history_db.search_history(self.keyword, limit=self.page_size,
+                                                  offset=len(self.rows))
+            self._exhausted = len(page) < self.page_size
+        else:
+            page, self._cursor = self.history_db.get_entries_page(self.page_size, self._cursor)
+            self._exhausted = self._cursor is None
+
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
@@ -0,0 +1,139 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
+                             QTableView, QPlainTextEdit, QSplitter, QHeaderView,
+                             QAbstractItemView, QTabWidget)
+from PyQt5.QtCore import Qt, pyqtSignal
+
+from .diff_view import DiffView
+from .history_model import HistoryTableModel
+
+
+class HistoryTab(QWidget):
+    # Emitted from the history writer thread; delivered on the GUI thread
+    writes_committed = pyqtSignal()
+
+    def __init__(self, history_db):
+        super().__init__()
+        self.history_db = history_db
+        self.model = HistoryTableModel(history_db)
+        self.writes_committed.connect(self.reload)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        # Search and actions
+        toolbar = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search history (auth*, \"not found\")")
+        self.search_input.returnPressed.connect(self.search)
+        toolbar.addWidget(self.search_input)
+        self.refresh_button = QPushButton("Refresh")
+        self.refresh_button.clicked.connect(self.refresh)
+        toolbar.addWidget(self.refresh_button)
+        self.delete_button = QPushButton("Delete")
+        self.delete_button.clicked.connect(self.delete_selected)
+        toolbar.addWidget(self.delete_button)
+        self.compare_button = QPushButton("Compare")
+        self.compare_button.setToolTip("Diff the responses of the two selected entries")
+        self.compare_button.setEnabled(False)
+        self.compare_button.clicked.connect(self.compare_selected)
+        toolbar.addWidget(self.compare_button)
+        self.clear_button = QPushButton("Clear")
+        self.clear_button.clicked.connect(self.clear_history)
+        toolbar.addWidget(self.clear_button)
+        layout.addLayout(toolbar)
+
+        # Entry list on top, selected entry's details below
+        splitter = QSplitter(Qt.Vertical)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)  # Two rows to compare
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.selectionModel().currentRowChanged.connect(self.show_entry)
+        self.table.selectionModel().selectionChanged.connect(self.update_compare_button)
+        splitter.addWidget(self.table)
+
+        self.detail_tabs = QTabWidget()
+        self.details = QPlainTextEdit()
+        self.details.setReadOnly(True)
+        self.detail_tabs.addTab(self.details, "Details")
+        self.diff_view = DiffView(self.history_db)
+        self.detail_tabs.addTab(self.diff_view, "Compare")
+        splitter.addWidget(self.detail_tabs)
+        layout.addWidget(splitter)
+
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        self.refresh()
+        super().showEvent(event)
+
+    def refresh(self):
+        self.reload()
+        # Writes still queued on the writer show up once they are committed
+        self.history_db.notify_when_written(self.writes_committed.emit)
+
+    def reload(self):
+        self.details.clear()
+        self.model.set_search(self.search_input.text().strip())
+
+    def search(self):
+        self.refresh()
+
+    def show_entry(self, current, previous):
+        # Bodies are only read from the database for the selected row
+        if not current.isValid():
+            self.details.clear()
+            return
+        entry = self.history_db.get_entry(self.model.entry_id(current.row()))
+        if entry is None:
+            self.details.setPlainText("Entry no longer exists")
+            return
+        self.details.setPlainText(
+            f"{entry['method']} {entry['url']}\n"
+            f"{entry['headers'] or ''}\n\n"
+            f"{entry['body'] or ''}\n\n"
+            f"--- Response {entry['response_code']} ---\n"
+            f"{entry['response_body'] or ''}"
+            + self._truncation_note(entry))
+
+    def _truncation_note(self, entry):
+        shown = len((entry['response_body'] or '').encode('utf-8'))
+        size = entry['response_size'] or 0
+        return f"\n... ({size} bytes in total)" if size > shown else ""
+
+    def selected_entry_ids(self):
+        return [self.model.entry_id(index.row()) for index in self.table.selectionModel().selectedRows()]
+
+    def update_compare_button(self):
+        self.compare_button.setEnabled(len(self.selected_entry_ids()) == 2)
+
+    def compare_selected(self):
+        entry_ids = self.selected_entry_ids()
+        if len(entry_ids) != 2:
+            return
+        # Listed rows have been committed, so no flush is needed
+        entries = [self.history_db.get_entry(entry_id, body_limit=0) for entry_id in entry_ids]
+        if None in entries:
+            return
+        # The older response is shown on the left
+        entries.sort(key=lambda entry: (entry['timestamp'], entry['id']))
+        self.diff_view.compare(*entries)
+        self.detail_tabs.setCurrentWidget(self.diff_view)
+
+    def shutdown(self):
+        self.diff_view.shutdown()
+
+    def delete_selected(self):
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return
+        self.history_db.delete_entry(self.model.entry_id(index.row()))
+        self.model.remove_row(index.row())
+
+    def clear_history(self):
+        self.history_db.clear_history()
+        self.diff_view.clear()
+        self.refresh()
@@ -0,0 +1,150 @@
+from itertools import islice
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
+
+COLUMNS = ["Key", "Value"]
+
+# Most children a node shows; larger containers are split into ranges
+PAGE_SIZE = 1000
+
+# Longest string shown in the Value column
+VALUE_PREVIEW_CHARS = 1000
+
+
+class JsonNode:
+    """One row of the tree: a member of a container, or a range of members.
+
+    Nodes are created when their parent is expanded, one page at a time,
+    so only the parts of a document a user has opened exist as nodes.
+    """
+
+    __slots__ = ('parent', 'row', 'key', 'value', 'start', 'stop', '_children')
+
+    def __init__(self, parent, row, key, value, start=None, stop=None):
+        self.parent = parent
+        self.row = row
+        self.key = key
+        self.value = value
+        # Set for range nodes, which stand for value[start:stop]
+        self.start = start
+        self.stop = stop
+        self._children = None
+
+    def is_range(self):
+        return self.start is not None
+
+    def has_children(self):
+        return isinstance(self.value, (dict, list)) and (self.is_range() or len(self.value) > 0)
+
+    def children(self):
+        if self._children is None:
+            self._children = self._make_children()
+        return self._children
+
+    def _make_children(self):
+        value = self.value
+        if not isinstance(value, (dict, list)):
+            return []
+        start, stop = (self.start, self.stop) if self.is_range() else (0, len(value))
+
+        count = stop - start
+        if count > PAGE_SIZE:
+            # Nest ranges so that no node has more than PAGE_SIZE children
+            step = PAGE_SIZE
+            while count > step * PAGE_SIZE:
+                step *= PAGE_SIZE
+            return [JsonNode(self, row, None, value, low, min(low + step, stop))
+                    for row, low in enumerate(range(start, stop, step))]
+
+        if isinstance(value, list):
+            items = enumerate(value[start:stop], start)
+        else:
+            items = islice(value.items(), start, stop)
+        return [JsonNode(self, row, key, child) for row, (key, child) in enumerate(items)]
+
+    def display_key(self):
+        if self.is_range():
+            return f"[{self.start} … {self.stop - 1}]"
+        return str(self.key)
+
+    def display_value(self):
+        value = self.value
+        if self.is_range():
+            return ""
+        if isinstance(value, dict):
+            return f"{{{len(value)} keys}}"
+        if isinstance(value, list):
+            return f"[{len(value)} items]"
+        if value is None:
+            return "null"
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        text = str(value)
+        return text if len(text) <= VALUE_PREVIEW_CHARS else text[:VALUE_PREVIEW_CHARS] + "…"
+
+
+class JsonTreeModel(QAbstractItemModel):
+    """Tree model over a parsed JSON document that builds rows on demand.
+
+    Children are only materialized when a view asks for them, which a
+    QTreeView does when a node is expanded, and containers with more than
+    PAGE_SIZE members are shown as ranges of PAGE_SIZE. Showing a document
+    therefore costs the same whatever its size; only the expanded parts
+    use memory beyond the parsed document itself.
+    """
+
+    def __init__(self, data=None):
+        super().__init__()
+        self.root = JsonNode(None, 0, None, data)
+
+    def set_document(self, data):
+        """Show data, a parsed JSON value, replacing the current document."""
+        self.beginResetModel()
+        self.root = JsonNode(None, 0, None, data)
+        self.endResetModel()
+
+    def clear(self):
+        self.set_document(None)
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.node(parent).children()[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children())
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        # Answered without materializing, so collapsed nodes stay unbuilt
+        return parent.column() <= 0 and self.node(parent).has_children()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.display_key() if index.column() == 0 else node.display_value()
+        if role == Qt.ToolTipRole and index.column() == 1 and isinstance(node.value, str) and not node.is_range():
+            return node.value[:10 * VALUE_PREVIEW_CHARS]
+        return None
@@ -0,0 +1,119 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox,
+                             QPushButton, QTableWidget, QTableWidgetItem)
+from PyQt5.QtCore import QTimer
+
+from core.load_generator import LoadGenerator
+
+
+PERCENTILE_ROWS = [
+    ("p50", 'p50_ms'),
+    ("p90", 'p90_ms'),
+    ("p99", 'p99_ms'),
+    ("p99.9", 'p99.9_ms'),
+    ("max", 'max_ms'),
+]
+
+
+class LoadTab(QWidget):
+    def __init__(self, http_client, request_provider):
+        super().__init__()
+        self.http_client = http_client
+        self.request_provider = request_provider
+        self.generator = None
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(500)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        # Load settings
+        settings_layout = QHBoxLayout()
+        settings_layout.addWidget(QLabel("Rate (req/s):"))
+        self.rate_input = QSpinBox()
+        self.rate_input.setRange(1, 100000)
+        self.rate_input.setValue(10)
+        settings_layout.addWidget(self.rate_input)
+
+        settings_layout.addWidget(QLabel("Virtual users:"))
+        self.users_input = QSpinBox()
+        self.users_input.setRange(1, 1000)
+        self.users_input.setValue(10)
+        settings_layout.addWidget(self.users_input)
+
+        settings_layout.addWidget(QLabel("Duration (s):"))
+        self.duration_input = QSpinBox()
+        self.duration_input.setRange(1, 86400)
+        self.duration_input.setValue(30)
+        settings_layout.addWidget(self.duration_input)
+        settings_layout.addStretch()
+        layout.addLayout(settings_layout)
+
+        # Start and stop buttons
+        button_layout = QHBoxLayout()
+        self.start_button = QPushButton("Start Load Test")
+        self.start_button.clicked.connect(self.start_load)
+        button_layout.addWidget(self.start_button)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_load)
+        button_layout.addWidget(self.stop_button)
+        layout.addLayout(button_layout)
+
+        self.summary_label = QLabel("Uses the URL, method, headers and body from the Request tab.")
+        layout.addWidget(self.summary_label)
+
+        # Latency percentiles
+        self.latency_table = QTableWidget(len(PERCENTILE_ROWS), 2)
+        self.latency_table.setHorizontalHeaderLabels(["Response time (ms)", "Service time (ms)"])
+        self.latency_table.setVerticalHeaderLabels([label for label, _ in PERCENTILE_ROWS])
+        layout.addWidget(self.latency_table)
+
+        self.setLayout(layout)
+
+    def start_load(self):
+        method, url, headers, body = self.request_provider()
+        if not url:
+            self.summary_label.setText("Enter a URL in the Request tab first.")
+            return
+
+        self.generator = LoadGenerator(self.http_client, method, url, headers, body,
+                                       rate=self.rate_input.value(),
+                                       virtual_users=self.users_input.value(),
+                                       duration=self.duration_input.value())
+        self.generator.start()
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.refresh_timer.start()
+
+    def stop_load(self):
+        if self.generator is not None:
+            # Requests in flight finish in the background; refresh() notices
+            self.generator.stop()
+            self.stop_button.setEnabled(False)
+        self.refresh()
+
+    def refresh(self):
+        if self.generator is None:
+            return
+
+        stats = self.generator.snapshot()
+        self.summary_label.setText(
+            f"Elapsed: {stats['elapsed_s']:.1f} s   Completed: {stats['completed']}   "
+            f"Errors: {stats['errors']} ({stats['failed']} without a response)   Achieved: {stats['achieved_rps']:.1f} req/s   "
+            f"Max schedule lag: {stats['max_lag_ms']:.1f} ms")
+
+        for row, (_, key) in enumerate(PERCENTILE_ROWS):
+            for column, histogram in enumerate(('response_time', 'service_time')):
+                value = stats[histogram][key]
+                self.latency_table.setItem(row, column, QTableWidgetItem(f"{value:.2f}"))
+
+        if not self.generator.is_running():
+            self.refresh_timer.stop()
+            self.start_button.setEnabled(True)
+            self.stop_button.setEnabled(False)
+
+    def shutdown(self):
+        if self.generator is not None:
+            self.generator.stop()
@@ -1,14 +1,28 @@
-from PyQt5.QtWidgets import QMainWindow, QTabWidget, QVBoxLayout, QWidget, QMenuBar, QAction
+from PyQt5.QtWidgets import (QMainWindow, QTabWidget, QVBoxLayout, QWidget, QMenuBar, QAction,
+                             QMessageBox)
 from PyQt5.QtCore import Qt
 from .request_tab import RequestTab
 from .response_tab import ResponseTab
+from .load_tab import LoadTab
+from .history_tab import HistoryTab
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, http_client, history_db):
+    def __init__(self, http_client, request_handler, response_handler, history_db,
+                 format_json=None, is_valid_json=None, highlight_json=None,
+                 format_xml=None, is_valid_xml=None, highlight_xml=None, document_cache=None):
         super().__init__()
         self.http_client = http_client
+        self.request_handler = request_handler
+        self.response_handler = response_handler
         self.history_db = history_db
+        self.format_json = format_json
+        self.is_valid_json = is_valid_json
+        self.highlight_json = highlight_json
+        self.format_xml = format_xml
+        self.is_valid_xml = is_valid_xml
+        self.highlight_xml = highlight_xml
+        self.document_cache = document_cache
         self.init_ui()
 
     def init_ui(self):
@@ -25,14 +39,21 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.tab_widget)
 
         # Create and add tabs
-        self.request_tab = RequestTab(self.http_client, self.history_db)
-        self.response_tab = ResponseTab()
+        self.request_tab = RequestTab(self.request_handler, self.history_db)
+        self.response_tab = ResponseTab(self.document_cache)
+        self.load_tab = LoadTab(self.http_client, self.request_tab.current_request)
+        self.history_tab = HistoryTab(self.history_db)
 
         self.tab_widget.addTab(self.request_tab, "Request")
         self.tab_widget.addTab(self.response_tab, "Response")
+        self.tab_widget.addTab(self.load_tab, "Load Test")
+        self.tab_widget.addTab(self.history_tab, "History")
 
         # Connect signals
         self.request_tab.request_sent.connect(self.handle_response)
+        self.request_handler.request_error.connect(self.show_error)
+        self.request_handler.request_cancelled.connect(
+            lambda: self.statusBar().showMessage("Request cancelled", 3000))
 
         # Create menu bar
         self.create_menu_bar()
@@ -55,6 +76,19 @@ class MainWindow(QMainWindow):
         clear_action.triggered.connect(self.clear_all)
         edit_menu.addAction(clear_action)
 
+        # Connection menu
+        connection_menu = menubar.addMenu('Connection')
+
+        self.http2_action = QAction('Use HTTP/2', self)
+        self.http2_action.setCheckable(True)
+        self.http2_action.setChecked(self.http_client.http_version == 'HTTP/2')
+        self.http2_action.toggled.connect(self.set_http2)
+        connection_menu.addAction(self.http2_action)
+
+        streams_action = QAction('HTTP/2 Streams...', self)
+        streams_action.triggered.connect(self.show_stream_stats)
+        connection_menu.addAction(streams_action)
+
         # Help menu
         help_menu = menubar.addMenu('Help')
 
@@ -66,6 +100,38 @@ class MainWindow(QMainWindow):
         self.response_tab.display_response(response)
         self.tab_widget.setCurrentIndex(1)  # Switch to response tab
 
+    def show_error(self, message):
+        self.statusBar().showMessage(f"Request failed: {message}", 5000)
+
+    def set_http2(self, enabled):
+        try:
+            self.http_client.set_http_version('HTTP/2' if enabled else 'HTTP/1.1')
+        except RuntimeError as e:  # httpx is not installed
+            self.http2_action.blockSignals(True)
+            self.http2_action.setChecked(False)
+            self.http2_action.blockSignals(False)
+            self.statusBar().showMessage(str(e), 5000)
+
+    def show_stream_stats(self):
+        stats = self.http_client.stream_stats()
+        lines = []
+        for origin, values in stats.get('origins', {}).items():
+            lines.append(f"{origin} ({values['http_version'] or 'pending'}): "
+                         f"{values['requests']} requests, {values['in_flight']} in flight, "
+                         f"up to {values['max_concurrent_streams']} concurrent streams")
+        if stats:
+            lines.append(f"{len(stats['connections'])} open connections")
+        QMessageBox.information(self, "HTTP/2 Streams",
+                                "\n".join(lines) or "No HTTP/2 requests have been sent.")
+
+    def closeEvent(self, event):
+        self.load_tab.shutdown()
+        self.response_tab.shutdown()
+        self.history_tab.shutdown()
+        self.request_handler.close()
+        self.history_db.close()  # Commits any writes still queued
+        super().closeEvent(event)
+
     def clear_all(self):
         self.request_tab.clear_fields()
         self.response_tab.clear_response()
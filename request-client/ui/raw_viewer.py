@@ -0,0 +1,353 @@
+import re
+
+from PyQt5.QtWidgets import (QAbstractScrollArea, QApplication, QWidget, QVBoxLayout, QHBoxLayout,
+                             QLabel, QLineEdit, QPushButton, QSpinBox)
+from PyQt5.QtGui import QPainter, QColor, QFontDatabase, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from core.line_index import LineIndex
+
+# Bytes searched per timer tick, so a search never blocks the UI for long
+SEARCH_SLICE_BYTES = 8 * 1024 * 1024
+
+TAB_SIZE = 4
+
+MATCH_COLOR = QColor("#FFEB3B")
+CURRENT_LINE_COLOR = QColor("#E3F2FD")
+GUTTER_COLOR = QColor("#9E9E9E")
+
+
+class LineViewer(QAbstractScrollArea):
+    """Read-only text view that paints lines straight from a bytes buffer.
+
+    Nothing is copied into a Qt document: the buffer (usually the mmap of
+    a spooled ResponseBody) is indexed by a LineIndex on a background
+    thread and only the lines on screen are decoded, so scrolling, go to
+    line and search cost the same whatever the size of the body.
+    """
+
+    # Lines indexed so far and whether indexing has finished
+    index_progress = pyqtSignal(int, bool)
+    # Whether a search found a match
+    search_finished = pyqtSignal(bool)
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = b''
+        self.encoding = 'utf-8'
+        self.index = None
+        self.current_line = None
+        self.pending_line = None
+        self.match = None  # (start, end) byte offsets of the highlighted match
+        self.widest_line = 0
+        self._search = None
+        self._pending_match = None
+
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(100)
+        self.index_timer.timeout.connect(self.refresh_index)
+        self.search_timer = QTimer(self)
+        self.search_timer.setInterval(0)
+        self.search_timer.timeout.connect(self._search_step)
+
+    def set_content(self, buffer, encoding=None):
+        """Show buffer, any bytes-like object, replacing the current content."""
+        self.clear()
+        self.buffer = buffer
+        self.encoding = encoding or 'utf-8'
+        self.index = LineIndex(buffer).start()
+        self.index_timer.start()
+        self.refresh_index()
+
+    def clear(self):
+        if self.index is not None:
+            self.index.cancel()
+        self.index_timer.stop()
+        self.search_timer.stop()
+        self.buffer = b''
+        self.index = None
+        self.current_line = self.pending_line = self.match = None
+        self._search = self._pending_match = None
+        self.widest_line = 0
+        self.update_scroll_bars()
+        self.viewport().update()
+
+    def line_count(self):
+        return self.index.line_count if self.index is not None else 0
+
+    def refresh_index(self):
+        """Pick up the lines indexed since the last call."""
+        if self.index is None:
+            return
+        done = self.index.done
+        self.update_scroll_bars()
+        if self.pending_line is not None and (self.pending_line < self.index.line_count or done):
+            self.go_to_line(self.pending_line)
+        if self._pending_match is not None:
+            self._show_match(*self._pending_match)
+        if done:
+            self.index_timer.stop()
+        self.index_progress.emit(self.index.line_count, done)
+        self.viewport().update()
+
+    # Geometry
+
+    def line_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def char_width(self):
+        return self.fontMetrics().horizontalAdvance('x')
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height())
+
+    def gutter_width(self):
+        return (len(str(max(1, self.line_count()))) + 2) * self.char_width()
+
+    def update_scroll_bars(self):
+        visible = self.visible_lines()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.line_count() - visible))
+        vertical.setPageStep(visible)
+        columns = max(1, (self.viewport().width() - self.gutter_width()) // self.char_width())
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, self.widest_line - columns))
+        horizontal.setPageStep(columns)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_bars()
+
+    # Painting
+
+    def line_text(self, start, end):
+        text = bytes(self.buffer[start:end]).decode(self.encoding, errors='replace')
+        return text.rstrip('\r\n').expandtabs(TAB_SIZE)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        if self.index is None:
+            return
+        height = self.line_height()
+        width = self.char_width()
+        ascent = self.fontMetrics().ascent()
+        gutter = self.gutter_width()
+        left = gutter - self.horizontalScrollBar().value() * width
+        first = self.verticalScrollBar().value()
+        text_color = self.palette().text().color()
+
+        widest = self.widest_line
+        painter.setClipRect(gutter, 0, self.viewport().width() - gutter, self.viewport().height())
+        for line, start, end in self.index.lines(first, self.visible_lines() + 1):
+            top = (line - first) * height
+            text = self.line_text(start, end)
+            widest = max(widest, len(text))
+            if line == self.current_line:
+                painter.fillRect(gutter, top, self.viewport().width() - gutter, height, CURRENT_LINE_COLOR)
+            if self.match is not None and start <= self.match[0] < end:
+                column = len(self.line_text(start, self.match[0]))
+                length = len(self.line_text(start, min(self.match[1], end))) - column
+                painter.fillRect(left + column * width, top, max(1, length) * width, height, MATCH_COLOR)
+            painter.setPen(text_color)
+            painter.drawText(left, top + ascent, text)
+
+        painter.setClipping(False)
+        painter.setPen(GUTTER_COLOR)
+        for row in range(min(self.visible_lines() + 1, self.line_count() - first)):
+            painter.drawText(0, row * height, gutter - width, height,
+                             Qt.AlignRight | Qt.AlignVCenter, str(first + row + 1))
+
+        if widest > self.widest_line:
+            # Only lines that have been painted are measured
+            self.widest_line = widest
+            self.update_scroll_bars()
+
+    # Navigation
+
+    def go_to_line(self, line):
+        """Select line (0-based) and scroll it into view.
+
+        Lines that have not been indexed yet are shown once they are.
+        """
+        if self.index is None:
+            return
+        if line >= self.index.line_count and not self.index.done:
+            self.pending_line = line
+            return
+        self.pending_line = None
+        self.current_line = max(0, min(line, self.index.line_count - 1))
+        self.scroll_to(self.current_line)
+        self.viewport().update()
+
+    def scroll_to(self, line, column=None):
+        vertical = self.verticalScrollBar()
+        if not vertical.value() <= line < vertical.value() + self.visible_lines():
+            vertical.setValue(line - self.visible_lines() // 2)
+        if column is not None:
+            horizontal = self.horizontalScrollBar()
+            if not horizontal.value() <= column < horizontal.value() + horizontal.pageStep():
+                horizontal.setValue(column - horizontal.pageStep() // 4)
+
+    def mousePressEvent(self, event):
+        if self.index is None or event.button() != Qt.LeftButton:
+            return super().mousePressEvent(event)
+        line = self.verticalScrollBar().value() + event.pos().y() // self.line_height()
+        if line < self.index.line_count:
+            self.current_line = line
+            self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy) and self.current_line is not None:
+            for _, start, end in self.index.lines(self.current_line, 1):
+                QApplication.clipboard().setText(self.line_text(start, end))
+            return
+        if event.matches(QKeySequence.MoveToStartOfDocument):
+            return self.go_to_line(0)
+        if event.matches(QKeySequence.MoveToEndOfDocument):
+            return self.go_to_line(self.line_count() - 1)
+        super().keyPressEvent(event)
+
+    # Search
+
+    def find(self, text):
+        """Search for the next occurrence of text, ignoring ASCII case.
+
+        The buffer is searched in SEARCH_SLICE_BYTES steps from a timer,
+        starting after the current match (or at the top of the view) and
+        wrapping around once; search_finished reports the outcome.
+        """
+        self.search_timer.stop()
+        if self.index is None or not text:
+            return
+        needle = text.encode(self.encoding, errors='replace')
+        if self.match is not None:
+            origin = self.match[0] + 1
+        else:
+            origin = self.index.offset(min(self.verticalScrollBar().value(), max(0, self.index.line_count - 1)))
+        self._search = {
+            'pattern': re.compile(re.escape(needle), re.IGNORECASE),
+            'overlap': len(needle) - 1,
+            'origin': min(origin, len(self.buffer)),
+            'position': min(origin, len(self.buffer)),
+            'wrapped': False,
+        }
+        self.search_timer.start()
+
+    def cancel_search(self):
+        self.search_timer.stop()
+        self._search = None
+
+    def _search_step(self):
+        search = self._search
+        size = len(self.buffer)
+        stop = search['origin'] if search['wrapped'] else size
+        end = min(stop, search['position'] + SEARCH_SLICE_BYTES)
+        # Matches start before end but may run past it
+        found = search['pattern'].search(self.buffer, search['position'], min(size, end + search['overlap']))
+        if found is not None and found.start() < end:
+            self.cancel_search()
+            self._show_match(found.start(), found.end())
+            self.search_finished.emit(True)
+            return
+        search['position'] = end
+        if end < stop:
+            return
+        if not search['wrapped'] and search['origin'] > 0:
+            search['wrapped'] = True
+            search['position'] = 0
+            return
+        self.cancel_search()
+        self.search_finished.emit(False)
+
+    def _show_match(self, start, end):
+        self.match = (start, end)
+        line = self.index.line_at(start)
+        if line is None:
+            self._pending_match = (start, end)  # Shown once indexing reaches it
+            return
+        self._pending_match = None
+        self.current_line = line
+        for _, line_start, line_end in self.index.lines(line, 1):
+            self.widest_line = max(self.widest_line, len(self.line_text(line_start, line_end)))
+            self.update_scroll_bars()
+            self.scroll_to(line, len(self.line_text(line_start, start)))
+        self.viewport().update()
+
+
+class RawView(QWidget):
+    """LineViewer with a find box, a go to line box and an indexing status."""
+
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        toolbar = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Find in response")
+        self.search_input.returnPressed.connect(self.find_next)
+        self.search_input.textChanged.connect(self.search_changed)
+        toolbar.addWidget(self.search_input)
+        self.find_button = QPushButton("Find next")
+        self.find_button.clicked.connect(self.find_next)
+        toolbar.addWidget(self.find_button)
+
+        toolbar.addWidget(QLabel("Line:"))
+        self.line_input = QSpinBox()
+        self.line_input.setRange(1, 1)
+        self.line_input.setKeyboardTracking(False)
+        toolbar.addWidget(self.line_input)
+        self.go_button = QPushButton("Go")
+        self.go_button.clicked.connect(self.go_to_line)
+        toolbar.addWidget(self.go_button)
+
+        self.status_label = QLabel("")
+        toolbar.addWidget(self.status_label)
+        toolbar.addStretch()
+        layout.addLayout(toolbar)
+
+        self.viewer = LineViewer()
+        self.viewer.index_progress.connect(self.index_progress)
+        self.viewer.search_finished.connect(self.search_finished)
+        layout.addWidget(self.viewer)
+        self.setLayout(layout)
+
+    def set_content(self, buffer, encoding=None):
+        self.status_label.setText("")
+        self.viewer.set_content(buffer, encoding)
+
+    def clear(self):
+        self.viewer.clear()
+        self.line_input.setRange(1, 1)
+        self.status_label.setText("")
+
+    def index_progress(self, lines, done):
+        self.line_input.setMaximum(max(1, lines))
+        self.status_label.setText(f"{lines:,} lines" if done else f"Indexing... {lines:,} lines")
+
+    def go_to_line(self):
+        self.viewer.go_to_line(self.line_input.value() - 1)
+        self.viewer.setFocus()
+
+    def find_next(self):
+        if not self.search_input.text():
+            return
+        self.status_label.setText("Searching...")
+        self.viewer.find(self.search_input.text())
+
+    def search_changed(self):
+        # A new search term starts again from the top of the view
+        self.viewer.cancel_search()
+        self.viewer.match = None
+        self.viewer.viewport().update()
+
+    def search_finished(self, found):
+        lines = self.viewer.line_count()
+        self.status_label.setText(f"{lines:,} lines" if found else "Not found")
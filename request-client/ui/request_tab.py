@@ -5,12 +5,16 @@ from PyQt5.QtCore import pyqtSignal
 class RequestTab(QWidget):
     request_sent = pyqtSignal(object)
 
-    def __init__(self, http_client, history_db):
+    def __init__(self, request_handler, history_db):
         super().__init__()
-        self.http_client = http_client
+        self.request_handler = request_handler
         self.history_db = history_db
         self.init_ui()
 
+        self.request_handler.request_finished.connect(self.on_request_finished)
+        self.request_handler.request_error.connect(self.update_pending)
+        self.request_handler.request_cancelled.connect(self.update_pending)
+
     def init_ui(self):
         layout = QVBoxLayout()
 
@@ -41,28 +45,47 @@ class RequestTab(QWidget):
         self.body_input = QTextEdit()
         layout.addWidget(self.body_input)
 
-        # Send button
+        # Send and cancel buttons
+        button_layout = QHBoxLayout()
         self.send_button = QPushButton("Send Request")
         self.send_button.clicked.connect(self.send_request)
-        layout.addWidget(self.send_button)
+        button_layout.addWidget(self.send_button)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.request_handler.cancel_all)
+        button_layout.addWidget(self.cancel_button)
+        self.pending_label = QLabel("")
+        button_layout.addWidget(self.pending_label)
+        layout.addLayout(button_layout)
 
         self.setLayout(layout)
 
+    def current_request(self):
+        """Return (method, url, headers, body) from the input fields."""
+        return (self.method_combo.currentText(), self.url_input.text(),
+                self.parse_headers(), self.body_input.toPlainText())
+
     def send_request(self):
-        url = self.url_input.text()
-        method = self.method_combo.currentText()
-        headers = self.parse_headers()
-        body = self.body_input.toPlainText()
+        method, url, headers, body = self.current_request()
 
-        # Send the request using the http_client
-        response = self.http_client.send_request(method, url, headers, body)
+        # Send the request without blocking the GUI thread
+        self.request_handler.send_request_async(method, url, headers, body)
+        self.update_pending()
+
+    def on_request_finished(self, response):
+        self.update_pending()
 
         # Save to history
-        self.history_db.add_request(method, url, headers, body)
+        self.history_db.add_response(response)
 
         # Emit the response
         self.request_sent.emit(response)
 
+    def update_pending(self, *args):
+        count = len(self.request_handler.pending)
+        self.cancel_button.setEnabled(count > 0)
+        self.pending_label.setText(f"{count} in flight" if count else "")
+
     def parse_headers(self):
         headers = {}
         header_text = self.headers_input.toPlainText()
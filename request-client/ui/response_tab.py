@@ -1,12 +1,45 @@
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QTextEdit, QTabWidget, QTreeWidget, QTreeWidgetItem)
-from PyQt5.QtCore import Qt
-import json
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPlainTextEdit,
+                             QTabWidget, QTreeWidget, QTreeWidgetItem, QTreeView)
+from PyQt5.QtGui import QFontDatabase, QTextCursor
+from PyQt5.QtCore import Qt, QTimer
+
+from .json_tree_model import JsonTreeModel
+from .raw_viewer import RawView
+from .timing_view import TimingWaterfall
+from core.format_pipeline import FormatPipeline
+from core.query_runner import QueryRunner
+from core.json_query import compile_query
+from core.parsed_document import DocumentCache
+from utils.syntax_highlighter import JsonHighlighter, XmlHighlighter
+
+
+# JSON and XML bodies up to this size are pretty-printed
+PRETTY_BYTES = 32 * 1024 * 1024
+
+# Pretty view highlighter for each kind of body the pipeline formats
+HIGHLIGHTERS = {
+    'json': JsonHighlighter,
+    'xml': XmlHighlighter,
+}
+
+# Pause in typing before the JSON query is run
+QUERY_DELAY_MS = 300
 
 
 class ResponseTab(QWidget):
-    def __init__(self):
+    def __init__(self, document_cache=None):
         super().__init__()
+        self.documents = document_cache if document_cache is not None else DocumentCache()
+        # Formats and parses bodies off the GUI thread; results arrive in batches
+        self.pipeline = FormatPipeline(self)
+        self.pipeline.pretty_started.connect(self.start_pretty)
+        self.pipeline.pretty_batch.connect(self.append_pretty)
+        self.pipeline.pretty_finished.connect(self.finish_pretty)
+        self.pipeline.tree_ready.connect(self.populate_json_tree)
+        # Evaluates the JSON tab's query off the GUI thread
+        self.query_runner = QueryRunner(self)
+        self.query_runner.finished.connect(self.show_query_results)
+        self.json_data = None
         self.init_ui()
 
     def init_ui(self):
@@ -16,28 +49,64 @@ class ResponseTab(QWidget):
         status_layout = QHBoxLayout()
         self.status_label = QLabel("Status: ")
         self.time_label = QLabel("Time: ")
+        self.size_label = QLabel("Size: ")
+        self.cache_label = QLabel("")
         status_layout.addWidget(self.status_label)
         status_layout.addWidget(self.time_label)
+        status_layout.addWidget(self.size_label)
+        status_layout.addWidget(self.cache_label)
         status_layout.addStretch()
         layout.addLayout(status_layout)
 
         # Response content tabs
         self.content_tabs = QTabWidget()
 
-        # Raw response tab
-        self.raw_response = QTextEdit()
-        self.raw_response.setReadOnly(True)
+        # Raw response tab; lines are read from the body as they are shown
+        self.raw_response = RawView()
         self.content_tabs.addTab(self.raw_response, "Raw")
 
+        # Pretty-printed JSON or XML; only the blocks on screen are highlighted
+        self.pretty_view = QPlainTextEdit()
+        self.pretty_view.setReadOnly(True)
+        self.pretty_view.setUndoRedoEnabled(False)  # Text is appended in batches
+        self.pretty_view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.pretty_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.pretty_highlighter = None
+        self.content_tabs.addTab(self.pretty_view, "Pretty")
+
         # Headers tab
         self.headers_tree = QTreeWidget()
         self.headers_tree.setHeaderLabels(["Header", "Value"])
         self.content_tabs.addTab(self.headers_tree, "Headers")
 
-        # JSON tab
-        self.json_tree = QTreeWidget()
-        self.json_tree.setHeaderLabels(["Key", "Value"])
-        self.content_tabs.addTab(self.json_tree, "JSON")
+        # JSON tab; rows are built as nodes are expanded
+        self.json_tab = QWidget()
+        json_layout = QVBoxLayout(self.json_tab)
+        json_layout.setContentsMargins(0, 0, 0, 0)
+        query_layout = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Query, e.g. $.items[?(@.price < 10)].name | first")
+        self.query_input.setClearButtonEnabled(True)
+        self.query_input.textChanged.connect(self.schedule_query)
+        self.query_input.returnPressed.connect(self.run_query)
+        self.query_status = QLabel("")
+        query_layout.addWidget(self.query_input)
+        query_layout.addWidget(self.query_status)
+        json_layout.addLayout(query_layout)
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(QUERY_DELAY_MS)
+        self.query_timer.timeout.connect(self.run_query)
+        self.json_model = JsonTreeModel()
+        self.json_tree = QTreeView()
+        self.json_tree.setModel(self.json_model)
+        self.json_tree.setUniformRowHeights(True)
+        json_layout.addWidget(self.json_tree)
+        self.content_tabs.addTab(self.json_tab, "JSON")
+
+        # Timing tab
+        self.timing_view = TimingWaterfall()
+        self.content_tabs.addTab(self.timing_view, "Timing")
 
         layout.addWidget(self.content_tabs)
         self.setLayout(layout)
@@ -46,9 +115,15 @@ class ResponseTab(QWidget):
         # Update status and time
         self.status_label.setText(f"Status: {response.status_code}")
         self.time_label.setText(f"Time: {response.elapsed.total_seconds():.2f} s")
+        self.timing_view.set_timings(getattr(response, 'timings', None))
+        cache_status = getattr(response, 'cache_status', None)
+        self.cache_label.setText(f"Cache: {cache_status}" if cache_status else "")
 
-        # Update raw response
-        self.raw_response.setText(response.text)
+        # Update raw response; spooled bodies are read through their mmap view
+        body = getattr(response, 'body', None)
+        content = body.view() if body is not None else (response.content or b'')
+        self.size_label.setText(f"Size: {len(content)} bytes")
+        self.raw_response.set_content(content, response.encoding)
 
         # Update headers
         self.headers_tree.clear()
@@ -57,41 +132,106 @@ class ResponseTab(QWidget):
             item.setText(0, key)
             item.setText(1, value)
 
-        # Update JSON view if applicable
-        self.json_tree.clear()
+        # Update JSON views if applicable; disabled unless the body is valid JSON
+        self.query_runner.cancel()
+        self.json_data = None
+        self.query_status.setText("")
+        self.json_model.clear()
+        self.pretty_view.clear()
+        self.set_json_tabs_enabled(False)
+        self.content_tabs.setTabToolTip(self.content_tabs.indexOf(self.pretty_view), "")
+        if len(content) > PRETTY_BYTES:
+            self.pipeline.cancel()
+            return
+        # Re-indented without building the object tree, then parsed for the JSON
+        # tab; both are memoized on the response's document
+        self.pipeline.submit(self.documents.for_response(response))
+
+    def start_pretty(self, kind):
+        highlighter_class = HIGHLIGHTERS[kind]
+        if not isinstance(self.pretty_highlighter, highlighter_class):
+            if self.pretty_highlighter is not None:
+                self.pretty_highlighter.detach()
+            self.pretty_highlighter = highlighter_class(self.pretty_view)
+        self.pretty_view.clear()
+
+    def append_pretty(self, text):
+        cursor = QTextCursor(self.pretty_view.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self.content_tabs.setTabEnabled(self.content_tabs.indexOf(self.pretty_view), True)
+
+    def finish_pretty(self, error):
+        if error:
+            # Only part of the body was formatted
+            self.pretty_view.clear()
+            self.content_tabs.setTabEnabled(self.content_tabs.indexOf(self.pretty_view), False)
+            self.content_tabs.setTabToolTip(self.content_tabs.indexOf(self.pretty_view), error)
+        else:
+            self.content_tabs.setTabEnabled(self.content_tabs.indexOf(self.pretty_view), True)
+
+    def set_json_tabs_enabled(self, enabled):
+        for view in (self.pretty_view, self.json_tab):
+            self.content_tabs.setTabEnabled(self.content_tabs.indexOf(view), enabled)
+
+    def populate_json_tree(self, data):
+        self.json_data = data
+        self.content_tabs.setTabEnabled(self.content_tabs.indexOf(self.json_tab), True)
+        self.run_query()
+
+    def schedule_query(self):
+        self.query_timer.start()
+
+    def run_query(self):
+        """Show the matches of the query box in the JSON tree, or the whole document."""
+        self.query_timer.stop()
+        self.query_runner.cancel()
+        expression = self.query_input.text().strip()
+        if not expression or expression == '$':
+            self.query_status.setText("")
+            self.json_model.set_document(self.json_data)
+            return
+        if self.json_data is None:
+            return
         try:
-            json_data = json.loads(response.text)
-            self.populate_json_tree(json_data)
-            self.content_tabs.setTabEnabled(2, True)  # Enable JSON tab
-        except json.JSONDecodeError:
-            self.content_tabs.setTabEnabled(2, False)  # Disable JSON tab if not valid JSON
-
-    def populate_json_tree(self, data, parent=None):
-        if parent is None:
-            parent = self.json_tree.invisibleRootItem()
-
-        if isinstance(data, dict):
-            for key, value in data.items():
-                item = QTreeWidgetItem(parent)
-                item.setText(0, str(key))
-                if isinstance(value, (dict, list)):
-                    self.populate_json_tree(value, item)
-                else:
-                    item.setText(1, str(value))
-        elif isinstance(data, list):
-            for i, value in enumerate(data):
-                item = QTreeWidgetItem(parent)
-                item.setText(0, str(i))
-                if isinstance(value, (dict, list)):
-                    self.populate_json_tree(value, item)
-                else:
-                    item.setText(1, str(value))
+            query = compile_query(expression)
+        except ValueError as e:
+            self.query_status.setText(str(e))
+            return
+        self.query_status.setText("Searching...")
+        self.query_runner.run(query, self.json_data)
+
+    def show_query_results(self, matches, count, error):
+        if error:
+            self.query_status.setText(error)
+            return
+        if count < 0:
+            self.query_status.setText(f"First {len(matches)} matches")
+        else:
+            self.query_status.setText(f"{count} match" if count == 1 else f"{count} matches")
+        self.json_model.set_document(matches)
+        if len(matches) == 1:
+            self.json_tree.expandToDepth(0)
+
+    def shutdown(self):
+        self.pipeline.cancel()
+        self.query_runner.cancel()
+        self.pipeline.wait()
+        self.query_runner.wait()
 
     def clear_response(self):
         self.status_label.setText("Status: ")
         self.time_label.setText("Time: ")
+        self.size_label.setText("Size: ")
+        self.cache_label.setText("")
         self.raw_response.clear()
+        self.pipeline.cancel()
+        self.query_runner.cancel()
+        self.json_data = None
+        self.query_status.setText("")
         self.headers_tree.clear()
-        self.json_tree.clear()
-        self.content_tabs.setTabEnabled(2, False)  # Disable JSON tab
+        self.json_model.clear()
+        self.pretty_view.clear()
+        self.timing_view.set_timings(None)
+        self.set_json_tabs_enabled(False)
 
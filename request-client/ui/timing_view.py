@@ -0,0 +1,64 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QPainter, QColor
+from PyQt5.QtCore import Qt, QRectF
+
+from core.request_timing import PHASES
+
+PHASE_LABELS = {
+    'dns': "DNS lookup",
+    'connect': "TCP connect",
+    'tls': "TLS handshake",
+    'ttfb': "Waiting (TTFB)",
+    'transfer': "Content download",
+}
+
+PHASE_COLORS = {
+    'dns': QColor("#009688"),
+    'connect': QColor("#FF9800"),
+    'tls': QColor("#9C27B0"),
+    'ttfb': QColor("#4CAF50"),
+    'transfer': QColor("#2196F3"),
+}
+
+
+class TimingWaterfall(QWidget):
+    """Waterfall chart of the request phases recorded in RequestTimings."""
+
+    ROW_HEIGHT = 24
+    LABEL_WIDTH = 150
+    VALUE_WIDTH = 90
+
+    def __init__(self):
+        super().__init__()
+        self.timings = None
+        self.setMinimumHeight(self.ROW_HEIGHT * (len(PHASES) + 1) + 10)
+
+    def set_timings(self, timings):
+        self.timings = timings
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.timings is None:
+            painter.drawText(self.rect(), Qt.AlignCenter, "No timing information for this response")
+            return
+
+        total = self.timings.total or 1e-9
+        chart_width = max(10, self.width() - self.LABEL_WIDTH - self.VALUE_WIDTH - 20)
+
+        for row, (phase, start, duration) in enumerate(self.timings.waterfall()):
+            top = 5 + row * self.ROW_HEIGHT
+            painter.setPen(self.palette().text().color())
+            painter.drawText(QRectF(5, top, self.LABEL_WIDTH, self.ROW_HEIGHT),
+                             Qt.AlignVCenter, PHASE_LABELS[phase])
+
+            left = self.LABEL_WIDTH + 10 + chart_width * start / total
+            width = max(1.0, chart_width * duration / total) if duration else 0
+            painter.fillRect(QRectF(left, top + 5, width, self.ROW_HEIGHT - 10), PHASE_COLORS[phase])
+
+            painter.drawText(QRectF(self.width() - self.VALUE_WIDTH, top, self.VALUE_WIDTH - 5, self.ROW_HEIGHT),
+                             Qt.AlignVCenter | Qt.AlignRight, f"{duration * 1000:.1f} ms")
+
+        top = 5 + len(PHASES) * self.ROW_HEIGHT
+        painter.drawText(QRectF(5, top, self.width() - 10, self.ROW_HEIGHT),
+                         Qt.AlignVCenter | Qt.AlignRight, f"Total: {total * 1000:.1f} ms")
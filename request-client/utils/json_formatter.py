@@ -1,5 +1,54 @@
+import codecs
+import io
 import json
-from PyQt5.QtGui import QTextCharFormat, QColor, QFont
+import re
+import sys
+from itertools import accumulate, repeat
+
+# Token kind -> (colour, bold)
+JSON_STYLES = {
+    'key': ("#FF0000", True),  # Red
+    'string': ("#008000", False),  # Green
+    'number': ("#0000FF", False),  # Blue
+    'literal': ("#FF00FF", False),  # Magenta
+}
+
+# Tokenizer states carried from one line to the next
+JSON_DEFAULT = 0
+JSON_IN_STRING = 1  # Inside a string that runs past the end of the line
+
+JSON_TOKEN = re.compile(r'''
+    (?P<key>"(?:[^"\\]|\\.)*"(?=\s*:))
+  | (?P<string>"(?:[^"\\]|\\.)*("|$))
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<literal>\b(?:true|false|null)\b)
+''', re.VERBOSE)
+
+STRING_REST = re.compile(r'(?:[^"\\]|\\.)*("|$)')
+
+# Chunk size used when re-indenting streams
+FORMAT_CHUNK_SIZE = 1024 * 1024
+
+# Objects up to this size are sorted by format_json
+SORT_KEYS_BYTES = 1024 * 1024
+
+# Whitespace is skipped implicitly: findall() only returns these tokens.
+# The last alternative matches a string cut off by the end of the buffer.
+STREAM_TOKEN = re.compile(r'''"(?:[^"\\]|\\.)*"|[{}\[\]:,]|[^\s{}\[\]:,"]+|"(?:[^"\\]|\\.)*\\?\Z''', re.S)
+COMPLETE_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*(")?', re.S)
+NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+# Text without bad escapes or control characters JSON allows neither in
+# strings nor as whitespace; what follows the match is either invalid or an
+# escape cut off by the end of the text (ESCAPE_TAIL), left for the next chunk
+ESCAPES_VALID = re.compile(r'(?:[^\\\x00-\x08\x0b\x0c\x0e-\x1f]+|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*')
+ESCAPE_TAIL = re.compile(r'\\(?:u[0-9a-fA-F]{0,3})?')
+LITERALS = frozenset(('true', 'false', 'null'))
+OPENING = {'}': '{', ']': '['}
+DEPTH_CHANGE = {'{': 1, '[': 1, '}': -1, ']': -1}
+
+# What the re-indenter expects next
+VALUE, KEY, COLON, COMMA, END = range(5)
 
 
 def format_json(json_str):
@@ -12,11 +61,12 @@ def format_json(json_str):
     Returns:
     str: Formatted JSON string with proper indentation.
     """
+    output = io.StringIO()
     try:
-        parsed = json.loads(json_str)
-        return json.dumps(parsed, indent=4, sort_keys=True)
-    except json.JSONDecodeError:
+        format_json_stream(json_str, output, sort_keys_threshold=SORT_KEYS_BYTES)
+    except ValueError:
         return json_str  # Return original string if it's not valid JSON
+    return output.getvalue()
 
 
 def is_valid_json(json_str):
@@ -36,59 +86,399 @@ def is_valid_json(json_str):
         return False
 
 
-def highlight_json(json_str):
+def format_json_stream(src, dst, indent=4, sort_keys_threshold=None, chunk_size=FORMAT_CHUNK_SIZE):
     """
-    Generate a list of QTextCharFormat objects for syntax highlighting JSON.
+    Re-indent JSON from src into dst without building the object tree.
+
+    Tokens are read and written chunk by chunk, so memory use is bounded by
+    chunk_size rather than by the payload; strings longer than a chunk are
+    copied through in pieces. Strings and numbers are written exactly as
+    they appear in the input.
 
     Args:
-    json_str (str): A string containing JSON data.
+    src: A str, bytes, binary or text file object, or ResponseBody.
+    dst: A text stream with a write() method.
+    indent (int): Spaces per nesting level.
+    sort_keys_threshold (int): If set, objects up to this many characters
+        are buffered and written with their keys sorted; larger objects keep
+        their input order, so memory stays bounded.
+    chunk_size (int): Characters to tokenize at a time.
 
     Returns:
-    list: A list of (start_index, length, QTextCharFormat) tuples for highlighting.
+    int: The number of characters written.
+
+    Raises:
+    ValueError: If src is not valid JSON.
     """
-    highlights = []
+    reindenter = _JsonReindenter(dst, indent, sort_keys_threshold)
+    carry = ''  # Unfinished token from the end of the previous chunk
+    in_string = False  # Inside a long string being copied through
+    # Strings up to this length are held whole; longer ones cannot be sorted anyway
+    string_limit = max(chunk_size, sort_keys_threshold or 0)
+    for text in _text_chunks(src, chunk_size):
+        buffer = carry + text if carry else text
+        carry = ''
+        if in_string:
+            tail = STRING_TAIL.match(buffer)
+            # An escape the chunk cut off is held back and checked whole
+            end = _escape_tail(buffer, tail.end())
+            if end < 0:
+                reindenter.fail("Invalid escape or control character")
+            reindenter.write_string(buffer[:end])
+            if tail.group(1) is None:
+                carry = buffer[end:]  # Including a backslash escaping the next chunk
+                continue
+            in_string = False
+            buffer = buffer[end:]
 
-    # Define formats
-    string_format = QTextCharFormat()
-    string_format.setForeground(QColor("#008000"))  # Green
+        if _escape_tail(buffer) < 0:
+            reindenter.fail("Invalid escape or control character")
+        # Minified input has no line breaks or tabs for strings to hide; an
+        # object buffered for sorting still holds tokens of earlier chunks
+        reindenter.raw_whitespace = (reindenter.pending is not None or '\n' in buffer
+                                     or '\t' in buffer or '\r' in buffer)
+        tokens = STREAM_TOKEN.findall(buffer)
+        # A scalar or string that touches the end may continue in the next chunk
+        if tokens and buffer.endswith(tokens[-1]):
+            last = tokens[-1]
+            if last[0] == '"' and not COMPLETE_STRING.fullmatch(last):
+                if len(last) > string_limit:
+                    # Write what there is rather than rescanning it every chunk
+                    end = _escape_tail(last, STRING_TAIL.match(last, 1).end())
+                    tokens[-1], carry = last[:end], last[end:]
+                    in_string = True
+                else:
+                    carry = tokens.pop()
+            elif last[0] not in '{}[]:,"':
+                carry = tokens.pop()
+        reindenter.feed(tokens, len(buffer) - len(carry))
 
-    number_format = QTextCharFormat()
-    number_format.setForeground(QColor("#0000FF"))  # Blue
+    if in_string or carry[:1] == '"':
+        reindenter.fail("Unterminated string")
+    if carry:
+        reindenter.feed([carry], len(carry))
+    return reindenter.finish()
 
-    bool_null_format = QTextCharFormat()
-    bool_null_format.setForeground(QColor("#FF00FF"))  # Magenta
 
-    key_format = QTextCharFormat()
-    key_format.setForeground(QColor("#FF0000"))  # Red
-    key_format.setFontWeight(QFont.Bold)
+def _escape_tail(text, endpos=sys.maxsize):
+    """Return where an escape cut off by the end of text[:endpos] starts.
 
-    # Simple parsing and highlighting
-    in_string = False
-    in_key = False
-    start = 0
+    That is the end if no escape is cut off, or -1 if the text has a bad
+    escape or a control character JSON does not allow.
+    """
+    end = ESCAPES_VALID.match(text, 0, endpos).end()
+    if end == min(endpos, len(text)) or ESCAPE_TAIL.fullmatch(text, end, endpos):
+        return end
+    return -1
+
+
+def _text_chunks(src, chunk_size):
+    """Yield src as str chunks, decoding bytes as UTF-8."""
+    if isinstance(src, str):
+        for offset in range(0, len(src), chunk_size):
+            yield src[offset:offset + chunk_size]
+        return
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        chunks = (src[offset:offset + chunk_size] for offset in range(0, len(src), chunk_size))
+    elif hasattr(src, 'iter_chunks'):
+        chunks = src.iter_chunks(chunk_size)
+    else:
+        chunks = iter(lambda: src.read(chunk_size), src.read(0))
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+        else:
+            yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+class _JsonReindenter:
+    """Writes a stream of JSON tokens back out with fresh indentation.
+
+    Structure is checked as tokens arrive (brackets, commas and colons in
+    the right places, valid scalars, no raw line breaks or tabs in strings),
+    so invalid input raises ValueError part way through, after some output
+    has been written. format_json_stream() checks escapes.
+    """
+
+    def __init__(self, dst, indent, sort_keys_threshold):
+        self.dst = dst
+        self.indent = ' ' * indent
+        self.newlines = ['\n']  # Line break plus indentation, by depth
+        self.commas = [',\n']
+        self.sort_keys_threshold = sort_keys_threshold
+        self.stack = []  # '{' or '[' per open container
+        self.expect = VALUE  # The kind of token allowed next
+        self.opened = False  # The last token opened a container
+        self.offset = 0  # Input characters consumed, for error messages
+        self.raw_whitespace = True  # Strings in the tokens fed next may hold tabs or newlines
+        self.written = 0
+        self.pending = None  # Tokens of the object being buffered for sorting
+        self.pending_depth = 0
+        self.pending_size = 0
 
-    for i, char in enumerate(json_str):
-        if char == '"':
-            if in_string:
-                length = i - start + 1
-                highlights.append((start, length, string_format if not in_key else key_format))
-                in_string = False
-                in_key = False
+    def feed(self, tokens, consumed):
+        out = []
+        if self.sort_keys_threshold is None:
+            self._emit(tokens, out)
+        else:
+            self._feed_sorting(tokens, out)
+        self.offset += consumed
+        self._write(out)
+
+    def write_string(self, piece):
+        """Copy part of a long string straight through."""
+        out = []
+        while self.pending is not None:  # Far too large to sort
+            self._write_unsorted(out)
+        if '\t' in piece or '\n' in piece or '\r' in piece:
+            self.fail("Invalid escape or control character")
+        out.append(piece)
+        self.offset += len(piece)
+        self._write(out)
+
+    def finish(self):
+        if self.pending is not None or self.stack or self.expect != END:
+            self.fail("Unexpected end of JSON")
+        return self.written
+
+    def _write(self, out):
+        text = ''.join(out)
+        self.dst.write(text)
+        self.written += len(text)
+
+    def _emit(self, tokens, out):
+        """Append the formatted tokens to out, checking the structure."""
+        stack = self.stack
+        depth = len(stack)
+        expect = self.expect
+        opened = self.opened
+        newlines = self.newlines
+        commas = self.commas
+        raw_whitespace = self.raw_whitespace
+        write = out.append
+        for token in tokens:
+            first = token[0]
+            if first == '"':
+                if opened:
+                    write(newlines[depth])
+                    opened = False
+                if expect == KEY:
+                    expect = COLON
+                elif expect == VALUE:
+                    expect = COMMA if depth else END
+                else:
+                    self.fail("Unexpected string")
+                # Escapes were checked for the whole chunk; these are only
+                # allowed outside strings
+                if raw_whitespace and ('\n' in token or '\t' in token or '\r' in token):
+                    self.fail("Invalid escape or control character")
+                write(token)
+            elif first == ':':
+                if expect != COLON:
+                    self.fail("Unexpected ':'")
+                write(': ')
+                expect = VALUE
+            elif first == ',':
+                if expect != COMMA:
+                    self.fail("Unexpected ','")
+                write(commas[depth])
+                expect = KEY if stack[-1] == '{' else VALUE
+            elif first == '{' or first == '[':
+                if expect != VALUE:
+                    self.fail(f"Unexpected '{first}'")
+                if opened:
+                    write(newlines[depth])
+                write(first)
+                stack.append(first)
+                depth += 1
+                if depth == len(newlines):
+                    self._indent_deeper()
+                opened = True
+                expect = KEY if first == '{' else VALUE
+            elif first == '}' or first == ']':
+                if not (expect == COMMA or opened) or not depth or stack.pop() != OPENING[first]:
+                    self.fail(f"Unexpected '{first}'")
+                depth -= 1
+                if opened:
+                    write(first)  # Empty container stays on one line
+                    opened = False
+                else:
+                    write(newlines[depth] + first)
+                expect = COMMA if depth else END
             else:
-                in_string = True
-                start = i
-        elif char in '0123456789.-' and not in_string:
-            if i == 0 or json_str[i - 1] not in '0123456789.':
-                start = i
-            if i == len(json_str) - 1 or json_str[i + 1] not in '0123456789.':
-                length = i - start + 1
-                highlights.append((start, length, number_format))
-        elif char == ':' and not in_string:
-            in_key = True
-        elif char.lower() in ('t', 'f', 'n') and not in_string:
-            if json_str[i:i + 4].lower() in ('true', 'null') or json_str[i:i + 5].lower() == 'false':
-                length = 4 if json_str[i:i + 4].lower() in ('true', 'null') else 5
-                highlights.append((i, length, bool_null_format))
+                if expect != VALUE or not (token in LITERALS or NUMBER.fullmatch(token)):
+                    self.fail(f"Unexpected {token[:20]!r}")
+                if opened:
+                    write(newlines[depth])
+                    opened = False
+                write(token)
+                expect = COMMA if depth else END
+        self.expect = expect
+        self.opened = opened
 
-    return highlights
+    def _feed_sorting(self, tokens, out):
+        """Emit tokens, sorting the keys of objects no larger than the threshold."""
+        position = 0
+        while self.pending is not None and position < len(tokens):
+            position = self._continue_pending(tokens, position, out)
+        if position == len(tokens):
+            return
+        tokens = tokens[position:]
+        # Bracket depth after each token and running sizes, so each object's
+        # end and size are found without a Python loop over its tokens
+        depths = list(accumulate(map(DEPTH_CHANGE.get, tokens, repeat(0))))
+        sizes = list(accumulate(map(len, tokens), initial=0))
+        position = 0
+        while position < len(tokens):
+            try:
+                start = tokens.index('{', position)
+            except ValueError:
+                self._emit(tokens[position:], out)
+                return
+            self._emit(tokens[position:start], out)
+            try:
+                end = depths.index(depths[start] - 1, start) + 1
+            except ValueError:
+                end = None  # Continues in the next chunk
+            if sizes[end or -1] - sizes[start] > self.sort_keys_threshold:
+                # Too large to sort: look for smaller objects inside it
+                self._emit(tokens[start:start + 1], out)
+                position = start + 1
+            elif end is None:
+                self.pending = tokens[start:]
+                self.pending_depth = depths[-1] - depths[start] + 1
+                self.pending_size = sizes[-1] - sizes[start]
+                return
+            else:
+                self._emit(self._sorted_object(tokens[start:end]), out)
+                position = end
+
+    def _continue_pending(self, tokens, position, out):
+        """Add tokens to the buffered object; return the index after those used."""
+        pending = self.pending
+        for position, token in enumerate(tokens[position:], position + 1):
+            pending.append(token)
+            self.pending_size += len(token)
+            self.pending_depth += DEPTH_CHANGE.get(token, 0)
+            if not self.pending_depth:
+                self.pending = None
+                self._emit(self._sorted_object(pending), out)
+                return position
+            if self.pending_size > self.sort_keys_threshold:
+                self._write_unsorted(out)
+                return position
+        return len(tokens)
 
+    def _write_unsorted(self, out):
+        """Give up sorting the buffered object and look for smaller ones inside it."""
+        pending = self.pending
+        self.pending = None
+        self._emit(pending[:1], out)
+        self._feed_sorting(pending[1:], out)
+
+    @staticmethod
+    def _sorted_object(tokens):
+        """Return the tokens of one complete object with keys sorted at every level.
+
+        Members are split at the commas of each object and reordered whole,
+        so malformed input stays malformed and _emit still reports it.
+        """
+        frames = []
+        opening, members, current = None, None, []
+        for token in tokens:
+            if token == '{' or token == '[':
+                frames.append((opening, members, current))
+                opening, members, current = token, ([] if token == '{' else None), []
+            elif token == '}' or token == ']':
+                if members is not None:  # An object
+                    if members or current:
+                        members.append(current)
+                    members.sort(key=_member_key)
+                    current = []
+                    for index, member in enumerate(members):
+                        if index:
+                            current.append(',')
+                        current.extend(member)
+                finished = [opening, *current, token]
+                opening, members, current = frames.pop()
+                current.extend(finished)
+            elif token == ',' and members is not None:
+                members.append(current)
+                current = []
+            else:
+                current.append(token)
+        return current
+
+    def _indent_deeper(self):
+        self.newlines.append(self.newlines[-1] + self.indent)
+        self.commas.append(',' + self.newlines[-1])
+
+    def fail(self, message):
+        raise ValueError(f"{message} near offset {self.offset}")
+
+
+def _member_key(member):
+    """Sort key of an object member: its key as a decoded string."""
+    key = member[0] if member else ''
+    if '\\' in key:
+        try:
+            return json.loads(key)
+        except ValueError:
+            pass
+    return key[1:-1]
+
+
+def tokenize_json(line, state=JSON_DEFAULT):
+    """
+    Split one line of JSON into highlight tokens.
+
+    Args:
+    line (str): A single line of text, without its line break.
+    state (int): JSON_IN_STRING if the previous line ended inside a string.
+
+    Returns:
+    tuple: A list of (start, length, kind) tokens and the state at the end
+    of the line.
+    """
+    tokens = []
+    position = 0
+    if state == JSON_IN_STRING:
+        rest = STRING_REST.match(line)
+        position = rest.end()
+        tokens.append((0, position, 'string'))
+        if not rest.group(1):
+            return tokens, JSON_IN_STRING
+
+    state = JSON_DEFAULT
+    for match in JSON_TOKEN.finditer(line, position):
+        kind = match.lastgroup
+        tokens.append((match.start(), match.end() - match.start(), kind))
+        if kind == 'string' and not match.group(3):
+            state = JSON_IN_STRING
+    return tokens, state
+
+
+def highlight_json(json_str):
+    """
+    Generate a list of QTextCharFormat objects for syntax highlighting JSON.
+
+    Args:
+    json_str (str): A string containing JSON data.
+
+    Returns:
+    list: A list of (start_index, length, QTextCharFormat) tuples for highlighting.
+    """
+    from .syntax_highlighter import make_formats
+
+    formats = make_formats(JSON_STYLES)
+    highlights = []
+    state = JSON_DEFAULT
+    offset = 0
+    for line in json_str.split('\n'):
+        tokens, state = tokenize_json(line, state)
+        for start, length, kind in tokens:
+            highlights.append((offset + start, length, formats[kind]))
+        offset += len(line) + 1
+    return highlights
@@ -0,0 +1,172 @@
+from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
+
+from .json_formatter import JSON_STYLES, JSON_DEFAULT, tokenize_json
+from .xml_formatter import XML_STYLES, XML_TEXT, XML_RUNS, tokenize_xml
+
+# Block state of blocks skipped because they were off screen
+PENDING = -2
+
+# Added to the state of blocks whose state is known but that were not formatted
+SCANNED = 1 << 20
+
+# Blocks around the visible ones highlighted ahead of scrolling
+MARGIN_BLOCKS = 50
+
+
+def make_formats(styles):
+    """Build {kind: QTextCharFormat} from {kind: (colour, bold[, italic])}."""
+    formats = {}
+    for kind, (color, bold, *italic) in styles.items():
+        char_format = QTextCharFormat()
+        char_format.setForeground(QColor(color))
+        if bold:
+            char_format.setFontWeight(QFont.Bold)
+        if italic and italic[0]:
+            char_format.setFontItalic(True)
+        formats[kind] = char_format
+    return formats
+
+
+class BlockHighlighter(QSyntaxHighlighter):
+    """Syntax highlighter that only formats the blocks on screen.
+
+    Subclasses provide tokenize(text, state), returning the (start, length,
+    kind) tokens of one block and the state to carry into the next; states
+    are non-negative ints. When attached to a QPlainTextEdit, blocks outside
+    the visible range (plus a margin) are marked PENDING instead of being
+    formatted, and are formatted when scrolled into view. The state a
+    visible block starts in is recovered by re-tokenizing from the nearest
+    block with a known state, so multi-line constructs stay correct;
+    max_lookback bounds that scan for languages whose state rarely spans
+    more than a few lines. States found by such a scan are kept on the
+    blocks (plus SCANNED), so later jumps resume from them; this assumes the
+    document is not edited, as in read-only views.
+    """
+
+    styles = {}
+    initial_state = 0
+    max_lookback = None
+
+    def __init__(self, editor_or_document):
+        self.editor = None
+        if hasattr(editor_or_document, 'document'):
+            self.editor = editor_or_document
+            editor_or_document = editor_or_document.document()
+        super().__init__(editor_or_document)
+        self.formats = make_formats(self.styles)
+        self._view = None  # Cached visible block range
+        if self.editor is not None:
+            self.editor.updateRequest.connect(self._highlight_visible)
+
+    def detach(self):
+        """Stop highlighting the editor or document."""
+        if self.editor is not None:
+            self.editor.updateRequest.disconnect(self._highlight_visible)
+            self.editor = None
+        self.setDocument(None)
+
+    def tokenize(self, text, state):
+        raise NotImplementedError
+
+    def scan_state(self, text, state):
+        """Return the state after text; override with a cheaper scan if possible."""
+        return self.tokenize(text, state)[1]
+
+    def highlightBlock(self, text):
+        block = self.currentBlock()
+        if self.editor is not None:
+            # Called once per block, so keep the off-screen path cheap
+            if self._view is None:
+                self._view = self._visible_range()
+            if not self._view[0] <= block.blockNumber() <= self._view[1]:
+                # Keeping a scanned state unchanged also stops Qt carrying
+                # the rehighlight on to the following blocks
+                if self.currentBlockState() < SCANNED:
+                    self.setCurrentBlockState(PENDING)
+                return
+
+        state = self.previousBlockState()
+        if state == PENDING:
+            state = self._state_before(block)
+        elif state >= SCANNED:
+            state -= SCANNED
+        elif state < 0:
+            state = self.initial_state
+
+        tokens, state = self.tokenize(text, state)
+        for start, length, kind in tokens:
+            self.setFormat(start, length, self.formats[kind])
+        self.setCurrentBlockState(state)
+
+    def _visible_range(self):
+        first = self.editor.firstVisibleBlock().blockNumber()
+        lines = self.editor.viewport().height() // max(1, self.editor.fontMetrics().lineSpacing())
+        return max(0, first - MARGIN_BLOCKS), first + lines + MARGIN_BLOCKS
+
+    def _state_before(self, block):
+        """Recover the state at the start of block by scanning back to a known one."""
+        pending = []
+        previous = block.previous()
+        while previous.isValid() and previous.userState() == PENDING:
+            if len(pending) == self.max_lookback:
+                break
+            pending.append(previous)
+            previous = previous.previous()
+        state = previous.userState() if previous.isValid() else -1
+        exact = state != PENDING  # Otherwise the lookback limit was reached
+        if state >= SCANNED:
+            state -= SCANNED
+        elif state < 0:
+            state = self.initial_state
+        for earlier in reversed(pending):
+            state = self.scan_state(earlier.text(), state)
+            if exact:
+                earlier.setUserState(state + SCANNED)
+        return state
+
+    def _highlight_visible(self, *args):
+        if self.document() is None:
+            return
+        self._view = first, last = self._visible_range()
+        block = self.document().findBlockByNumber(first)
+        while block.isValid() and block.blockNumber() <= last:
+            if block.userState() == PENDING or block.userState() >= SCANNED:
+                self.rehighlightBlock(block)
+            block = block.next()
+
+
+class JsonHighlighter(BlockHighlighter):
+    """Highlight JSON keys, strings, numbers and literals block by block.
+
+    Valid JSON never continues a string onto the next line, so one line of
+    lookback is enough to recover the state after a jump.
+    """
+
+    styles = JSON_STYLES
+    initial_state = JSON_DEFAULT
+    max_lookback = 1
+
+    def tokenize(self, text, state):
+        return tokenize_json(text, state)
+
+
+class XmlHighlighter(BlockHighlighter):
+    """Highlight XML tags, attributes, comments and CDATA block by block.
+
+    Comments, CDATA sections, attribute values and tags can all span lines,
+    so the state is carried through every block; skipped blocks are scanned
+    with plain substring searches where possible.
+    """
+
+    styles = XML_STYLES
+    initial_state = XML_TEXT
+
+    def tokenize(self, text, state):
+        return tokenize_xml(text, state)
+
+    def scan_state(self, text, state):
+        if state == XML_TEXT and '<' not in text:
+            return state
+        if state in XML_RUNS and XML_RUNS[state][0] not in text:
+            return state
+        return tokenize_xml(text, state)[1]
@@ -1,6 +1,57 @@
-import xml.dom.minidom
+import argparse
+import io
+import re
+import sys
 import xml.etree.ElementTree as ET
-from PyQt5.QtGui import QTextCharFormat, QColor, QFont
+from xml.sax.saxutils import escape
+
+# Token kind -> (colour, bold[, italic])
+XML_STYLES = {
+    'tag': ("#800000", True),  # Maroon
+    'attribute': ("#FF0000", False),  # Red
+    'value': ("#0000FF", False),  # Blue
+    'comment': ("#008000", False, True),  # Green italic
+    'cdata': ("#808080", False),  # Grey
+    'entity': ("#FF00FF", False),  # Magenta
+}
+
+# Tokenizer states carried from one line to the next
+XML_TEXT = 0
+XML_IN_TAG = 1  # Between a tag name and its closing >
+XML_IN_VALUE_DQ = 2  # Inside a "double quoted" attribute value
+XML_IN_VALUE_SQ = 3  # Inside a 'single quoted' attribute value
+XML_IN_COMMENT = 4
+XML_IN_CDATA = 5
+
+XML_MARKUP = re.compile(r'''
+    (?P<comment><!--)
+  | (?P<cdata><!\[CDATA\[)
+  | (?P<tag></?[\w:.-]+|<[?!][\w:.-]*)
+  | (?P<entity>&(?:\#\w+|[\w.-]+);)
+''', re.VERBOSE)
+
+TAG_PART = re.compile(r'''\s*(?:
+    (?P<close>/?>|\?>)
+  | (?P<equals>=)
+  | (?P<value>"[^"]*"?|'[^']*'?)
+  | (?P<attribute>[^\s=/>?"']+)
+)''', re.VERBOSE)
+
+# State -> (terminator, token kind) for constructs highlighted as one run
+XML_RUNS = {
+    XML_IN_COMMENT: ('-->', 'comment'),
+    XML_IN_CDATA: (']]>', 'cdata'),
+}
+RUN_STATES = {'comment': XML_IN_COMMENT, 'cdata': XML_IN_CDATA}
+
+# Bytes or characters parsed at a time when formatting streams
+FORMAT_CHUNK_SIZE = 1024 * 1024
+
+# The parser does not report the declaration, so it is copied from the input
+XML_DECLARATION = re.compile(r'(?:\ufeff|\xef\xbb\xbf)?\s*(<\?xml\s.*?\?>)', re.S)
+DECLARED_ENCODING = re.compile(r'''\s+encoding\s*=\s*["']([\w.:-]+)["']''')
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+ATTRIBUTE_ENTITIES = {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'}
 
 
 def format_xml(xml_str):
@@ -13,11 +64,193 @@ def format_xml(xml_str):
     Returns:
     str: Formatted XML string with proper indentation.
     """
+    output = io.StringIO()
     try:
-        dom = xml.dom.minidom.parseString(xml_str)
-        return dom.toprettyxml(indent="  ")
-    except Exception:
+        format_xml_stream(xml_str, output)
+    except ET.ParseError:
         return xml_str  # Return original string if it's not valid XML
+    return output.getvalue()
+
+
+def format_xml_stream(src, dst, indent=2, chunk_size=FORMAT_CHUNK_SIZE):
+    """
+    Re-indent XML from src into dst as it is parsed.
+
+    The document is fed to an incremental parser chunk by chunk and each
+    start tag, text run, comment and processing instruction is written as
+    soon as it is complete, so no tree is built and memory use does not
+    grow with the document. Elements holding only text stay on one line
+    with their text unchanged; other text is trimmed onto its own line.
+    Entities and CDATA sections are written as escaped text, and a DOCTYPE
+    is written without its internal subset.
+
+    Args:
+    src: A str, bytes, binary or text file object, or ResponseBody.
+    dst: A text stream with a write() method.
+    indent (int): Spaces per nesting level.
+    chunk_size (int): Bytes or characters to parse at a time.
+
+    Returns:
+    int: The number of characters written.
+
+    Raises:
+    xml.etree.ElementTree.ParseError: If src is not well-formed; its
+        position attribute holds the (line, column) of the error.
+    """
+    writer = _XmlPrettyWriter(dst, indent)
+    parser = ET.XMLParser(target=writer)
+    first = True
+    for chunk in _chunks(src, chunk_size):
+        if first:
+            head = chunk if isinstance(chunk, str) else bytes(chunk[:256]).decode('latin-1')
+            declaration = XML_DECLARATION.match(head)
+            if declaration:
+                writer.write_declaration(declaration.group(1))
+            first = False
+        parser.feed(chunk)
+        writer.flush()
+    parser.close()
+    writer.flush()
+    return writer.written
+
+
+def _chunks(src, chunk_size):
+    if isinstance(src, (str, bytes, bytearray, memoryview)):
+        for offset in range(0, len(src), chunk_size):
+            yield src[offset:offset + chunk_size]
+    elif hasattr(src, 'iter_chunks'):
+        yield from src.iter_chunks(chunk_size)
+    else:
+        yield from iter(lambda: src.read(chunk_size), src.read(0))
+
+
+class _XmlPrettyWriter:
+    """XMLParser target that writes each parse event back out indented.
+
+    Start tags are written without their closing '>' until the next event
+    shows whether the element is empty (<a/>), holds only text (kept
+    inline) or has children. Namespaced names arrive as {uri}name and are
+    written back with the prefixes the document declared.
+    """
+
+    def __init__(self, dst, indent):
+        self.dst = dst
+        self.newlines = ['\n']  # Line break plus indentation, by depth
+        self.indent = ' ' * indent
+        self.out = []
+        self.written = 0
+        self.started = False  # Anything written yet
+        self.tag_open = False  # The last start tag still lacks its '>'
+        self.text = []  # Text since the last event
+        self.names = []  # Qualified name of each open element
+        self.scopes = [{XML_NAMESPACE: 'xml'}]  # uri -> prefix, per open element
+        self.declarations = []  # Namespaces declared on the next element
+
+    def write_declaration(self, declaration):
+        # The output is text, so an encoding other than UTF-8 no longer applies
+        encoding = DECLARED_ENCODING.search(declaration)
+        if encoding and encoding.group(1).lower() not in ('utf-8', 'utf8'):
+            declaration = declaration[:encoding.start()] + declaration[encoding.end():]
+        self.out.append(declaration)
+        self.started = True
+
+    def flush(self):
+        text = ''.join(self.out)
+        self.out = []
+        self.dst.write(text)
+        self.written += len(text)
+
+    # XMLParser target interface
+
+    def start_ns(self, prefix, uri):
+        self.declarations.append((prefix, uri))
+
+    def start(self, tag, attrib):
+        self._write_text()
+        scope = self.scopes[-1]
+        parts = [self._newline(len(self.names)), '<', None]
+        if self.declarations:
+            scope = dict(scope)
+            for prefix, uri in self.declarations:
+                scope[uri] = prefix
+                parts.append(f' xmlns:{prefix}="' if prefix else ' xmlns="')
+                parts.append(escape(uri, ATTRIBUTE_ENTITIES) + '"')
+            self.declarations = []
+        name = self._qualified(tag, scope)
+        parts[2] = name
+        for key, value in attrib.items():
+            parts.append(f' {self._qualified(key, scope, attribute=True)}="{escape(value, ATTRIBUTE_ENTITIES)}"')
+        self.out.append(''.join(parts))
+        self.names.append(name)
+        self.scopes.append(scope)
+        self.tag_open = True
+
+    def data(self, text):
+        self.text.append(text)
+
+    def end(self, tag):
+        text = ''.join(self.text)
+        self.text = []
+        name = self.names.pop()
+        self.scopes.pop()
+        if self.tag_open:
+            self.tag_open = False
+            self.out.append(f'>{escape(text)}</{name}>' if text else '/>')
+            return
+        depth = len(self.names)
+        if text.strip():
+            self.out.append(self._newline(depth + 1) + escape(text.strip()))
+        self.out.append(f'{self._newline(depth)}</{name}>')
+
+    def comment(self, text):
+        self._write_text()
+        self.out.append(f'{self._newline(len(self.names))}<!--{text}-->')
+
+    def pi(self, target, text):
+        self._write_text()
+        self.out.append(f'{self._newline(len(self.names))}<?{target}{" " + text if text else ""}?>')
+
+    def doctype(self, name, pubid, system):
+        if pubid:
+            external = f' PUBLIC "{pubid}" "{system}"'
+        elif system:
+            external = f' SYSTEM "{system}"'
+        else:
+            external = ''
+        self.out.append(f'{self._newline(0)}<!DOCTYPE {name}{external}>')
+
+    def close(self):
+        pass
+
+    def _write_text(self):
+        """Write the text before a child, comment or processing instruction."""
+        text = ''.join(self.text).strip()
+        self.text = []
+        if self.tag_open:
+            self.out.append('>')
+            self.tag_open = False
+        if text and self.names:  # Outside the root element it is only whitespace
+            self.out.append(self._newline(len(self.names)) + escape(text))
+
+    def _newline(self, depth):
+        if not self.started:
+            self.started = True
+            return ''
+        while len(self.newlines) <= depth:
+            self.newlines.append(self.newlines[-1] + self.indent)
+        return self.newlines[depth]
+
+    @staticmethod
+    def _qualified(name, scope, attribute=False):
+        """Turn {uri}name back into prefix:name."""
+        if name[0] != '{':
+            return name
+        uri, local = name[1:].split('}', 1)
+        prefix = scope.get(uri)
+        if attribute and not prefix:
+            # Attributes are never in the default namespace
+            prefix = next((p for u, p in scope.items() if u == uri and p), None)
+        return f'{prefix}:{local}' if prefix else local
 
 
 def is_valid_xml(xml_str):
@@ -37,6 +270,76 @@ def is_valid_xml(xml_str):
         return False
 
 
+def tokenize_xml(line, state=XML_TEXT):
+    """
+    Split one line of XML into highlight tokens.
+
+    Args:
+    line (str): A single line of text, without its line break.
+    state (int): The XML_* state the previous line ended in.
+
+    Returns:
+    tuple: A list of (start, length, kind) tokens and the state at the end
+    of the line.
+    """
+    tokens = []
+    position = 0
+    run_start = 0  # Start of the comment or CDATA run on this line
+    length = len(line)
+    while position < length:
+        if state == XML_TEXT:
+            match = XML_MARKUP.search(line, position)
+            if match is None:
+                break
+            kind = match.lastgroup
+            if kind in RUN_STATES:
+                state = RUN_STATES[kind]
+                run_start = match.start()
+            else:
+                tokens.append((match.start(), match.end() - match.start(), kind))
+                if kind == 'tag':
+                    state = XML_IN_TAG
+            position = match.end()
+
+        elif state in XML_RUNS:
+            terminator, kind = XML_RUNS[state]
+            end = line.find(terminator, position)
+            stop = length if end < 0 else end + len(terminator)
+            tokens.append((run_start, stop - run_start, kind))
+            if end >= 0:
+                state = XML_TEXT
+            position = stop
+
+        elif state == XML_IN_TAG:
+            match = TAG_PART.match(line, position)
+            if match is None:
+                position += 1  # Stray character inside a tag
+                continue
+            kind = match.lastgroup
+            start = match.start(kind)
+            if kind == 'close':
+                tokens.append((start, match.end() - start, 'tag'))
+                state = XML_TEXT
+            elif kind == 'value':
+                value = match.group(kind)
+                tokens.append((start, len(value), 'value'))
+                if len(value) == 1 or value[-1] != value[0]:
+                    state = XML_IN_VALUE_DQ if value[0] == '"' else XML_IN_VALUE_SQ
+            elif kind == 'attribute':
+                tokens.append((start, match.end() - start, 'attribute'))
+            position = match.end()
+
+        else:
+            quote = '"' if state == XML_IN_VALUE_DQ else "'"
+            end = line.find(quote, position)
+            stop = length if end < 0 else end + 1
+            tokens.append((position, stop - position, 'value'))
+            if end >= 0:
+                state = XML_IN_TAG
+            position = stop
+    return tokens, state
+
+
 def highlight_xml(xml_str):
     """
     Generate a list of QTextCharFormat objects for syntax highlighting XML.
@@ -47,64 +350,42 @@ def highlight_xml(xml_str):
     Returns:
     list: A list of (start_index, length, QTextCharFormat) tuples for highlighting.
     """
+    from .syntax_highlighter import make_formats
+
+    formats = make_formats(XML_STYLES)
     highlights = []
+    state = XML_TEXT
+    offset = 0
+    for line in xml_str.split('\n'):
+        tokens, state = tokenize_xml(line, state)
+        for start, length, kind in tokens:
+            highlights.append((offset + start, length, formats[kind]))
+        offset += len(line) + 1
+    return highlights
 
-    # Define formats
-    tag_format = QTextCharFormat()
-    tag_format.setForeground(QColor("#800000"))  # Maroon
-    tag_format.setFontWeight(QFont.Bold)
-
-    attribute_format = QTextCharFormat()
-    attribute_format.setForeground(QColor("#FF0000"))  # Red
-
-    value_format = QTextCharFormat()
-    value_format.setForeground(QColor("#0000FF"))  # Blue
-
-    comment_format = QTextCharFormat()
-    comment_format.setForeground(QColor("#008000"))  # Green
-    comment_format.setFontItalic(True)
-
-    # Simple parsing and highlighting
-    in_tag = False
-    in_attribute = False
-    in_value = False
-    in_comment = False
-    start = 0
-
-    for i, char in enumerate(xml_str):
-        if char == '<' and not in_comment:
-            if xml_str[i:i + 4] == '<!--':
-                in_comment = True
-                start = i
-            else:
-                in_tag = True
-                start = i
-        elif char == '>' and not in_comment:
-            if in_tag:
-                length = i - start + 1
-                highlights.append((start, length, tag_format))
-                in_tag = False
-        elif char == '=' and in_tag and not in_value:
-            in_attribute = True
-            attr_start = start
-            start = i + 1
-        elif char in ('"', "'") and in_tag:
-            if in_value:
-                length = i - start + 1
-                highlights.append((start, length, value_format))
-                in_value = False
-                start = i + 1
-            else:
-                in_value = True
-                if in_attribute:
-                    length = start - attr_start
-                    highlights.append((attr_start, length, attribute_format))
-                    in_attribute = False
-                start = i
-        elif in_comment and xml_str[i:i + 3] == '-->':
-            length = i - start + 3
-            highlights.append((start, length, comment_format))
-            in_comment = False
 
-    return highlights
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pretty-print an XML file without loading it into memory.")
+    parser.add_argument('input', help="XML file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    parser.add_argument('--indent', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        format_xml_stream(source, sink, indent=args.indent)
+        sink.write('\n')
+    except ET.ParseError as e:
+        print(f"{args.input}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    return 0
+
 
+if __name__ == '__main__':
+    sys.exit(main())